@@ -28,7 +28,7 @@ def handle_transcription(text):
 
 thread = threading.Thread(
     target=transcription_loop,
-    args=(10, handle_transcription),
+    kwargs={"callback": handle_transcription, "on_speech_start": vtuber.interrupt},
     daemon=True
 )
 
@@ -1,33 +1,91 @@
-import whisper
 import sounddevice as sd
 import numpy as np
 from time import time
 import threading
-from queue import Queue, Empty
-from utils.config_manager import size_stt, device
+from queue import Empty
+from utils.config_manager import size_stt, device, stt_decoding, stt_rtf, stt_backend, echo_gate
+from speech.vad import RingBuffer, StreamingVAD, frame_energy
+from speech.decoding import DecodingPolicy, DecodingStats, transcribe_adaptive
+from speech.incremental import IncrementalTranscriber
+from speech.rtf_controller import RTFController, SheddingQueue
+from speech.stt_backends import load_backend
+from speech.echo_gate import EchoGate, playback_timeline
 import torch
 
 # Configuration globale
-model = None
+models = {}  # backends STT chargés, par taille
 model_lock = threading.Lock()
+_preload_lock = threading.Lock()  # protège _preloading et _preload_target (worker + threads de préchargement)
+_preloading = set()
+_preload_target = None  # dernière taille demandée : les préchargements antérieurs sont libérés
+rtf_controller = None  # contrôleur RTF actif (supervision)
+_audio_queue = None
+_vad = None
 SAMPLE_RATE = 16000
+RING_SECONDS = 60  # capacité du buffer circulaire de capture
+BLOCK_MS = 30  # taille des blocs livrés par le callback audio
 
-def load_model():
-    """Charge le modèle Whisper une seule fois (thread-safe) avec support GPU"""
-    global model
+def load_model(size=None):
+    """Charge le modèle STT une seule fois par taille (thread-safe), backend choisi dans config.json"""
+    size = size or size_stt()
     with model_lock:
-        if model is None:
+        if size not in models:
             device_name = device()  # Appeler device() ici pour obtenir la chaîne
-            print(f"🔄 Chargement du modèle Whisper sur {device_name}...")
-            
-            if device_name == "gpu":
-                model = whisper.load_model(size_stt(), device="cuda")
-                print(f"✓ Modèle chargé sur GPU (CUDA) - {torch.cuda.get_device_name(0)}")
-            else:
-                model = whisper.load_model(size_stt(), device="cpu")
-                print("✓ Modèle chargé sur CPU")
+            backend = stt_backend()
+            print(f"🔄 Chargement du modèle '{size}' ({backend}) sur {device_name}...")
+            models[size] = load_backend(backend, size, device_name)
+    
+    return models[size]
+
+def preload_model(size):
+    """
+    Charge un modèle en arrière-plan pendant que le modèle actuel continue de transcrire.
+    Une nouvelle demande remplace la précédente : un préchargement dépassé est libéré
+    dès qu'il se termine (size=None annule sans rien charger).
+    """
+    global _preload_target
+    with _preload_lock:
+        _preload_target = size
+        if size is None or size in models or size in _preloading:
+            return
+        _preloading.add(size)
+    
+    def _load():
+        try:
+            load_model(size)
+        except Exception as e:
+            print(f"❌ Erreur lors du préchargement de '{size}' : {e}")
+        finally:
+            with _preload_lock:
+                _preloading.discard(size)
+                superseded = size != _preload_target
+            if superseded:
+                print(f"⊘ Préchargement de '{size}' dépassé, modèle libéré")
+                release_models(keep=set(models) - {size})
     
-    return model
+    threading.Thread(target=_load, daemon=True, name=f"WhisperPreload-{size}").start()
+
+def release_models(keep):
+    """Libère les modèles chargés qui ne sont plus utilisés"""
+    with model_lock:
+        for size in list(models):
+            if size not in keep:
+                del models[size]
+    if device() == "gpu":
+        torch.cuda.empty_cache()
+
+def get_stt_stats():
+    """Indicateurs de supervision STT : RTF, âge de la file, audio abandonné"""
+    if rtf_controller is None:
+        return {}
+    stats = rtf_controller.stats(_audio_queue)
+    if _vad is not None and _vad.gate is not None:
+        stats["gated_seconds"] = _vad.gate.gated_seconds
+    return stats
+
+def _format_rtf(value):
+    """RTF pour les logs (None tant qu'aucun audio non vide n'a été mesuré)"""
+    return "n/a" if value is None else f"{value:.2f}"
 
 def detect_voice_activity(audio, threshold=0.01, min_speech_duration=0.5):
     """
@@ -41,10 +99,7 @@ def detect_voice_activity(audio, threshold=0.01, min_speech_duration=0.5):
     """
     # Calculer l'énergie RMS par fenêtre
     window_size = int(SAMPLE_RATE * 0.1)  # Fenêtres de 100ms
-    energy = np.array([
-        np.sqrt(np.mean(audio[i:i+window_size]**2))
-        for i in range(0, len(audio) - window_size, window_size)
-    ])
+    energy = frame_energy(audio, window_size)
     
     # Compter les fenêtres avec énergie significative
     speech_windows = np.sum(energy > threshold)
@@ -97,82 +152,199 @@ def recording_worker(audio_queue, duration, stop_event):
             if not stop_event.is_set():
                 continue
 
-def transcription_worker(audio_queue, stop_event, callback=None):
+def create_vad():
+    """Buffer circulaire + VAD partagés entre la capture et la transcription incrémentale"""
+    global _vad
+    ring = RingBuffer(int(RING_SECONDS * SAMPLE_RATE), SAMPLE_RATE)
+    _vad = StreamingVAD(ring, frame_ms=BLOCK_MS)
+    if echo_gate():
+        # Ignore la voix de l'avatar déclarée par le viewer dans playback_timeline
+        _vad.gate = EchoGate(playback_timeline)
+    return _vad
+
+def streaming_recording_worker(audio_queue, stop_event, on_speech_start=None, vad=None):
+    """
+    Thread worker de capture en continu (InputStream + buffer circulaire + VAD)
+    Chaque énoncé est mis en queue dès que le locuteur se tait.
+    Args:
+        audio_queue: file d'attente pour stocker les énoncés détectés
+        stop_event: événement pour arrêter le thread proprement
+        on_speech_start: fonction appelée (heure murale) quand l'utilisateur commence à parler
+        vad: StreamingVAD à utiliser (créé si None)
+    """
+    vad = vad or create_vad()
+    ring = vad.ring
+    vad.on_speech_start = on_speech_start
+    data_ready = threading.Event()
+
+    def audio_callback(indata, frames, time_info, status):
+        if status:
+            print(f"⚠️  Statut audio : {status}")
+        ring.write(indata[:, 0])
+        data_ready.set()
+
+    print("🎤 Écoute en continu...")
+    with sd.InputStream(
+        samplerate=SAMPLE_RATE,
+        channels=1,
+        dtype='float32',
+        blocksize=int(SAMPLE_RATE * BLOCK_MS / 1000),
+        callback=audio_callback
+    ):
+        while not stop_event.is_set():
+            if not data_ready.wait(timeout=0.1):
+                continue
+            data_ready.clear()
+
+            try:
+                for speech_start, audio in vad.process():
+                    print(f"✓ Parole détectée ({len(audio) / SAMPLE_RATE:.2f}s), ajout à la queue de transcription")
+                    audio_queue.put(audio, key=speech_start)
+            except Exception as e:
+                print(f"❌ Erreur lors de l'analyse audio : {e}")
+
+def transcription_worker(audio_queue, stop_event, callback=None, partial_callback=None, vad=None):
     """
     Thread worker pour la transcription avec optimisations GPU
     Args:
-        audio_queue: file d'attente contenant les audios à transcrire
+        audio_queue: SheddingQueue contenant les audios à transcrire
         stop_event: événement pour arrêter le thread proprement
         callback: fonction appelée avec le texte transcrit (optionnel)
+        partial_callback: fonction appelée avec les transcriptions partielles stables
+            (mode incrémental, nécessite le vad de la capture en streaming)
+        vad: StreamingVAD partagé avec la capture (mode incrémental)
     """
-    mdl = load_model()
+    global rtf_controller
+    rtf_controller = RTFController(size_stt(), **{
+        k: v for k, v in stt_rtf().items() if k in ("high", "low", "patience", "alpha")
+    })
+    active_size = rtf_controller.current_size
+    pending_size = None
+    mdl = load_model(active_size)
     device_name = device()  # Obtenir le nom du device
     
-    # Options de transcription optimisées
+    # Options de transcription communes (glouton d'abord, beam search si confiance faible)
     transcribe_options = {
         "fp16": device_name == "gpu",
         "language": "fr",  # Spécifier la langue pour accélérer
-        "beam_size": 5,  # Réduire pour plus de vitesse (défaut: 5)
-        "best_of": 5,  # Réduire pour plus de vitesse (défaut: 5)
-        "temperature": 0.0,  # Désactiver le sampling pour plus de vitesse
     }
+    policy = DecodingPolicy.from_config(stt_decoding())
+    stats = DecodingStats()
     
-    print(f"🔧 Options de transcription: fp16={transcribe_options['fp16']}")
+    incremental = None
+    if partial_callback is not None and vad is not None:
+        incremental = IncrementalTranscriber(vad, transcribe_options, policy, stats, partial_callback)
+    
+    print(f"🔧 Options de transcription: fp16={transcribe_options['fp16']}, {policy}")
     
     while not stop_event.is_set() or not audio_queue.empty():
         try:
             # Attendre un audio avec timeout
-            audio = audio_queue.get(timeout=1)
+            audio, age, key = audio_queue.get(timeout=0.1 if incremental else 1)
+            
+            # Basculer sur le modèle préchargé dès qu'il est prêt
+            if pending_size is not None and pending_size in models:
+                mdl = models[pending_size]
+                active_size, pending_size = pending_size, None
+                preload_model(None)  # un préchargement encore en cours sera libéré à la fin
+                release_models({active_size})
+                print(f"✓ Modèle STT actif : {active_size}")
             
             print("🔄 Transcription en cours...")
             start = time()
             
-            # Transcription avec options optimisées
-            result = mdl.transcribe(audio, **transcribe_options)
+            if incremental is not None:
+                # Seule la partie non validée pendant la parole reste à décoder
+                # (énoncé entier si l'état suivi appartient à un autre énoncé)
+                text = incremental.finalize(mdl, audio, key)
+                partial_time = incremental.last_decode_time
+            else:
+                # Transcription adaptative (silences et hallucinations retirés)
+                text = transcribe_adaptive(mdl, audio, transcribe_options, policy, stats)
+                partial_time = 0.0
             
             end = time()
             
             print(f"⏱️  Temps de transcription : {end - start:.2f} secondes")
-            print(f"📝 Transcription : {result['text']}\n")
             
-            # Appeler le callback si fourni
-            if callback:
-                callback(result['text'])
+            # Le RTF inclut le coût des décodages partiels de l'énoncé
+            decode_time = max(end - start, partial_time)
+            target = rtf_controller.record(len(audio) / SAMPLE_RATE, decode_time, age, audio_queue.empty())
+            if target is not None:
+                # retour à la taille active : le préchargement en attente est abandonné
+                pending_size = target if target != active_size else None
+                preload_model(target)
+            
+            stt_stats = get_stt_stats()
+            print(f"📈 RTF {_format_rtf(stt_stats['rtf'])} (moy. {_format_rtf(stt_stats['rtf_ewma'])}), "
+                  f"attente {age:.1f}s, audio abandonné {stt_stats['dropped_seconds']:.1f}s, "
+                  f"écho filtré {stt_stats.get('gated_seconds', 0.0):.1f}s")
+            
+            if text is None:
+                print("⊘ Silence ou hallucination, transcription ignorée\n")
+            else:
+                print(f"📝 Transcription : {text}\n")
+                
+                # Appeler le callback si fourni
+                if callback:
+                    callback(text)
             
             # Nettoyer la mémoire GPU si utilisée
             if device_name == "gpu":
                 torch.cuda.empty_cache()
             
-            audio_queue.task_done()
-            
         except Empty:
+            if incremental is not None:
+                try:
+                    incremental.poll(mdl)
+                except Exception as e:
+                    print(f"❌ Erreur pendant la transcription partielle : {e}")
             continue
         except Exception as e:
             print(f"❌ Erreur pendant la transcription : {e}")
-            if not audio_queue.empty():
-                audio_queue.task_done()
+            if incremental is not None:
+                incremental.reset()
 
-def transcription_loop(interval=30, callback=None):
+def transcription_loop(interval=30, callback=None, streaming=True, on_speech_start=None, partial_callback=None):
     """
     Boucle de transcription continue avec enregistrement et analyse en parallèle
     Args:
-        interval: durée d'enregistrement (en secondes)
+        interval: durée d'enregistrement (en secondes, mode par fenêtres uniquement)
         callback: fonction appelée avec le texte transcrit (optionnel)
+        streaming: capture continue avec découpage par VAD (sinon fenêtres fixes)
+        on_speech_start: fonction appelée quand l'utilisateur commence à parler (streaming)
+        partial_callback: active la transcription incrémentale pendant la parole (streaming)
     """
-    # Queue avec taille limitée pour éviter l'accumulation
-    audio_queue = Queue(maxsize=2)
+    # Queue bornée qui ne bloque jamais la capture (délestage des segments anciens)
+    global _audio_queue
+    rtf_config = stt_rtf()
+    audio_queue = SheddingQueue(
+        maxsize=rtf_config.get("queue_size", 4),
+        max_age=rtf_config.get("max_queue_age", 10.0),
+        sample_rate=SAMPLE_RATE
+    )
+    _audio_queue = audio_queue
     stop_event = threading.Event()
     
     # Créer les threads
-    recorder_thread = threading.Thread(
-        target=recording_worker,
-        args=(audio_queue, interval, stop_event),
-        daemon=True,
-        name="AudioRecorder"
-    )
+    vad = create_vad() if streaming else None
+    if streaming:
+        recorder_thread = threading.Thread(
+            target=streaming_recording_worker,
+            args=(audio_queue, stop_event, on_speech_start, vad),
+            daemon=True,
+            name="AudioRecorder"
+        )
+    else:
+        recorder_thread = threading.Thread(
+            target=recording_worker,
+            args=(audio_queue, interval, stop_event),
+            daemon=True,
+            name="AudioRecorder"
+        )
     transcriber_thread = threading.Thread(
         target=transcription_worker,
-        args=(audio_queue, stop_event, callback),
+        args=(audio_queue, stop_event, callback, partial_callback, vad),
         daemon=True,
         name="AudioTranscriber"
     )
@@ -206,5 +378,5 @@ def transcription_loop(interval=30, callback=None):
         print("✓ Arrêt terminé")
 
 if __name__ == "__main__":
-    # Mode continu avec enregistrement et transcription en parallèle
-    transcription_loop(interval=30)
\ No newline at end of file
+    # Mode continu : capture en streaming, transcription dès la fin de chaque énoncé
+    transcription_loop()
\ No newline at end of file
@@ -1,10 +1,30 @@
 import os
+import threading
 import wave
 from huggingface_hub import snapshot_download
 from piper import PiperVoice
 from pydub import AudioSegment
 from pydub.playback import play
 
+TTS_MODEL_PATH = "models/fr/fr_FR/upmc/medium/fr_FR-upmc-medium.onnx"
+
+class SynthesisCancelled(Exception):
+    """Levée quand une synthèse est annulée en cours de route."""
+
+
+class CancelToken:
+    """Jeton d'annulation partagé entre le demandeur et le thread de synthèse."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+
 def download_full_directory():
     """Télécharge tous les fichiers du dossier fr/fr_FR/upmc/medium"""
     local_dir = snapshot_download(
@@ -16,7 +36,7 @@ def download_full_directory():
     print(f"Fichiers téléchargés dans : {local_dir}")
     return local_dir
 
-def synthesize_audio(voice, text, file_path = "output.wav", play_audio = False):
+def synthesize_audio(voice, text, file_path = "output.wav", play_audio = False, cancel_token = None):
     """
     Synthétise du texte en audio avec Piper et sauvegarde avec pydub
     
@@ -25,14 +45,31 @@ def synthesize_audio(voice, text, file_path = "output.wav", play_audio = False):
         text: Texte à synthétiser
         output_path: Chemin du fichier de sortie
         play_audio: Si True, joue l'audio après la synthèse
+        cancel_token: CancelToken vérifié entre chaque bloc audio produit par Piper
     
     Returns:
         AudioSegment: L'objet audio créé
+    
+    Raises:
+        SynthesisCancelled: si le jeton est annulé pendant la synthèse
     """
     print(f"Synthèse en cours : '{text}'")
     
+    if cancel_token is not None and cancel_token.is_cancelled():
+        raise SynthesisCancelled(text)
+    
     with wave.open(file_path, "wb") as wav_file:
-        voice.synthesize_wav(text, wav_file)
+        if cancel_token is None:
+            voice.synthesize_wav(text, wav_file)
+        else:
+            # Format fixé d'avance : le fichier reste valide même si on annule avant le 1er bloc
+            wav_file.setframerate(voice.config.sample_rate)
+            wav_file.setsampwidth(2)
+            wav_file.setnchannels(1)
+            for chunk in voice.synthesize(text):
+                if cancel_token.is_cancelled():
+                    raise SynthesisCancelled(text)
+                wav_file.writeframes(chunk.audio_int16_bytes)
     
     audio = AudioSegment.from_wav(file_path)
     
@@ -44,17 +81,21 @@ def synthesize_audio(voice, text, file_path = "output.wav", play_audio = False):
 
 def play_audio(audio): play(audio)
 
-def init_model_TTS(): return PiperVoice.load("models/fr/fr_FR/upmc/medium/fr_FR-upmc-medium.onnx")
+def init_model_TTS(): return PiperVoice.load(TTS_MODEL_PATH)
+
+def voice_name(model_path: str = TTS_MODEL_PATH) -> str:
+    """Identifiant de la voix (nom du fichier .onnx sans extension)"""
+    return os.path.splitext(os.path.basename(model_path))[0]
 
 if __name__ == "__main__":
     # Télécharger le modèle si nécessaire
-    if not os.path.isfile("models/fr/fr_FR/upmc/medium/fr_FR-upmc-medium.onnx"):
+    if not os.path.isfile(TTS_MODEL_PATH):
         print("Téléchargement du modèle...")
         download_full_directory()
     
     # Charger la voix
     print("Chargement du modèle...")
-    voice = PiperVoice.load("models/fr/fr_FR/upmc/medium/fr_FR-upmc-medium.onnx")
+    voice = PiperVoice.load(TTS_MODEL_PATH)
     
     # Synthétiser du texte
     text = "Ceci est un test de synthèse vocale avec Piper et pydub."
@@ -0,0 +1,127 @@
+"""
+Compare les backends STT (précision et facteur temps réel) sur des WAV locaux.
+
+    python -m speech.benchmark_stt <dossier_wav> [taille] [backend ...]
+
+Chaque fichier `x.wav` peut être accompagné de `x.txt` (transcription de
+référence) pour calculer le taux d'erreur sur les mots (WER).
+"""
+
+import os
+import re
+import sys
+import wave
+from time import time
+
+import numpy as np
+
+from speech.stt_backends import BACKENDS, load_backend
+from utils.config_manager import size_stt, device, language
+
+SAMPLE_RATE = 16000
+
+
+def load_wav(path: str) -> np.ndarray:
+    """WAV 16 bits -> float32 mono 16 kHz"""
+    with wave.open(path, "rb") as wav_file:
+        rate = wav_file.getframerate()
+        channels = wav_file.getnchannels()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def normalize(text: str) -> list[str]:
+    return re.sub(r"[^\w' ]+", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Distance d'édition sur les mots / nombre de mots de référence"""
+    ref, hyp = normalize(reference), normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def run_benchmark(wav_dir: str, size: str, backends: list[str]) -> dict:
+    """
+    Transcrit chaque WAV avec chaque backend.
+    Returns:
+        dict: {backend: {"rtf": ..., "wer": ..., "files": [...]}}
+    """
+    files = sorted(f for f in os.listdir(wav_dir) if f.lower().endswith(".wav"))
+    if not files:
+        raise FileNotFoundError(f"Aucun fichier .wav dans {wav_dir}")
+
+    samples = []
+    for name in files:
+        path = os.path.join(wav_dir, name)
+        ref_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.isfile(ref_path):
+            with open(ref_path, encoding="utf-8") as f:
+                reference = f.read().strip()
+        samples.append((name, load_wav(path), reference))
+
+    options = {"language": language(), "temperature": 0.0, "fp16": device() == "gpu"}
+    report = {}
+
+    for backend_name in backends:
+        print(f"\n=== {backend_name} ({size}) ===")
+        backend = load_backend(backend_name, size, device())
+        backend.transcribe(samples[0][1][:SAMPLE_RATE], **options)  # warm up
+
+        total_audio = total_time = 0.0
+        errors = []
+        rows = []
+        for name, audio, reference in samples:
+            start = time()
+            text = backend.transcribe(audio, **options)["text"].strip()
+            elapsed = time() - start
+
+            seconds = len(audio) / SAMPLE_RATE
+            total_audio += seconds
+            total_time += elapsed
+            wer = word_error_rate(reference, text) if reference is not None else None
+            if wer is not None:
+                errors.append(wer)
+
+            wer_str = f"{wer:.1%}" if wer is not None else "-"
+            print(f"  {name:30s} RTF {elapsed / seconds:5.2f}  WER {wer_str:>6s}  {text[:60]}")
+            rows.append({"file": name, "rtf": elapsed / seconds, "wer": wer, "text": text})
+
+        report[backend_name] = {
+            "rtf": total_time / total_audio,
+            "wer": sum(errors) / len(errors) if errors else None,
+            "files": rows,
+        }
+
+    print("\n=== Résumé ===")
+    for backend_name, result in report.items():
+        wer_str = f"{result['wer']:.1%}" if result["wer"] is not None else "-"
+        print(f"  {backend_name:15s} RTF {result['rtf']:.2f}  WER {wer_str}")
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    wav_dir = sys.argv[1]
+    size = sys.argv[2] if len(sys.argv) > 2 else size_stt()
+    backends = sys.argv[3:] or list(BACKENDS)
+    run_benchmark(wav_dir, size, backends)
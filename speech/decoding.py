@@ -0,0 +1,144 @@
+"""
+Décodage Whisper adaptatif : recherche gloutonne d'abord, beam search seulement
+si la confiance est faible. Les segments de silence ou d'hallucination sont
+retirés avant d'atteindre le callback.
+"""
+
+import re
+from dataclasses import dataclass, field
+from time import time
+from typing import Optional
+
+# Phrases typiquement inventées par Whisper sur du silence ou du bruit
+HALLUCINATIONS = [
+    "sous-titres réalisés par",
+    "sous-titrage société radio-canada",
+    "sous-titrage st'",
+    "amara.org",
+    "merci d'avoir regardé",
+    "thanks for watching",
+    "thank you for watching",
+]
+
+
+@dataclass
+class DecodingPolicy:
+    """Seuils de repli vers le beam search (mêmes conventions que whisper.transcribe)."""
+    logprob_threshold: float = -1.0
+    compression_ratio_threshold: float = 2.4
+    no_speech_threshold: float = 0.6
+    beam_size: int = 5
+    best_of: int = 5
+
+    @classmethod
+    def from_config(cls, values: dict) -> 'DecodingPolicy':
+        known = {k: v for k, v in values.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def is_silence(self, segment: dict) -> bool:
+        return (segment.get("no_speech_prob", 0.0) > self.no_speech_threshold
+                and segment.get("avg_logprob", 0.0) < self.logprob_threshold)
+
+    def is_hallucination(self, segment: dict) -> bool:
+        if segment.get("compression_ratio", 0.0) > self.compression_ratio_threshold:
+            return True
+        text = segment.get("text", "").strip().lower()
+        return any(phrase in text for phrase in HALLUCINATIONS)
+
+    def is_low_confidence(self, segment: dict) -> bool:
+        if self.is_silence(segment):
+            return False
+        return (segment.get("avg_logprob", 0.0) < self.logprob_threshold
+                or segment.get("compression_ratio", 0.0) > self.compression_ratio_threshold)
+
+
+@dataclass
+class DecodingStats:
+    """Compteurs du décodage adaptatif (taux de repli, temps économisé)."""
+    utterances: int = 0
+    fallbacks: int = 0
+    dropped: int = 0
+    greedy_only_time: float = 0.0  # énoncés acceptés dès la passe gloutonne
+    wasted_greedy_time: float = 0.0  # passes gloutonnes suivies d'un beam search
+    beam_time: float = 0.0
+    cost_ratios: list = field(default_factory=list)
+
+    DEFAULT_BEAM_COST = 2.5  # beam/greedy tant qu'aucun repli n'a été mesuré
+
+    def beam_cost_ratio(self) -> float:
+        if not self.cost_ratios:
+            return self.DEFAULT_BEAM_COST
+        return sum(self.cost_ratios) / len(self.cost_ratios)
+
+    def fallback_rate(self) -> float:
+        return self.fallbacks / self.utterances if self.utterances else 0.0
+
+    def time_saved(self) -> float:
+        """Temps économisé estimé par rapport à un beam search systématique"""
+        return self.greedy_only_time * (self.beam_cost_ratio() - 1.0) - self.wasted_greedy_time
+
+    def record(self, greedy: float, beam: Optional[float]) -> None:
+        self.utterances += 1
+        if beam is None:
+            self.greedy_only_time += greedy
+            return
+        self.fallbacks += 1
+        self.wasted_greedy_time += greedy
+        self.beam_time += beam
+        if greedy > 0:
+            self.cost_ratios.append(beam / greedy)
+
+    def summary(self) -> str:
+        return (f"repli beam {self.fallbacks}/{self.utterances} ({self.fallback_rate():.0%}), "
+                f"temps économisé ≈ {self.time_saved():.2f}s, énoncés ignorés {self.dropped}")
+
+
+def filter_result(result: dict, policy: DecodingPolicy) -> Optional[str]:
+    """Retire les segments de silence / hallucination. None si rien ne reste."""
+    segments = result.get("segments")
+    if segments is None:
+        text = result.get("text", "").strip()
+        return text or None
+
+    kept = [
+        seg["text"].strip() for seg in segments
+        if not policy.is_silence(seg) and not policy.is_hallucination(seg)
+    ]
+    text = re.sub(r"\s+", " ", " ".join(kept)).strip()
+    return text or None
+
+
+def transcribe_adaptive(mdl, audio, options: dict, policy: DecodingPolicy, stats: DecodingStats) -> Optional[str]:
+    """
+    Transcrit en glouton, puis refait un beam search si un segment est peu fiable.
+    Args:
+        mdl: modèle (interface whisper : mdl.transcribe(audio, **options))
+        audio: signal float32 16 kHz
+        options: options communes (langue, fp16...)
+        policy: seuils de repli et de filtrage
+        stats: compteurs mis à jour
+    Returns:
+        str | None: texte retenu, None si silence / hallucination
+    """
+    greedy_options = {**options, "temperature": 0.0, "beam_size": None, "best_of": None}
+
+    start = time()
+    result = mdl.transcribe(audio, **greedy_options)
+    greedy_time = time() - start
+    beam_time = None
+
+    if any(policy.is_low_confidence(seg) for seg in result.get("segments", [])):
+        beam_options = {**options, "temperature": 0.0,
+                        "beam_size": policy.beam_size, "best_of": policy.best_of}
+        start = time()
+        result = mdl.transcribe(audio, **beam_options)
+        beam_time = time() - start
+        print(f"🔁 Confiance faible, beam search ({greedy_time:.2f}s + {beam_time:.2f}s)")
+
+    stats.record(greedy_time, beam_time)
+    text = filter_result(result, policy)
+    if text is None:
+        stats.dropped += 1
+
+    print(f"📊 Décodage adaptatif : {stats.summary()}")
+    return text
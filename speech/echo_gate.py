@@ -0,0 +1,118 @@
+"""
+Filtrage de l'écho : la voix de l'avatar, captée par le micro quand elle sort
+des haut-parleurs, ne doit pas être envoyée à Whisper.
+
+Le viewer déclare chaque lecture dans `playback_timeline` (même processus que
+le STT). Pendant la lecture (et une courte traîne), le VAD ne considère une
+trame comme de la parole utilisateur que si son énergie dépasse nettement
+l'écho attendu :
+- avec la référence (enveloppe RMS du PCM TTS joué) : écho attendu =
+  couplage haut-parleur -> micro (appris en continu) * énergie de référence ;
+- sans référence : seuil du VAD multiplié par `no_reference_ratio`.
+Une vraie prise de parole par-dessus l'avatar reste détectée (barge-in).
+"""
+
+import threading
+from time import time
+from typing import Optional
+
+import numpy as np
+
+
+class PlaybackTimeline:
+    """Lecture en cours de l'avatar (début, fin prévue, enveloppe de référence)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self.envelope: Optional[np.ndarray] = None
+        self.envelope_fps = 60
+
+    def start(self, start_time: float, duration: float, envelope: Optional[np.ndarray] = None, envelope_fps: int = 60) -> None:
+        with self._lock:
+            self.start_time = start_time
+            self.end_time = start_time + duration
+            self.envelope = None if envelope is None else np.asarray(envelope, dtype=np.float32)
+            self.envelope_fps = envelope_fps
+
+    def stop(self, at: Optional[float] = None) -> None:
+        """Fin (anticipée) de la lecture en cours"""
+        with self._lock:
+            if self.end_time is not None:
+                self.end_time = min(self.end_time, at or time())
+
+    def snapshot(self):
+        with self._lock:
+            return self.start_time, self.end_time, self.envelope, self.envelope_fps
+
+
+playback_timeline = PlaybackTimeline()
+
+
+class EchoGate:
+    """
+    Args:
+        timeline: lectures de l'avatar
+        tail: traîne (s) après la fin de lecture (réverbération, latence de sortie)
+        latency: décalage acoustique maximal (s) entre la référence et le micro
+        margin: la parole doit dépasser margin * écho attendu
+        no_reference_ratio: multiplicateur du seuil quand aucune référence n'est connue
+        coupling_alpha: vitesse d'apprentissage du couplage haut-parleur -> micro
+    """
+
+    def __init__(self, timeline: PlaybackTimeline = playback_timeline, tail: float = 0.3,
+                 latency: float = 0.15, margin: float = 2.5, no_reference_ratio: float = 4.0,
+                 coupling_alpha: float = 0.05):
+        self.timeline = timeline
+        self.tail = tail
+        self.latency = latency
+        self.margin = margin
+        self.no_reference_ratio = no_reference_ratio
+        self.coupling_alpha = coupling_alpha
+        self.coupling = 1.0  # volontairement haut au départ, appris à la baisse
+        self.gated_seconds = 0.0
+
+    def _reference(self, times: np.ndarray, start: float, envelope: np.ndarray, fps: int) -> np.ndarray:
+        """Énergie de référence max sur [t - latency, t] pour chaque trame"""
+        reference = np.zeros(len(times), dtype=np.float32)
+        for delay in np.linspace(0.0, self.latency, 4):
+            idx = ((times - delay - start) * fps).astype(np.int64)
+            valid = (idx >= 0) & (idx < len(envelope))
+            reference[valid] = np.maximum(reference[valid], envelope[idx[valid]])
+        return reference
+
+    def filter(self, energy: np.ndarray, times: np.ndarray, threshold: float, frame_seconds: float):
+        """
+        Args:
+            energy: énergie RMS par trame
+            times: heure murale de chaque trame
+            threshold: seuil courant du VAD
+            frame_seconds: durée d'une trame
+        Returns:
+            tuple: (trames voisées, trames recouvrant une lecture de l'avatar)
+        """
+        voiced = energy > threshold
+        start, end, envelope, fps = self.timeline.snapshot()
+        if start is None:
+            return voiced, np.zeros(len(energy), dtype=bool)
+
+        playing = (times >= start) & (times <= end + self.tail)
+        if not playing.any():
+            return voiced, playing
+
+        if envelope is not None and len(envelope):
+            reference = self._reference(times, start, envelope, fps)
+            echo = self.coupling * reference
+            gated_voiced = voiced & (~playing | (energy > self.margin * echo))
+
+            # Apprendre le couplage sur les trames au-dessus du bruit jugées « écho seul »
+            learn = playing & voiced & ~gated_voiced & (reference > 1e-3)
+            if learn.any():
+                ratio = float(np.median(energy[learn] / reference[learn]))
+                self.coupling += self.coupling_alpha * (ratio - self.coupling)
+        else:
+            gated_voiced = voiced & (~playing | (energy > threshold * self.no_reference_ratio))
+
+        self.gated_seconds += float(np.sum(voiced & ~gated_voiced)) * frame_seconds
+        return gated_voiced, playing
@@ -0,0 +1,205 @@
+"""
+Banque de réactions courtes (« hmm », « ah oui ? », « attends... ») pré-synthétisées.
+
+Pendant que STT, modération, LLM et TTS travaillent, l'avatar peut jouer
+instantanément une de ces réactions. Les clips sont synthétisés une seule fois
+par voix (à l'installation), avec leur enveloppe de lip sync et l'émotion
+associée :
+
+    python -m speech.filler_bank [--force]
+"""
+
+import json
+import os
+import random
+import sys
+import wave
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from utils.config_manager import language
+
+BANK_DIR = "models/fillers"
+INDEX_FILE = "index.json"
+ENVELOPE_FPS = 60
+
+# (catégorie, texte, émotion go_emotions utilisée pour l'expression)
+FILLERS = {
+    "fr": [
+        ("thinking", "Hmm...", "curiosity"),
+        ("thinking", "Attends...", "curiosity"),
+        ("thinking", "Voyons voir...", "curiosity"),
+        ("thinking", "Euh...", "confusion"),
+        ("ack", "Ah oui ?", "surprise"),
+        ("ack", "D'accord.", "approval"),
+        ("ack", "Je vois.", "realization"),
+        ("ack", "Ah !", "realization"),
+    ],
+    "en": [
+        ("thinking", "Hmm...", "curiosity"),
+        ("thinking", "Wait...", "curiosity"),
+        ("thinking", "Let me see...", "curiosity"),
+        ("thinking", "Uh...", "confusion"),
+        ("ack", "Oh really?", "surprise"),
+        ("ack", "Okay.", "approval"),
+        ("ack", "I see.", "realization"),
+        ("ack", "Ah!", "realization"),
+    ],
+}
+
+
+@dataclass
+class FillerClip:
+    """Clip de réaction prêt à jouer."""
+    category: str
+    text: str
+    audio_path: str
+    duration: float
+    emotion: str
+    envelope: np.ndarray
+    envelope_fps: int = ENVELOPE_FPS
+
+    def rms_at(self, elapsed: float) -> float:
+        """Valeur RMS de l'enveloppe à l'instant `elapsed` (secondes)."""
+        idx = int(elapsed * self.envelope_fps)
+        if idx < 0 or idx >= len(self.envelope):
+            return 0.0
+        return float(self.envelope[idx])
+
+
+def bank_path(voice: str) -> str:
+    return os.path.join(BANK_DIR, voice)
+
+
+def compute_envelope(file_path: str, fps: int = ENVELOPE_FPS) -> np.ndarray:
+    """
+    Calcule l'enveloppe RMS d'un WAV 16 bits mono (même échelle que WavHandler.GetRms)
+    Args:
+        file_path: chemin du WAV
+        fps: nombre de valeurs par seconde
+    """
+    with wave.open(file_path, "rb") as wav_file:
+        sample_rate = wav_file.getframerate()
+        channels = wav_file.getnchannels()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    hop = max(1, sample_rate // fps)
+    n_frames = len(samples) // hop
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    frames = samples[:n_frames * hop].reshape(n_frames, hop)
+    return np.sqrt(np.mean(frames ** 2, axis=1)).astype(np.float32)
+
+
+def build_bank(voice_model=None, voice: Optional[str] = None, lang: Optional[str] = None, force: bool = False) -> str:
+    """
+    Synthétise tous les clips de réaction pour une voix et écrit l'index.
+    À lancer à l'installation, jamais pendant une conversation.
+    Args:
+        voice_model: instance PiperVoice (chargée si None)
+        voice: identifiant de la voix (dérivé du modèle TTS si None)
+        lang: langue des réactions (config.json si None)
+        force: resynthétise même si l'index existe déjà
+    Returns:
+        str: dossier de la banque
+    """
+    from speech.TTS import init_model_TTS, synthesize_audio, voice_name
+
+    voice = voice or voice_name()
+    lang = lang or language()
+    directory = bank_path(voice)
+    index_path = os.path.join(directory, INDEX_FILE)
+
+    if os.path.isfile(index_path) and not force:
+        print(f"[FillerBank] Banque déjà construite : {directory} (--force pour reconstruire)")
+        return directory
+
+    os.makedirs(directory, exist_ok=True)
+    if voice_model is None:
+        voice_model = init_model_TTS()
+
+    clips = []
+    for i, (category, text, emotion) in enumerate(FILLERS.get(lang, FILLERS["fr"])):
+        file_name = f"{category}_{i:02d}.wav"
+        file_path = os.path.join(directory, file_name)
+        _, duration = synthesize_audio(voice_model, text, file_path)
+        clips.append({
+            "category": category,
+            "text": text,
+            "file": file_name,
+            "duration": duration,
+            "emotion": emotion,
+            "envelope": [round(float(v), 4) for v in compute_envelope(file_path)],
+        })
+
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "voice": voice,
+            "language": lang,
+            "envelope_fps": ENVELOPE_FPS,
+            "clips": clips,
+        }, f, ensure_ascii=False)
+
+    print(f"[FillerBank] {len(clips)} clips écrits dans {directory}")
+    return directory
+
+
+class FillerBank:
+    """Banque chargée en mémoire, avec tirage sans répétition immédiate."""
+
+    def __init__(self, clips: list[FillerClip]):
+        self.clips = clips
+        self._last: Optional[FillerClip] = None
+
+    @classmethod
+    def load(cls, voice: str) -> Optional['FillerBank']:
+        """Charge la banque d'une voix, ou None si elle n'a pas été construite."""
+        directory = bank_path(voice)
+        index_path = os.path.join(directory, INDEX_FILE)
+
+        if not os.path.isfile(index_path):
+            print(f"[FillerBank] Aucune banque pour '{voice}' (python -m speech.filler_bank)")
+            return None
+
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+
+        fps = index.get("envelope_fps", ENVELOPE_FPS)
+        clips = [
+            FillerClip(
+                category=c["category"],
+                text=c["text"],
+                audio_path=os.path.join(directory, c["file"]),
+                duration=c["duration"],
+                emotion=c["emotion"],
+                envelope=np.asarray(c["envelope"], dtype=np.float32),
+                envelope_fps=fps,
+            )
+            for c in index["clips"]
+            if os.path.isfile(os.path.join(directory, c["file"]))
+        ]
+
+        if not clips:
+            return None
+
+        print(f"[FillerBank] {len(clips)} réactions chargées pour '{voice}'")
+        return cls(clips)
+
+    def pick(self, category: Optional[str] = None) -> FillerClip:
+        """Tire un clip (de la catégorie donnée si possible) différent du précédent."""
+        candidates = [c for c in self.clips if category is None or c.category == category] or self.clips
+        if len(candidates) > 1 and self._last in candidates:
+            candidates = [c for c in candidates if c is not self._last]
+        self._last = random.choice(candidates)
+        return self._last
+
+
+if __name__ == "__main__":
+    build_bank(force="--force" in sys.argv[1:])
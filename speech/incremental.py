@@ -0,0 +1,154 @@
+"""
+Transcription incrémentale de l'énoncé en cours (fenêtres glissantes).
+
+L'état (texte validé, décalage de la fenêtre) appartient à un énoncé précis,
+identifié par son speech_start (index absolu du premier échantillon voisé,
+donné par StreamingVAD et transporté avec l'audio dans la SheddingQueue).
+Si l'énoncé finalisé n'est pas celui suivi pendant la parole (énoncé
+abandonné par la file, parole reprise avant la fin du décodage...), l'état
+incrémental est ignoré et l'énoncé est décodé en entier.
+"""
+
+from time import time
+
+from speech.decoding import transcribe_adaptive
+
+
+class IncrementalTranscriber:
+    """
+    Transcription par fenêtres glissantes pendant que l'utilisateur parle.
+
+    - la fenêtre va de la fin du texte validé jusqu'au présent ;
+    - le texte validé sert de prompt au décodage suivant ;
+    - les mots identiques sur deux passes consécutives sont stables (partiels) ;
+    - un segment Whisper confirmé deux fois et terminé assez loin du bord de
+      la fenêtre est validé : il ne changera plus et la fenêtre avance.
+    À la fin de l'énoncé, seule la queue non validée reste à décoder.
+    """
+
+    def __init__(self, vad, options, policy, stats, on_partial=None,
+                 step=0.8, commit_margin=1.0, max_window=20.0):
+        """
+        Args:
+            vad: StreamingVAD fournissant l'énoncé en cours
+            options: options de transcription communes
+            policy / stats: décodage adaptatif utilisé pour la queue finale
+            on_partial: fonction appelée avec le texte stable (validé + partiel)
+            step: audio nouveau (s) nécessaire avant un nouveau décodage
+            commit_margin: distance minimale (s) entre un segment validé et le bord
+            max_window: au-delà, les segments terminés sont validés sans confirmation
+        """
+        self.vad = vad
+        self.sample_rate = vad.ring.sample_rate
+        self.options = options
+        self.policy = policy
+        self.stats = stats
+        self.on_partial = on_partial
+        self.step = int(step * self.sample_rate)
+        self.commit_margin = commit_margin
+        self.max_window = max_window
+        self.last_decode_time = 0.0  # décodage cumulé du dernier énoncé finalisé
+        self.reset()
+
+    def reset(self, key=None):
+        self.key = key  # speech_start de l'énoncé suivi (None = aucun)
+        self.committed = []  # textes des segments validés
+        self.offset = 0  # échantillon (dans l'énoncé) où commence la fenêtre
+        self.decoded_len = 0
+        self.previous_segments = []
+        self.previous_words = []
+        self.last_partial = ""
+        self.decode_time = 0.0  # temps de décodage cumulé sur l'énoncé
+
+    def committed_text(self):
+        return " ".join(self.committed).strip()
+
+    def _decode_window(self, mdl, window):
+        options = {**self.options, "temperature": 0.0, "beam_size": None, "best_of": None,
+                   "initial_prompt": self.committed_text() or None}
+        start = time()
+        result = mdl.transcribe(window, **options)
+        self.decode_time += time() - start
+        return [seg for seg in result.get("segments", [])
+                if not self.policy.is_silence(seg) and not self.policy.is_hallucination(seg)]
+
+    def poll(self, mdl):
+        """Décode la fenêtre courante si assez d'audio nouveau est arrivé"""
+        current = self.vad.current_utterance()
+        if current is None:
+            return
+        key, audio = current
+        if key != self.key:
+            self.reset(key)  # nouvel énoncé : l'état du précédent ne s'applique pas
+        if len(audio) - self.decoded_len < self.step:
+            return
+        self.decoded_len = len(audio)
+
+        window = audio[self.offset:]
+        window_seconds = len(window) / self.sample_rate
+        segments = self._decode_window(mdl, window)
+
+        # Valider les segments stables (tous sauf le dernier, en cours)
+        force = window_seconds > self.max_window
+        previous_texts = [seg["text"].strip() for seg in self.previous_segments]
+        advance = 0.0
+        n_commit = 0
+        for i, seg in enumerate(segments[:-1]):
+            text = seg["text"].strip()
+            confirmed = i < len(previous_texts) and previous_texts[i] == text
+            if not (force or (confirmed and seg["end"] < window_seconds - self.commit_margin)):
+                break
+            self.committed.append(text)
+            advance = seg["end"]
+            n_commit = i + 1
+
+        if n_commit:
+            self.offset += int(advance * self.sample_rate)
+            segments = segments[n_commit:]
+            self.previous_words = []
+        self.previous_segments = segments
+
+        # Mots stables : préfixe commun avec la passe précédente
+        words = " ".join(seg["text"].strip() for seg in segments).split()
+        stable = []
+        for a, b in zip(words, self.previous_words):
+            if a != b:
+                break
+            stable.append(a)
+        self.previous_words = words
+
+        partial = " ".join([self.committed_text()] + stable).strip()
+        if partial and partial != self.last_partial:
+            self.last_partial = partial
+            print(f"… Partiel : {partial}")
+            if self.on_partial:
+                self.on_partial(partial)
+
+    def finalize(self, mdl, audio, key=None):
+        """
+        Termine l'énoncé : décode uniquement la queue non validée.
+        Args:
+            audio: énoncé complet sorti de la file
+            key: son speech_start ; s'il ne correspond pas à l'énoncé suivi,
+                l'énoncé est décodé en entier et l'état suivi est conservé
+        Returns:
+            str | None: transcription complète
+        """
+        matched = key is not None and key == self.key
+        committed = self.committed_text() if matched else ""
+        offset = self.offset if matched else 0
+        decode_time = self.decode_time if matched else 0.0
+
+        tail = audio[offset:]
+        text = None
+        if len(tail) >= int(0.3 * self.sample_rate):
+            options = {**self.options, "initial_prompt": committed or None}
+            start = time()
+            text = transcribe_adaptive(mdl, tail, options, self.policy, self.stats)
+            decode_time += time() - start
+
+        self.last_decode_time = decode_time
+        if matched:
+            self.reset()
+        full = " ".join(part for part in (committed, text) if part).strip()
+        return full or None
@@ -0,0 +1,205 @@
+"""
+Contrôle du facteur temps réel (RTF) de la transcription.
+
+RTF = temps de transcription / durée audio. Au-dessus de 1, Whisper prend du
+retard sur la parole. Le contrôleur :
+- mesure le RTF de chaque transcription (moyenne glissante) ;
+- descend d'une taille de modèle quand le système est en retard, remonte
+  quand la marge le permet (sans dépasser la taille de config.json) ;
+- applique une politique de délestage explicite via SheddingQueue.
+
+Politique de délestage :
+1. le micro n'est jamais bloqué : si la file est pleine, le segment le plus
+   ancien est abandonné ;
+2. un segment plus vieux que `max_queue_age` est abandonné s'il existe un
+   segment plus récent derrière lui (on répond à ce qui vient d'être dit).
+"""
+
+import threading
+from collections import deque
+from queue import Empty
+from time import time
+from typing import Optional
+
+import numpy as np
+
+MODEL_LADDER = ["tiny", "base", "small", "medium", "large"]
+
+# Coût relatif approximatif de décodage par taille (tiny = 1)
+MODEL_COST = {"tiny": 1.0, "base": 1.8, "small": 5.0, "medium": 12.0, "large": 24.0}
+
+
+def ladder_name(size: str) -> str:
+    """Taille de l'échelle correspondant à un nom Whisper ('large-v3' -> 'large')"""
+    base = size.split(".")[0].split("-")[0]
+    return base if base in MODEL_LADDER else size
+
+
+class SheddingQueue:
+    """
+    File bornée entre la capture et la transcription, qui ne bloque jamais
+    le producteur et comptabilise l'audio abandonné.
+    """
+
+    def __init__(self, maxsize: int = 4, max_age: float = 10.0, sample_rate: int = 16000):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.sample_rate = sample_rate
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self.dropped_seconds = 0.0
+        self.dropped_segments = 0
+
+    def _drop(self, audio: np.ndarray, reason: str) -> None:
+        seconds = len(audio) / self.sample_rate
+        self.dropped_seconds += seconds
+        self.dropped_segments += 1
+        print(f"⚠️  Segment abandonné ({reason}, {seconds:.1f}s)")
+
+    def put(self, audio: np.ndarray, key=None) -> None:
+        """
+        Args:
+            audio: segment à transcrire
+            key: identifiant de l'énoncé (speech_start du VAD), rendu tel quel par get()
+        """
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                _, oldest, _ = self._items.popleft()
+                self._drop(oldest, "file pleine")
+            self._items.append((time(), audio, key))
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> tuple[np.ndarray, float, object]:
+        """
+        Returns:
+            tuple: (audio, âge en secondes au moment du retrait, key passé à put)
+        Raises:
+            queue.Empty: si rien n'arrive avant le timeout
+        """
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                raise Empty
+
+            now = time()
+            while len(self._items) > 1 and now - self._items[0][0] > self.max_age:
+                _, stale, _ = self._items.popleft()
+                self._drop(stale, "trop ancien")
+
+            enqueued_at, audio, key = self._items.popleft()
+            return audio, now - enqueued_at, key
+
+    def empty(self) -> bool:
+        with self._cond:
+            return not self._items
+
+    def oldest_age(self) -> float:
+        with self._cond:
+            return time() - self._items[0][0] if self._items else 0.0
+
+
+class RTFController:
+    """
+    Choisit la taille du modèle Whisper à partir du RTF mesuré.
+
+    Args:
+        max_size: taille configurée (plafond de remontée)
+        high: RTF moyen au-delà duquel on descend d'une taille
+        low: marge visée pour remonter (RTF prédit après remontée < low)
+        patience: mesures consécutives nécessaires avant de changer
+        alpha: poids de la dernière mesure dans la moyenne glissante
+    """
+
+    def __init__(self, max_size: str, high: float = 0.8, low: float = 0.5,
+                 patience: int = 2, alpha: float = 0.3):
+        self.configured_size = max_size
+        self.high = high
+        self.low = low
+        self.patience = patience
+        self.alpha = alpha
+
+        base = ladder_name(max_size)
+        self.enabled = base in MODEL_LADDER
+        self.max_index = MODEL_LADDER.index(base) if self.enabled else 0
+        self.index = self.max_index
+
+        self.last_rtf: Optional[float] = None
+        self.rtf_ewma: Optional[float] = None
+        self.last_queue_age = 0.0
+        self.switches = 0
+        self._behind = 0
+        self._ahead = 0
+
+    @property
+    def current_size(self) -> str:
+        """Nom à passer à load_model (nom exact de config.json au plafond)"""
+        if not self.enabled or self.index == self.max_index:
+            return self.configured_size
+        return MODEL_LADDER[self.index]
+
+    def record(self, audio_seconds: float, elapsed: float, queue_age: float, queue_empty: bool) -> Optional[str]:
+        """
+        Enregistre une transcription.
+        Returns:
+            str | None: nouvelle taille de modèle si un changement est décidé
+        """
+        if audio_seconds <= 0:
+            return None
+
+        rtf = elapsed / audio_seconds
+        self.last_rtf = rtf
+        self.rtf_ewma = rtf if self.rtf_ewma is None else self.rtf_ewma + self.alpha * (rtf - self.rtf_ewma)
+        self.last_queue_age = queue_age
+
+        if not self.enabled:
+            return None
+
+        behind = self.rtf_ewma > self.high or not queue_empty
+        if behind:
+            self._behind += 1
+            self._ahead = 0
+        else:
+            self._ahead += 1
+            self._behind = 0
+
+        if self._behind >= self.patience and self.index > 0:
+            return self._step(-1)
+
+        if self._ahead >= self.patience * 2 and self.index < self.max_index:
+            current = MODEL_LADDER[self.index]
+            upper = MODEL_LADDER[self.index + 1]
+            predicted = self.rtf_ewma * MODEL_COST[upper] / MODEL_COST[current]
+            if predicted < self.low:
+                return self._step(+1)
+
+        return None
+
+    def _step(self, direction: int) -> str:
+        current = MODEL_LADDER[self.index]
+        self.index += direction
+        target = MODEL_LADDER[self.index]
+
+        # Estimer le RTF attendu avec le nouveau modèle pour ne pas rebondir
+        self.rtf_ewma *= MODEL_COST[target] / MODEL_COST[current]
+        self._behind = self._ahead = 0
+        self.switches += 1
+
+        arrow = "⬇️" if direction < 0 else "⬆️"
+        print(f"{arrow}  STT : {current} -> {target} (RTF moyen estimé {self.rtf_ewma:.2f})")
+        return self.current_size
+
+    def stats(self, audio_queue: Optional[SheddingQueue] = None) -> dict:
+        """Indicateurs de supervision"""
+        stats = {
+            "model_size": self.current_size,
+            "rtf": self.last_rtf,
+            "rtf_ewma": self.rtf_ewma,
+            "last_queue_age": self.last_queue_age,
+            "switches": self.switches,
+        }
+        if audio_queue is not None:
+            stats.update({
+                "queue_age": audio_queue.oldest_age(),
+                "dropped_seconds": audio_queue.dropped_seconds,
+                "dropped_segments": audio_queue.dropped_segments,
+            })
+        return stats
@@ -0,0 +1,143 @@
+"""
+Backends de reconnaissance vocale interchangeables.
+
+Tous exposent `transcribe(audio, **options)` et renvoient un dict au format
+openai-whisper ({"text", "segments": [{start, end, text, avg_logprob,
+compression_ratio, no_speech_prob}]}), ce qui permet au décodage adaptatif et
+à la transcription incrémentale de fonctionner quel que soit le backend.
+
+Le backend est choisi dans config.json ("stt_backend") :
+- "whisper"      : openai-whisper (PyTorch, fp32 sur CPU / fp16 sur GPU)
+- "whisper-int8" : CTranslate2 (faster-whisper) quantifié int8, poids convertis
+                   une fois puis mis en cache dans models/stt-int8/
+"""
+
+import os
+import zlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+INT8_CACHE_DIR = "models/stt-int8"
+
+
+def compression_ratio(text: str) -> float:
+    """Même mesure que whisper (texte brut / texte compressé)"""
+    data = text.encode("utf-8")
+    if not data:
+        return 0.0
+    return len(data) / len(zlib.compress(data))
+
+
+class STTBackend(ABC):
+    """Interface commune des backends STT."""
+    name = "base"
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, **options) -> dict:
+        """Transcrit un signal float32 16 kHz (résultat au format openai-whisper)"""
+
+
+class WhisperBackend(STTBackend):
+    """Modèle de référence openai-whisper."""
+    name = "whisper"
+
+    def __init__(self, size: str, device_name: str = "cpu"):
+        import whisper
+        import torch
+
+        if device_name == "gpu":
+            self.model = whisper.load_model(size, device="cuda")
+            print(f"✓ Modèle chargé sur GPU (CUDA) - {torch.cuda.get_device_name(0)}")
+        else:
+            self.model = whisper.load_model(size, device="cpu")
+            print("✓ Modèle chargé sur CPU")
+
+    def transcribe(self, audio, **options):
+        return self.model.transcribe(audio, **options)
+
+
+class Int8WhisperBackend(STTBackend):
+    """
+    Whisper quantifié int8 via CTranslate2 (faster-whisper).
+    La conversion des poids n'a lieu qu'une fois par taille de modèle.
+    """
+    name = "whisper-int8"
+
+    def __init__(self, size: str, device_name: str = "cpu", cache_dir: str = INT8_CACHE_DIR, cpu_threads: int = 0):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError("Backend 'whisper-int8' : installez faster-whisper (pip install faster-whisper)") from e
+
+        model_dir = self.convert(size, cache_dir)
+        if device_name == "gpu":
+            self.model = WhisperModel(model_dir, device="cuda", compute_type="int8_float16")
+            print(f"✓ Modèle int8 chargé sur GPU (CUDA) - {model_dir}")
+        else:
+            self.model = WhisperModel(model_dir, device="cpu", compute_type="int8", cpu_threads=cpu_threads)
+            print(f"✓ Modèle int8 chargé sur CPU - {model_dir}")
+
+    @staticmethod
+    def convert(size: str, cache_dir: str = INT8_CACHE_DIR) -> str:
+        """
+        Convertit openai/whisper-<size> au format CTranslate2 int8 (une seule fois)
+        Returns:
+            str: dossier des poids convertis
+        """
+        model_dir = os.path.join(cache_dir, f"{size}-int8")
+        if os.path.isfile(os.path.join(model_dir, "model.bin")):
+            return model_dir
+
+        from ctranslate2.converters import TransformersConverter
+
+        print(f"🔄 Conversion int8 de whisper-{size} (une seule fois)...")
+        os.makedirs(cache_dir, exist_ok=True)
+        converter = TransformersConverter(
+            f"openai/whisper-{size}",
+            copy_files=["tokenizer.json", "preprocessor_config.json"]
+        )
+        converter.convert(model_dir, quantization="int8", force=True)
+        print(f"✓ Poids int8 mis en cache dans {model_dir}")
+        return model_dir
+
+    def transcribe(self, audio, **options):
+        segments, _ = self.model.transcribe(
+            audio,
+            language=options.get("language"),
+            beam_size=options.get("beam_size") or 1,
+            best_of=options.get("best_of") or 1,
+            temperature=options.get("temperature", 0.0),
+            initial_prompt=options.get("initial_prompt"),
+            condition_on_previous_text=options.get("condition_on_previous_text", True),
+        )
+
+        result_segments = [{
+            "start": seg.start,
+            "end": seg.end,
+            "text": seg.text,
+            "avg_logprob": seg.avg_logprob,
+            "compression_ratio": seg.compression_ratio or compression_ratio(seg.text),
+            "no_speech_prob": seg.no_speech_prob,
+        } for seg in segments]
+
+        return {
+            "text": "".join(seg["text"] for seg in result_segments),
+            "segments": result_segments,
+        }
+
+
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    Int8WhisperBackend.name: Int8WhisperBackend,
+}
+
+
+def load_backend(name: str, size: str, device_name: str) -> STTBackend:
+    """Instancie le backend `name` pour une taille de modèle"""
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Backend STT inconnu : '{name}'. "
+            f"Backends disponibles : {', '.join(BACKENDS)}"
+        )
+    return BACKENDS[name](size, device_name)
@@ -0,0 +1,239 @@
+"""
+Capture micro en continu : buffer circulaire préalloué + VAD par trames.
+
+Le callback de sounddevice écrit dans le RingBuffer sans allocation, le VAD
+consomme les nouvelles trames, suit un plancher de bruit adaptatif (bas
+percentile de l'énergie de toutes les trames récentes) et émet chaque énoncé
+dès que le locuteur se tait (après la durée de « hangover »), silences de
+début et de fin retirés.
+"""
+
+import threading
+from time import time
+from typing import Callable, Optional
+
+import numpy as np
+
+
+def frame_energy(audio: np.ndarray, frame_size: int) -> np.ndarray:
+    """Énergie RMS par trame (vectorisée, la trame incomplète finale est ignorée)"""
+    n_frames = len(audio) // frame_size
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_size].reshape(n_frames, frame_size)
+    return np.sqrt(np.mean(frames ** 2, axis=1))
+
+
+class RingBuffer:
+    """
+    Buffer circulaire float32 préalloué, indexé en échantillons absolus
+    (nombre total d'échantillons écrits depuis le démarrage).
+    """
+
+    def __init__(self, capacity: int, sample_rate: int = 16000):
+        self.capacity = capacity
+        self.sample_rate = sample_rate
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+        self.last_write_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def write(self, data: np.ndarray) -> None:
+        """Ajoute des échantillons (appelé depuis le callback audio)"""
+        n = len(data)
+        if n > self.capacity:
+            data = data[-self.capacity:]
+        with self._lock:
+            m = len(data)
+            pos = (self.written + n - m) % self.capacity
+            first = min(m, self.capacity - pos)
+            self.buffer[pos:pos + first] = data[:first]
+            if m > first:
+                self.buffer[:m - first] = data[first:]
+            self.written += n
+            self.last_write_time = time()
+
+    def oldest(self) -> int:
+        """Index absolu du plus ancien échantillon encore disponible"""
+        return max(0, self.written - self.capacity)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copie des échantillons [start, end) (bornés à ce qui est disponible)"""
+        with self._lock:
+            start = max(start, self.oldest())
+            end = min(end, self.written)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            pos = start % self.capacity
+            n = end - start
+            first = min(n, self.capacity - pos)
+            out = np.empty(n, dtype=np.float32)
+            out[:first] = self.buffer[pos:pos + first]
+            if n > first:
+                out[first:] = self.buffer[:n - first]
+            return out
+
+    def sample_time(self, index: int) -> float:
+        """Heure murale approximative d'un échantillon absolu"""
+        if self.last_write_time is None:
+            return time()
+        return self.last_write_time - (self.written - index) / self.sample_rate
+
+
+class StreamingVAD:
+    """
+    VAD par énergie avec plancher de bruit adaptatif et hangover.
+
+    Args:
+        ring: buffer circulaire alimenté par le callback audio
+        frame_ms: taille d'une trame d'analyse
+        threshold_ratio: la parole doit dépasser plancher * ratio
+        min_threshold: seuil absolu minimal (micro très silencieux)
+        hangover_ms: silence toléré avant de clore un énoncé
+        min_speech_ms: durée de parole minimale pour ouvrir un énoncé
+        padding_ms: marge conservée avant/après la parole
+        max_utterance_s: coupe forcée des énoncés trop longs
+        noise_alpha: vitesse d'adaptation du plancher de bruit
+        noise_window_s: historique d'énergie servant à estimer le bruit
+        noise_percentile: percentile de cet historique pris comme plancher
+    """
+
+    def __init__(
+        self,
+        ring: RingBuffer,
+        frame_ms: int = 30,
+        threshold_ratio: float = 3.0,
+        min_threshold: float = 0.005,
+        hangover_ms: int = 300,
+        min_speech_ms: int = 150,
+        padding_ms: int = 150,
+        max_utterance_s: float = 30.0,
+        noise_alpha: float = 0.05,
+        noise_window_s: float = 5.0,
+        noise_percentile: float = 10.0,
+    ):
+        self.ring = ring
+        sr = ring.sample_rate
+        self.frame_size = int(sr * frame_ms / 1000)
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.padding = int(sr * padding_ms / 1000)
+        self.max_utterance = int(sr * max_utterance_s)
+        self.noise_alpha = noise_alpha
+
+        self.noise_floor = min_threshold / threshold_ratio
+        self.noise_percentile = noise_percentile
+        # Énergies récentes de toutes les trames (circulaire) : le plancher ne dépend
+        # pas de la décision voisé / non voisé, sinon un bruit ambiant déjà au-dessus
+        # du seuil serait pris pour de la parole sans jamais relever le plancher
+        self._energies = np.zeros(max(1, int(noise_window_s * 1000 / frame_ms)), dtype=np.float32)
+        self._energies_count = 0
+        self.processed = 0            # prochain échantillon à analyser
+        self.in_speech = False
+        self.speech_start = 0         # premier échantillon voisé de l'énoncé
+        self.last_voiced_end = 0      # fin du dernier échantillon voisé
+        self.run_length = 0           # trames voisées consécutives (avant ouverture)
+        self.silent_frames = 0        # trames silencieuses consécutives (pendant l'énoncé)
+
+        self.on_speech_start: Optional[Callable[[float], None]] = None
+        self.gate = None  # EchoGate optionnel (voix de l'avatar)
+
+    def threshold(self) -> float:
+        return max(self.min_threshold, self.noise_floor * self.threshold_ratio)
+
+    def classify(self, energy: np.ndarray, start: int) -> np.ndarray:
+        """
+        Décide voisé / non voisé pour un bloc de trames et met à jour le plancher.
+        Point d'extension (p. ex. filtrage d'écho) : reçoit l'index absolu de la 1re trame.
+        """
+        threshold = self.threshold()
+        voiced = energy > threshold
+        if self.gate is not None:
+            frame_seconds = self.frame_size / self.ring.sample_rate
+            times = self.ring.sample_time(start) + np.arange(len(energy)) * frame_seconds
+            voiced, playing = self.gate.filter(energy, times, threshold, frame_seconds)
+            energy = energy[~playing]  # l'écho ne doit pas relever le plancher
+        self._update_noise_floor(energy)
+        return voiced
+
+    def _update_noise_floor(self, energy: np.ndarray) -> None:
+        """Plancher = bas percentile des trames récentes, lissé par noise_alpha"""
+        if len(energy) == 0:
+            return
+        size = len(self._energies)
+        energy = energy[-size:]
+        pos = self._energies_count % size
+        first = min(len(energy), size - pos)
+        self._energies[pos:pos + first] = energy[:first]
+        self._energies[:len(energy) - first] = energy[first:]
+        self._energies_count += len(energy)
+        history = self._energies[:min(self._energies_count, size)]
+        estimate = float(np.percentile(history, self.noise_percentile))
+        self.noise_floor += self.noise_alpha * (estimate - self.noise_floor)
+
+    def current_utterance(self) -> Optional[tuple[int, np.ndarray]]:
+        """
+        Énoncé en cours (None si personne ne parle).
+        Returns:
+            tuple: (speech_start, audio) ; speech_start identifie l'énoncé, comme dans process()
+        """
+        if not self.in_speech:
+            return None
+        speech_start = self.speech_start
+        return speech_start, self.ring.read(speech_start - self.padding, self.processed)
+
+    def process(self) -> list[tuple[int, np.ndarray]]:
+        """
+        Analyse les trames arrivées depuis le dernier appel.
+        Returns:
+            list: énoncés terminés (speech_start, audio float32 silences retirés) ;
+                speech_start, index absolu du premier échantillon voisé, identifie l'énoncé
+        """
+        # Si le consommateur a pris trop de retard, repartir du plus ancien disponible
+        start = max(self.processed, self.ring.oldest())
+        n_frames = (self.ring.written - start) // self.frame_size
+        if n_frames == 0:
+            return []
+
+        audio = self.ring.read(start, start + n_frames * self.frame_size)
+        energy = frame_energy(audio, self.frame_size)
+        voiced = self.classify(energy, start)
+
+        utterances = []
+        for i, is_voiced in enumerate(voiced):
+            frame_start = start + i * self.frame_size
+            frame_end = frame_start + self.frame_size
+
+            if not self.in_speech:
+                if is_voiced:
+                    self.run_length += 1
+                    if self.run_length >= self.min_speech_frames:
+                        self.in_speech = True
+                        self.silent_frames = 0
+                        self.speech_start = frame_end - self.run_length * self.frame_size
+                        self.last_voiced_end = frame_end
+                        if self.on_speech_start:
+                            self.on_speech_start(self.ring.sample_time(self.speech_start))
+                else:
+                    self.run_length = 0
+                continue
+
+            if is_voiced:
+                self.silent_frames = 0
+                self.last_voiced_end = frame_end
+            else:
+                self.silent_frames += 1
+
+            too_long = frame_end - self.speech_start >= self.max_utterance
+            if self.silent_frames >= self.hangover_frames or too_long:
+                utterances.append((self.speech_start, self.ring.read(
+                    self.speech_start - self.padding,
+                    min(self.last_voiced_end + self.padding, frame_end)
+                )))
+                self.in_speech = False
+                self.run_length = 0
+
+        self.processed = start + n_frames * self.frame_size
+        return utterances
@@ -0,0 +1,35 @@
+import json
+import os
+
+from utils.manage_model.catalog import ModelCatalog
+
+
+def make_model(root):
+    directory = root / "v3" / "hibiki"
+    directory.mkdir(parents=True)
+    (directory / "hibiki.moc3").write_bytes(b"MOC3")
+    (directory / "hibiki.2048").mkdir()
+    refs = {"Moc": "hibiki.moc3", "Textures": ["hibiki.2048/texture_00.png"]}
+    (directory / "hibiki.model3.json").write_text(json.dumps({"FileReferences": refs}), encoding="utf-8")
+    return directory
+
+
+def test_index_sees_files_added_in_subfolder(tmp_path):
+    directory = make_model(tmp_path)
+    index_path = str(tmp_path / "index.json")
+    assert ModelCatalog(str(tmp_path), index_path).get("hibiki").errors
+
+    texture = directory / "hibiki.2048" / "texture_00.png"
+    texture.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 16)
+    os.utime(texture.parent, (0, 1))  # date distincte même sur un système de fichiers peu précis
+
+    catalog = ModelCatalog(str(tmp_path), index_path)
+    assert catalog.rescanned == 1
+    assert catalog.get("hibiki").errors == []
+
+
+def test_index_reused_when_nothing_changed(tmp_path):
+    make_model(tmp_path)
+    index_path = str(tmp_path / "index.json")
+    ModelCatalog(str(tmp_path), index_path)
+    assert ModelCatalog(str(tmp_path), index_path).rescanned == 0
@@ -0,0 +1,77 @@
+from utils.llm.conversation_store import ConversationStore
+from utils.llm.memory_manager import MemoryManager
+
+
+def make_store(tmp_path, **kwargs):
+    return ConversationStore(str(tmp_path / "conversations.db"), **kwargs)
+
+
+def test_write_behind_batches_and_flush(tmp_path):
+    store = make_store(tmp_path, batch_size=64, flush_interval=5.0)
+    for i in range(10):
+        store.append("alex", "user", f"message {i}")
+    store.close()  # écrit ce qui reste en file
+
+    assert store.rows_written == 10
+    assert store.batches_written == 1  # un seul lot : une transaction pour les 10 messages
+
+    reopened = make_store(tmp_path)
+    assert reopened.count("alex") == 10
+    reopened.append("alex", "assistant", "suite")  # la numérotation reprend après le dernier message
+    assert reopened.load_all("alex")[-1] == {'role': 'assistant', 'content': "suite"}
+    reopened.close()
+
+
+def test_resume_loads_recent_turns_and_summary(tmp_path):
+    store = make_store(tmp_path)
+    memory = MemoryManager(max_turns=2, store=store, session="alex")
+    for i in range(5):
+        memory.add_message('user', f"question {i}")
+        memory.add_message('assistant', f"réponse {i}")
+    store.save_summary("alex", "Alex aime les chats.")
+    store.close()
+
+    store = make_store(tmp_path)
+    resumed = MemoryManager(max_turns=2, store=store, session="alex")
+    assert resumed.summary == "Alex aime les chats."
+    assert [m['content'] for m in resumed.conversation_history] == [
+        "question 3", "réponse 3", "question 4", "réponse 4"]
+    assert len(resumed.get_context(include_all=True)) == 10
+    store.close()
+
+
+def test_compact_keeps_last_turns_and_summary(tmp_path):
+    store = make_store(tmp_path)
+    for i in range(30):
+        store.append("alex", "user", f"message {i}")
+        store.append("sam", "user", f"message {i}")
+    store.save_summary("alex", "résumé")
+
+    assert store.compact("alex", keep_last=5) == 25
+    messages, summary = store.load_recent("alex", 100)
+    assert [m['content'] for m in messages] == [f"message {i}" for i in range(25, 30)]
+    assert summary == "résumé"
+    assert store.count("sam") == 30
+
+    assert store.compact(keep_last=10, vacuum=False) == 20
+    assert store.count("alex") == 5 and store.count("sam") == 10
+    store.close()
+
+
+def test_clear_session(tmp_path):
+    store = make_store(tmp_path)
+    memory = MemoryManager(store=store, session="alex")
+    memory.add_message('user', "bonjour")
+    memory.add_message('assistant', "salut")
+    store.append("sam", "user", "autre session")
+    store.save_summary("alex", "résumé")
+
+    memory.clear()
+    assert store.load_recent("alex", 10) == ([], "")
+    assert store.count("sam") == 1
+
+    memory.add_message('user', "nouveau départ")
+    store.close()
+    resumed = MemoryManager(store=make_store(tmp_path), session="alex")
+    assert [m['content'] for m in resumed.conversation_history] == ["nouveau départ"]
+    resumed.store.close()
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pytest
+
+from utils.emotion import VALENCE
+from utils.emotion.feeling_history import FeelingHistory
+
+
+@pytest.fixture(autouse=True)
+def no_legacy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # pas d'ancien feeling_history.json à importer
+
+
+def joy_scores():
+    """Sortie du classifieur : toutes les émotions, joy dominante"""
+    scores = {label: 0.01 for label in VALENCE}
+    scores["joy"] = 0.8
+    return scores
+
+
+def test_dict_input_weighted_by_probability(tmp_path):
+    history = FeelingHistory(directory=str(tmp_path / "history"))
+    now = datetime.now()
+    for _ in range(5):
+        history.record(joy_scores(), now)
+    history.record(["sadness"], now)
+
+    counts = history.last_days(1, now)
+    assert counts["_messages"] == 6
+    assert counts["joy"] == pytest.approx(5 * 0.8)
+    assert counts["anger"] == pytest.approx(5 * 0.01)
+    assert counts["sadness"] == pytest.approx(1 + 5 * 0.01)
+    assert history.dominant(1) == "joy"
+
+
+def test_weights_survive_reload(tmp_path):
+    directory = str(tmp_path / "history")
+    history = FeelingHistory(directory=directory, snapshot_every=2)
+    now = datetime.now()
+    for _ in range(3):  # un instantané puis un message rejoué depuis le journal
+        history.record(joy_scores(), now)
+
+    reloaded = FeelingHistory(directory=directory)
+    counts = reloaded.last_days(1, now)
+    assert counts["_messages"] == 3
+    assert counts["joy"] == pytest.approx(3 * 0.8)
+    assert reloaded.mood() == pytest.approx(history.mood())
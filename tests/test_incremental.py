@@ -0,0 +1,94 @@
+import numpy as np
+
+from speech.decoding import DecodingPolicy, DecodingStats
+from speech.incremental import IncrementalTranscriber
+
+SR = 16000
+
+
+class FakeRing:
+    sample_rate = SR
+
+
+class FakeVAD:
+    """current_utterance() pilotée par le test"""
+
+    def __init__(self):
+        self.ring = FakeRing()
+        self.current = None
+
+    def current_utterance(self):
+        return self.current
+
+
+class FakeModel:
+    """Un mot par seconde d'audio ; chaque seconde porte la valeur énoncé * 100 + seconde"""
+
+    def transcribe(self, audio, **options):
+        segments = []
+        for i in range(len(audio) // SR):
+            value = int(round(float(audio[i * SR])))
+            word = f"u{value // 100}s{value % 100}"
+            segments.append({"text": f" {word}", "start": float(i), "end": float(i + 1)})
+        return {"segments": segments, "text": " ".join(s["text"] for s in segments)}
+
+
+def utterance(uid, seconds):
+    return np.concatenate([np.full(SR, uid * 100 + s, dtype=np.float32) for s in range(seconds)])
+
+
+def words(uid, seconds):
+    return " ".join(f"u{uid}s{s}" for s in range(seconds))
+
+
+def make_transcriber(vad):
+    return IncrementalTranscriber(vad, {}, DecodingPolicy(), DecodingStats(), step=0.5, commit_margin=1.0)
+
+
+def poll_growing(transcriber, vad, mdl, key, audio, seconds):
+    for s in range(1, seconds + 1):
+        vad.current = (key, audio[:s * SR])
+        transcriber.poll(mdl)
+
+
+def test_finalize_uses_incremental_state_of_same_utterance():
+    vad, mdl = FakeVAD(), FakeModel()
+    transcriber = make_transcriber(vad)
+    audio = utterance(1, 6)
+
+    poll_growing(transcriber, vad, mdl, 1000, audio, 6)
+    assert transcriber.committed and transcriber.offset > 0
+
+    vad.current = None
+    assert transcriber.finalize(mdl, audio, 1000) == words(1, 6)
+    assert transcriber.key is None  # état consommé
+
+
+def test_back_to_back_utterances_do_not_mix():
+    vad, mdl = FakeVAD(), FakeModel()
+    transcriber = make_transcriber(vad)
+    first, second = utterance(1, 6), utterance(2, 5)
+
+    # Le premier énoncé est suivi pendant la parole puis mis en file...
+    poll_growing(transcriber, vad, mdl, 1000, first, 6)
+    # ...mais la parole reprend avant que le worker ne le finalise
+    poll_growing(transcriber, vad, mdl, 200000, second, 5)
+    assert transcriber.key == 200000
+
+    # Le premier énoncé est décodé en entier, sans le texte ni le décalage du second
+    assert transcriber.finalize(mdl, first, 1000) == words(1, 6)
+    assert transcriber.key == 200000 and transcriber.committed
+
+    vad.current = None
+    assert transcriber.finalize(mdl, second, 200000) == words(2, 5)
+
+
+def test_dropped_utterance_state_is_ignored():
+    vad, mdl = FakeVAD(), FakeModel()
+    transcriber = make_transcriber(vad)
+    dropped, kept = utterance(1, 6), utterance(2, 3)
+
+    # L'énoncé suivi est abandonné par la file : le suivant arrive seul
+    poll_growing(transcriber, vad, mdl, 1000, dropped, 6)
+    vad.current = None
+    assert transcriber.finalize(mdl, kept, 50000) == words(2, 3)
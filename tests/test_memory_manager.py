@@ -0,0 +1,83 @@
+import threading
+
+from utils.llm.memory_manager import MemoryManager
+
+
+def count_words(text):
+    """Compteur de tokens prévisible : un token par mot"""
+    return len(text.split())
+
+
+def add_turns(memory, n, words=10):
+    for i in range(n):
+        memory.add_message('user', f"question {i} " + "mot " * (words - 2))
+        memory.add_message('assistant', f"réponse {i} " + "mot " * (words - 2))
+
+
+def test_token_budget_evicts_whole_turns():
+    memory = MemoryManager(max_turns=50, max_tokens=45, count_tokens=count_words)
+    add_turns(memory, 5)
+
+    assert memory.history_tokens <= 45
+    assert len(memory.conversation_history) == 4
+    context = memory.get_context()
+    assert context[0]['role'] == 'user' and context[0]['content'].startswith("question 3")
+    assert [m['content'].split()[:2] for m in memory.archive][:2] == [["question", "0"], ["réponse", "0"]]
+
+
+def test_max_turns_and_archive_limit():
+    memory = MemoryManager(max_turns=2, max_tokens=10000, count_tokens=count_words, max_archive=3)
+    add_turns(memory, 6)
+
+    assert memory.get_turn_count() == 2
+    assert len(memory.archive) == 3
+    assert memory.archive[-1]['content'].startswith("réponse 3")
+    assert memory.total_messages == 12
+
+
+def test_background_summary_replaces_evicted_turns():
+    seen = []
+
+    def summarizer(previous, messages):
+        seen.append([m['content'].split()[1] for m in messages])
+        return (previous + " " + " ".join(m['content'].split()[1] for m in messages)).strip()
+
+    memory = MemoryManager(max_turns=2, max_tokens=10000, count_tokens=count_words, summarizer=summarizer)
+    add_turns(memory, 4)
+    assert memory.wait_summary(timeout=2)
+
+    assert memory.summary.split() == ["0", "0", "1", "1"]
+    assert sum(len(batch) for batch in seen) == 4
+    context = memory.get_context()
+    assert context[0]['role'] == 'system' and memory.summary in context[0]['content']
+    assert context[1]['content'].startswith("question 2")
+
+
+def test_summary_counts_against_budget():
+    memory = MemoryManager(max_turns=50, max_tokens=60, count_tokens=count_words,
+                           summarizer=lambda previous, messages: "résumé " * 25)
+    add_turns(memory, 3)  # 60 tokens : tient dans le budget sans résumé
+    add_turns(memory, 1)
+    assert memory.wait_summary(timeout=2)
+
+    assert memory.summary_tokens == 25
+    assert memory.history_tokens + memory.summary_tokens <= 60
+
+
+def test_clear_discards_running_summary():
+    started, release = threading.Event(), threading.Event()
+
+    def summarizer(previous, messages):
+        started.set()
+        release.wait(2)
+        return "ancien résumé"
+
+    memory = MemoryManager(max_turns=1, max_tokens=10000, count_tokens=count_words, summarizer=summarizer)
+    add_turns(memory, 2)
+    assert started.wait(2)
+    memory.clear()
+    release.set()
+    assert memory.wait_summary(timeout=2)
+
+    assert memory.summary == ""
+    assert memory.get_context() == []
@@ -0,0 +1,73 @@
+import zlib
+
+import numpy as np
+
+from utils.llm.semantic_memory import SemanticMemory
+
+DIM = 8
+
+
+def embed(texts):
+    """Embedding déterministe : un vecteur pseudo-aléatoire par texte"""
+    return np.stack([np.random.default_rng(zlib.crc32(t.encode())).standard_normal(DIM) for t in texts]).astype(np.float32)
+
+
+def make_memory(directory):
+    return SemanticMemory(embed=embed, directory=str(directory))
+
+
+def test_reload_after_partial_append(tmp_path):
+    memory = make_memory(tmp_path)
+    texts = ["chat noir", "pizza du vendredi", "examen de maths"]
+    for text in texts:
+        memory.add([text])
+
+    # Crash simulé entre l'ajout des vecteurs et celui des entrées
+    with open(tmp_path / "vectors.f16", "ab") as f:
+        embed(["souvenir perdu", "autre souvenir"]).astype(np.float16).tofile(f)
+
+    reloaded = make_memory(tmp_path)
+    assert reloaded.dim == DIM
+    assert reloaded.size == 3
+    assert [e["text"] for e in reloaded.entries] == texts
+    for text in texts:
+        score, entry = reloaded.search(text, k=1)[0]
+        assert entry["text"] == text and score > 0.99
+
+    # Les fichiers ont été réalignés : un nouvel ajout reste cohérent au rechargement
+    reloaded.add(["nouveau souvenir"])
+    again = make_memory(tmp_path)
+    assert again.size == 4
+    assert again.search("nouveau souvenir", k=1)[0][1]["text"] == "nouveau souvenir"
+
+
+def test_reload_after_partial_vector_row(tmp_path):
+    memory = make_memory(tmp_path)
+    memory.add(["un", "deux"])
+
+    # Entrée écrite mais vecteur tronqué au milieu de la ligne
+    with open(tmp_path / "vectors.f16", "ab") as f:
+        embed(["trois"]).astype(np.float16)[:, :DIM // 2].tofile(f)
+    with open(tmp_path / "entries.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"text": "trois"}\n{"text": "qua')
+
+    reloaded = make_memory(tmp_path)
+    assert reloaded.size == 2
+    assert [e["text"] for e in reloaded.entries] == ["un", "deux"]
+    assert reloaded.search("deux", k=1)[0][1]["text"] == "deux"
+
+    reloaded.add(["cinq"])
+    assert [e["text"] for e in make_memory(tmp_path).entries] == ["un", "deux", "cinq"]
+
+
+def test_ivf_rebuild_keeps_added_vectors(tmp_path):
+    memory = SemanticMemory(embed=embed, directory=str(tmp_path), ivf_threshold=64, nprobe=64)
+    texts = [f"souvenir {i}" for i in range(200)]
+    for text in texts:
+        memory.add([text])
+
+    assert memory._centroids is not None and memory._ivf_built_at >= 64
+    assert sorted(i for ids in memory._lists for i in ids) == list(range(200))
+    for text in ("souvenir 3", "souvenir 150", "souvenir 199"):
+        assert memory.search(text, k=1)[0][1]["text"] == text
+    assert make_memory(tmp_path).size == 200
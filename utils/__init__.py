@@ -26,4 +26,39 @@ def split_sentence(texte, ponctuations=None):
 
 def lenght_to_duration(text: str, min = 0.7) -> float:
 
-    return sqrt(len(text)) * 0.5 + min
\ No newline at end of file
+    return sqrt(len(text)) * 0.5 + min
+
+
+class SentenceSegmenter:
+    """
+    Découpe incrémentale d'un flux de tokens (LLM) en phrases complètes.
+    Une phrase est complète quand sa ponctuation finale est suivie d'un espace
+    ou d'un retour à la ligne : "3.5" ou "..." en cours d'écriture ne coupent pas.
+    """
+
+    _BOUNDARY = re.compile(r'[.!?…]+["\'»)\]]*\s+|\n+')
+    _LIST_MARKER = re.compile(r'^(\d+|[a-zA-Z])[.)]$')
+
+    def __init__(self, min_length: int = 2):
+        self.buffer = ""
+        self.min_length = min_length
+
+    def feed(self, token: str) -> list:
+        """Ajoute un morceau de texte, retourne les phrases terminées"""
+        self.buffer += token
+        sentences = []
+        start = 0
+        for match in self._BOUNDARY.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) < self.min_length or self._LIST_MARKER.match(sentence):
+                continue  # "1." d'une liste : la phrase continue
+            sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        """Fin du flux : retourne le reste éventuel"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
@@ -11,3 +11,19 @@ def language():
 
 def device():
     return _config["device"]
+
+
+def filler_latency_threshold():
+    return _config.get("filler_latency_threshold", 0.8)
+
+def stt_decoding():
+    return _config.get("stt_decoding", {})
+
+def stt_rtf():
+    return _config.get("stt_rtf", {})
+
+def stt_backend():
+    return _config.get("stt_backend", "whisper")
+
+def echo_gate():
+    return _config.get("echo_gate", True)
@@ -0,0 +1,10 @@
+# Valence de chaque émotion go_emotions (-1 très négatif, +1 très positif)
+VALENCE = {
+    'admiration': 0.6, 'amusement': 0.7, 'anger': -0.8, 'annoyance': -0.5,
+    'approval': 0.4, 'caring': 0.5, 'confusion': -0.2, 'curiosity': 0.3,
+    'desire': 0.3, 'disappointment': -0.6, 'disapproval': -0.4, 'disgust': -0.7,
+    'embarrassment': -0.4, 'excitement': 0.8, 'fear': -0.7, 'gratitude': 0.7,
+    'grief': -0.9, 'joy': 0.9, 'love': 0.9, 'nervousness': -0.5,
+    'optimism': 0.6, 'pride': 0.6, 'realization': 0.1, 'relief': 0.5,
+    'remorse': -0.5, 'sadness': -0.8, 'surprise': 0.1, 'neutral': 0.0,
+}
@@ -1,11 +1,13 @@
 from utils.manage_model import ModelManager
-from utils.emotion.get_emotion import corresp_emotion
+from utils.emotion.get_emotion import analyse_texte
+from utils.emotion.expression_index import expression_index
 model = "mao"
 
 def init(model_name, text):
     global model
     model = ModelManager(model_name)
-    return corresp_emotion(model.expressions, text)
+    target = expression_index(model).target(analyse_texte(text))
+    return max(target, key=target.get) if target else None
 
 def get_expression():
     global model
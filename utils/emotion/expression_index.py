@@ -0,0 +1,246 @@
+"""
+Correspondance émotions go_emotions -> expressions d'un modèle Live2D.
+
+L'index est construit une fois par modèle, au chargement :
+1. emotions.json dans le dossier du modèle ({label: expression}), s'il existe ;
+2. EXPRESSION_MAP (historique, écrit pour llny) pour les expressions présentes ;
+3. mots-clés dans les noms d'expressions (en, fr, zh : "sad", "triste", "哭"...) ;
+4. sinon l'émotion voisine (LABEL_FALLBACK), puis rien (expression neutre).
+
+À partir d'un vecteur d'émotions {label: probabilité}, target() donne les
+expressions à afficher et leur poids (fusion des labels qui tombent sur la
+même expression, top `max_blend`). ExpressionController applique la cible :
+- expression dominante via AddExpression, sans appel si elle n'a pas changé ;
+- ou mélange pondéré : les paramètres des fichiers .exp3.json sont appliqués
+  avec leur poids à chaque frame (Multiply est approché par un Overwrite
+  pondéré, exact pour une valeur 0 ou un paramètre au repos à 1).
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.emotion import VALENCE
+from utils.manage_model import ModelManager
+
+OVERRIDE_FILE = "emotions.json"
+
+# Historique : expressions de llny
+EXPRESSION_MAP = {
+    "joy": "idle", "excitement": "wow", "approval": "make_lauft", "gratitude": "love",
+    "admiration": "wow", "realization": "wow", "relief": "plaisir", "desire": "love",
+    "sadness": "triste+++", "curiosity": "studieux", "optimism": "idle1", "neutral": "idle",
+    "amusement": "make_lauft", "anger": "angry-iritation", "annoyance": "angry-iritation",
+    "caring": "love", "confusion": "tete_noir", "disappointment": "sad", "disapproval": "tete_noir",
+    "disgust": "tete_noir", "embarrassment": "blush", "fear": "tete_noir", "grief": "triste+++",
+    "love": "love", "nervousness": "blush", "pride": "idle1", "remorse": "sad", "surprise": "wow",
+}
+
+# Mots-clés cherchés dans les noms d'expressions (minuscules), par ordre de préférence
+KEYWORDS = {
+    "joy": ["happy", "joy", "smile", "plaisir", "content", "笑"],
+    "amusement": ["laugh", "lauf", "rire", "smile", "happy", "笑"],
+    "excitement": ["excit", "star", "wow", "星"],
+    "love": ["love", "heart", "amour", "比心", "爱"],
+    "caring": ["love", "heart", "caring", "比心"],
+    "sadness": ["sad", "cry", "triste", "tear", "哭", "伤"],
+    "grief": ["cry", "triste", "sad", "哭"],
+    "anger": ["angry", "anger", "colere", "mad", "生气", "怒"],
+    "annoyance": ["annoy", "irrit", "iritation", "angry", "生气"],
+    "fear": ["afraid", "fear", "scared", "peur", "怕"],
+    "nervousness": ["nervous", "afraid", "flush", "sweat", "汗"],
+    "embarrassment": ["blush", "shame", "shy", "flush", "embarras", "脸红"],
+    "surprise": ["surprise", "surpirse", "wow", "shock", "impressed", "惊"],
+    "admiration": ["impressed", "admir", "wow", "star", "星"],
+    "pride": ["arrogan", "proud", "pride", "fier"],
+    "curiosity": ["curious", "studieux", "think", "question"],
+    "confusion": ["confus", "question", "tete_noir", "?"],
+    "disgust": ["disgust", "tete_noir", "嫌"],
+    "neutral": ["normal", "default", "neutral", "idle"],
+}
+
+# Émotion la plus proche quand le modèle n'a rien pour un label
+LABEL_FALLBACK = {
+    "approval": "joy", "gratitude": "joy", "optimism": "joy", "relief": "joy", "desire": "love",
+    "realization": "surprise", "disappointment": "sadness", "remorse": "sadness",
+    "disapproval": "annoyance", "pride": "joy", "admiration": "joy", "curiosity": "neutral",
+    "confusion": "neutral", "amusement": "joy", "excitement": "joy", "caring": "love",
+    "grief": "sadness", "annoyance": "anger", "nervousness": "fear", "embarrassment": "nervousness",
+    "disgust": "anger", "fear": "sadness", "surprise": "neutral", "love": "joy", "sadness": "fear",
+}
+
+
+def _keyword_match(label: str, names: List[str]) -> Optional[str]:
+    lowered = {name: name.lower() for name in names}
+    for keyword in KEYWORDS.get(label, []):
+        for name, low in lowered.items():
+            if keyword in low:
+                return name
+    return None
+
+
+class ExpressionIndex:
+    """
+    Args:
+        expressions: [{"Name", "File"}] (ModelManager.expressions)
+        directory: dossier du modèle (emotions.json, fichiers d'expressions)
+    """
+
+    def __init__(self, expressions: List[dict], directory: Optional[Path] = None):
+        self.directory = Path(directory) if directory else None
+        self.files = {e["Name"]: e["File"] for e in expressions if e.get("Name")}
+        names = list(self.files)
+        overrides = self._load_overrides()
+
+        direct: Dict[str, Optional[str]] = {}
+        for label in VALENCE:
+            if overrides.get(label) in self.files:
+                direct[label] = overrides[label]
+            elif EXPRESSION_MAP.get(label) in self.files:
+                direct[label] = EXPRESSION_MAP[label]
+            else:
+                direct[label] = _keyword_match(label, names)
+
+        # Compléter par les émotions voisines (chaînes courtes, sans cycle)
+        self.mapping: Dict[str, Optional[str]] = {}
+        for label in VALENCE:
+            current, seen = label, set()
+            while direct.get(current) is None and current in LABEL_FALLBACK and current not in seen:
+                seen.add(current)
+                current = LABEL_FALLBACK[current]
+            self.mapping[label] = direct.get(current)
+        self.neutral = self.mapping.get("neutral")
+        self._parameters: Dict[str, list] = {}
+
+    def _load_overrides(self) -> dict:
+        if self.directory is None:
+            return {}
+        path = self.directory / OVERRIDE_FILE
+        if not path.is_file():
+            return {}
+        with path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    @property
+    def coverage(self) -> int:
+        """Nombre de labels qui donnent une expression"""
+        return sum(1 for v in self.mapping.values() if v)
+
+    def expression_for(self, label: str) -> Optional[str]:
+        return self.mapping.get(label, self.neutral)
+
+    def target(self, emotions: Dict[str, float], max_blend: int = 2, min_weight: float = 0.15) -> Dict[str, float]:
+        """
+        Args:
+            emotions: {label: probabilité}
+            max_blend: expressions mélangées au plus
+            min_weight: probabilité minimale d'une expression secondaire
+        Returns:
+            dict: {expression: poids}, poids normalisés (somme = 1), vide = neutre sans expression
+        """
+        totals: Dict[str, float] = {}
+        for label, probability in emotions.items():
+            expression = self.mapping.get(label)
+            if expression and probability > 0:
+                totals[expression] = totals.get(expression, 0.0) + probability
+        best = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:max_blend]
+        if not best:
+            return {}
+        kept = [(name, weight) for name, weight in best if weight >= min_weight] or best[:1]
+        total = sum(weight for _, weight in kept)
+        return {name: weight / total for name, weight in kept}
+
+    def parameters(self, expression: str) -> list:
+        """[(id, valeur, mode)] du fichier d'expression (lu une fois)"""
+        if expression not in self._parameters:
+            params = []
+            path = self.directory / self.files[expression] if self.directory else None
+            try:
+                with path.open(encoding="utf-8") as f:
+                    data = json.load(f)
+                # Cubism 3 : Parameters / Id / Value / Blend ; Cubism 2 : params / id / val / calc
+                for p in data.get("Parameters") or data.get("params") or []:
+                    params.append((p.get("Id") or p.get("id"), float(p.get("Value", p.get("val", 0.0))),
+                                   (p.get("Blend") or p.get("calc") or "Add").lower()))
+            except (OSError, AttributeError, json.JSONDecodeError, TypeError):
+                pass
+            self._parameters[expression] = params
+        return self._parameters[expression]
+
+
+_indexes: Dict[str, ExpressionIndex] = {}
+
+
+def expression_index(manager: ModelManager) -> ExpressionIndex:
+    """Index du modèle, construit au premier appel puis réutilisé (changements de modèle)"""
+    index = _indexes.get(manager.name)
+    if index is None:
+        index = _indexes[manager.name] = ExpressionIndex(manager.expressions, Path(manager.path).parent)
+        print(f"🎭 {manager.name} : {index.coverage}/{len(index.mapping)} émotions associées à une expression")
+    return index
+
+
+class ExpressionController:
+    """
+    Applique une cible d'expressions à un LAppModel en évitant les appels inutiles.
+
+    Args:
+        model: LAppModel
+        index: ExpressionIndex du modèle
+        blend: mélange pondéré (sinon expression dominante seule)
+    """
+
+    def __init__(self, model, index: ExpressionIndex, blend: bool = False, tolerance: float = 0.05):
+        self.model = model
+        self.index = index
+        self.blend = blend
+        self.tolerance = tolerance
+        self.current: Dict[str, float] = {}
+        self.applied = 0
+        self.skipped = 0
+
+    def _same(self, target: Dict[str, float]) -> bool:
+        return (target.keys() == self.current.keys()
+                and all(abs(target[k] - self.current[k]) <= self.tolerance for k in target))
+
+    def set_target(self, target: Dict[str, float]) -> None:
+        """Nouvelle cible ({expression: poids}, {} = neutre)"""
+        if self._same(target):
+            self.skipped += 1
+            return
+        dominant = max(target, key=target.get) if target else None
+        previous = max(self.current, key=self.current.get) if self.current else None
+        if self.blend or dominant != previous:
+            self.model.ResetExpressions()
+            if dominant and not self.blend:
+                self.model.AddExpression(dominant)
+        self.current = dict(target)
+        self.applied += 1
+
+    def set_expression(self, expression: Optional[str]) -> None:
+        """Expression unique (ID du modèle, None = neutre), ex: send_emotion_direct ; ID inconnu ignoré"""
+        if expression and expression not in self.index.files:
+            return
+        self.set_target({expression: 1.0} if expression else {})
+
+    def set_emotions(self, emotions: Dict[str, float]) -> Dict[str, float]:
+        target = self.index.target(emotions)
+        self.set_target(target)
+        return target
+
+    def reset(self) -> None:
+        self.set_target({})
+
+    def update(self) -> None:
+        """Mode mélange : à appeler à chaque frame avant model.Update() (comme le lip sync)"""
+        if not self.blend or not self.current:
+            return
+        for expression, weight in self.current.items():
+            for param_id, value, mode in self.index.parameters(expression):
+                if mode == "add":
+                    self.model.AddParameterValue(param_id, value * weight)
+                elif mode == "overwrite" or (mode in ("multiply", "mult") and value != 1.0):
+                    self.model.SetParameterValue(param_id, value, weight)
+
+    def summary(self) -> str:
+        return f"expressions : {self.applied} changements, {self.skipped} appels évités"
@@ -0,0 +1,214 @@
+"""
+Historique des ressentis de l'utilisateur, en ajout seul.
+
+- une ligne JSON par message dans des segments feelings-00001.jsonl, ...
+  (une seule écriture par message, une ligne tronquée par un crash est ignorée) ;
+- agrégats par heure et par jour + humeur (moyenne glissante de la valence)
+  mis à jour à chaque message, sauvegardés périodiquement avec la position
+  du journal qu'ils couvrent : au démarrage on ne relit que la fin.
+
+    history = FeelingHistory()
+    history.record(["joy", "excitement"])
+    history.mood(), history.last_days(7)
+"""
+
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from utils.emotion import VALENCE
+
+DEFAULT_DIR = "feeling_history"
+LEGACY_FILE = "feeling_history.json"
+
+HOUR_FORMAT = "%Y-%m-%d %H"
+DAY_FORMAT = "%Y-%m-%d"
+
+
+class FeelingHistory:
+    """
+    Args:
+        directory: dossier des segments et de l'instantané des agrégats
+        segment_max_bytes: taille à partir de laquelle on ouvre un nouveau segment
+        alpha: poids d'un message dans l'humeur (moyenne glissante exponentielle)
+        keep_hours: heures conservées dans les agrégats horaires
+        keep_days: jours conservés dans les agrégats journaliers
+        snapshot_every: messages entre deux sauvegardes des agrégats
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, segment_max_bytes: int = 1 << 20,
+                 alpha: float = 0.1, keep_hours: int = 48, keep_days: int = 90, snapshot_every: int = 20):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.alpha = alpha
+        self.keep_hours = keep_hours
+        self.keep_days = keep_days
+        self.snapshot_every = snapshot_every
+
+        self.hourly: Dict[str, Counter] = {}
+        self.daily: Dict[str, Counter] = {}
+        self.mood_value = 0.0
+        self.messages = 0
+        self._segment = 1
+        self._offset = 0  # position dans le segment courant couverte par les agrégats
+        self._since_snapshot = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # --- fichiers ---------------------------------------------------------
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"feelings-{index:05d}.jsonl")
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, "aggregates.json")
+
+    def _load(self) -> None:
+        snapshot_path = self._snapshot_path()
+        if os.path.isfile(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.hourly = {k: Counter(v) for k, v in snapshot["hourly"].items()}
+            self.daily = {k: Counter(v) for k, v in snapshot["daily"].items()}
+            self.mood_value = snapshot["mood"]
+            self.messages = snapshot["messages"]
+            self._segment = snapshot["segment"]
+            self._offset = snapshot["offset"]
+        elif not os.path.isfile(self._segment_path(1)) and os.path.isfile(LEGACY_FILE):
+            self._import_legacy(LEGACY_FILE)
+            return
+
+        # Rejouer ce qui a été écrit après l'instantané
+        while os.path.isfile(self._segment_path(self._segment)):
+            path = self._segment_path(self._segment)
+            truncated = False
+            with open(path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        truncated = True  # crash pendant l'écriture
+                        break
+                    self._offset += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._aggregate(datetime.fromisoformat(entry["t"]), entry["emotions"])
+            if truncated:
+                os.truncate(path, self._offset)
+            if not os.path.isfile(self._segment_path(self._segment + 1)):
+                break
+            self._segment += 1
+            self._offset = 0
+
+    def _import_legacy(self, path: str) -> None:
+        """Reprend l'ancien feeling_history.json (liste de {date: [émotions]})"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for item in data:
+            for date, emotions in item.items():
+                self.record(emotions, datetime.fromisoformat(date))
+        self.save_snapshot()
+        print(f"📦 {len(data)} ressentis importés depuis {path}")
+
+    def save_snapshot(self) -> None:
+        """Écrit les agrégats de façon atomique (fichier temporaire puis remplacement)"""
+        snapshot = {
+            "hourly": self.hourly,
+            "daily": self.daily,
+            "mood": self.mood_value,
+            "messages": self.messages,
+            "segment": self._segment,
+            "offset": self._offset,
+        }
+        tmp_path = self._snapshot_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self._snapshot_path())
+        self._since_snapshot = 0
+
+    # --- écriture ---------------------------------------------------------
+
+    def record(self, emotions, timestamp: Optional[datetime] = None) -> None:
+        """
+        Ajoute les émotions d'un message.
+        Args:
+            emotions: liste de labels, ou dict {label: probabilité}
+            timestamp: date du message (maintenant par défaut)
+        """
+        timestamp = timestamp or datetime.now()
+        line = (json.dumps({"t": timestamp.isoformat(), "emotions": emotions}, ensure_ascii=False) + "\n").encode("utf-8")
+
+        if self._offset + len(line) > self.segment_max_bytes and self._offset > 0:
+            self._segment += 1
+            self._offset = 0
+        with open(self._segment_path(self._segment), "ab") as f:
+            f.write(line)
+            f.flush()
+        self._offset += len(line)
+
+        self._aggregate(timestamp, emotions)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.save_snapshot()
+
+    def _aggregate(self, timestamp: datetime, emotions) -> None:
+        weights = emotions if isinstance(emotions, dict) else {label: 1.0 for label in emotions}
+        hour = timestamp.strftime(HOUR_FORMAT)
+        day = timestamp.strftime(DAY_FORMAT)
+
+        for bucket, key in ((self.hourly, hour), (self.daily, day)):
+            counts = bucket.setdefault(key, Counter())
+            counts["_messages"] += 1
+            for label, w in weights.items():
+                counts[label] += w  # une liste compte 1 par label, un dict sa probabilité
+
+        total = sum(weights.values())
+        valence = sum(VALENCE.get(label, 0.0) * w for label, w in weights.items()) / total if total else 0.0
+        self.mood_value += self.alpha * (valence - self.mood_value)
+        self.messages += 1
+
+        if len(self.hourly) > self.keep_hours:
+            for key in sorted(self.hourly)[:-self.keep_hours]:
+                del self.hourly[key]
+        if len(self.daily) > self.keep_days:
+            for key in sorted(self.daily)[:-self.keep_days]:
+                del self.daily[key]
+
+    # --- requêtes ---------------------------------------------------------
+
+    def mood(self) -> float:
+        """Humeur récente, de -1 (très négative) à +1 (très positive)"""
+        return self.mood_value
+
+    def _window(self, bucket: Dict[str, Counter], keys: List[str]) -> Counter:
+        total = Counter()
+        for key in keys:
+            total.update(bucket.get(key, {}))
+        return total
+
+    def last_hours(self, hours: int = 24, now: Optional[datetime] = None) -> Counter:
+        """Poids cumulé par émotion sur les dernières heures (+ '_messages', nombre de messages)"""
+        now = now or datetime.now()
+        keys = [(now - timedelta(hours=h)).strftime(HOUR_FORMAT) for h in range(hours)]
+        return self._window(self.hourly, keys)
+
+    def last_days(self, days: int = 7, now: Optional[datetime] = None) -> Counter:
+        """Poids cumulé par émotion sur les derniers jours (+ '_messages', nombre de messages)"""
+        now = now or datetime.now()
+        keys = [(now - timedelta(days=d)).strftime(DAY_FORMAT) for d in range(days)]
+        return self._window(self.daily, keys)
+
+    def dominant(self, days: int = 7, exclude_neutral: bool = True) -> Optional[str]:
+        """Émotion la plus fréquente sur la période"""
+        counts = self.last_days(days)
+        del counts["_messages"]
+        if exclude_neutral:
+            del counts["neutral"]
+        return counts.most_common(1)[0][0] if counts else None
@@ -3,7 +3,6 @@ from transformers import pipeline
 from utils.emotion.get_feeling import predict_with_detection as emotion_analyzer
 
 from math import tanh
-from random import choice
 import time
 
 
@@ -231,42 +230,5 @@ def index_emotionnal_charge(d):
     return boosted_score
 
 
-def corresp_emotion(text):
-    """Retourne l’expression la plus proche de l’émotion dominante."""
-
-    expression = {
-    "joy": "idle",
-    "excitement": "wow",
-    "approval": "make_lauft",
-    "gratitude": "love",
-    "admiration": "wow",
-    "realization": "wow",
-    "relief": "plaisir",
-    "desire": "love",
-    "sadness": "triste+++",
-    "curiosity": "studieux",
-    "optimism": "idle1",
-    "neutral": "idle",
-    "amusement": "make_lauft",
-    "anger": "angry-iritation",
-    "annoyance": "angry-iritation",
-    "caring": "love",
-    "confusion": "tete_noir",
-    "disappointment": "sad",
-    "disapproval": "tete_noir",
-    "disgust": "tete_noir",
-    "embarrassment": "blush",
-    "fear": "tete_noir",
-    "grief": "triste+++",
-    "love": "love",
-    "nervousness": "blush",
-    "pride": "idle1",
-    "remorse": "sad",
-    "surprise": "wow"
-    }[higgest_emotion(text)]
-    
-    return choice(expression) if isinstance(expression, list) else expression
-
-
 if __name__ == "__main__":
     print(analyse_texte("I love to have meeting at 3am", mode="moyenne"))
\ No newline at end of file
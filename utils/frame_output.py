@@ -0,0 +1,390 @@
+"""
+Export des frames du viewer (streaming, enregistrement, autres processus).
+
+- AsyncReadback : lecture des pixels via des PBO en double tampon. La frame N
+  est copiée vers le GPU -> PBO pendant qu'on récupère la frame N-1, déjà
+  transférée : glReadPixels ne bloque plus le rendu ;
+- FrameWriter : thread d'écriture avec un pool de tampons fixe. Si l'écriture
+  prend du retard, les frames sont abandonnées (et comptées) plutôt que de
+  ralentir le rendu ;
+- FfmpegSink : frames brutes envoyées sur l'entrée d'un encodeur ffmpeg ;
+- SharedMemoryRing : anneau de frames en mémoire partagée, lisible sans copie
+  par d'autres processus locaux (SharedMemoryRingReader).
+
+    python -m utils.frame_output --read live2d_frames   # lecteur de test
+"""
+
+import ctypes
+import queue
+import subprocess
+import threading
+from multiprocessing import shared_memory
+from time import perf_counter, sleep
+from typing import List, Optional
+
+import numpy as np
+
+CHANNELS = 4  # RGBA
+
+
+class OutputStats:
+    """Compteurs de l'étage de sortie"""
+
+    def __init__(self):
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.readback_latency = 0.0  # glReadPixels -> pixels disponibles (s, cumulé)
+        self.max_readback_latency = 0.0
+        self.map_time = 0.0  # temps passé dans le thread de rendu (s, cumulé)
+
+    def summary(self) -> str:
+        n = max(1, self.captured)
+        return (f"sortie : {self.captured} frames lues, {self.written} écrites, {self.dropped} abandonnées, "
+                f"{self.errors} erreurs, latence de lecture {self.readback_latency / n * 1000:.1f} ms "
+                f"(max {self.max_readback_latency * 1000:.1f} ms), "
+                f"coût rendu {self.map_time / n * 1000:.2f} ms/frame")
+
+
+class AsyncReadback:
+    """
+    Args:
+        width, height: taille du framebuffer lu
+        count: nombre de PBO (latence de count - 1 frames)
+    """
+
+    def __init__(self, width: int, height: int, count: int = 2):
+        from OpenGL import GL
+
+        self.width = width
+        self.height = height
+        self.size = width * height * CHANNELS
+        self.pbos = [int(pbo) for pbo in np.atleast_1d(GL.glGenBuffers(count))]
+        for pbo in self.pbos:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+            GL.glBufferData(GL.GL_PIXEL_PACK_BUFFER, self.size, None, GL.GL_STREAM_READ)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        self._issued: List[Optional[tuple]] = [None] * count  # (index de frame, heure de la demande)
+        self._frame = 0
+
+    def capture(self, out: Optional[np.ndarray]) -> Optional[tuple]:
+        """
+        Demande la lecture de la frame courante et récupère la plus ancienne en attente.
+        Args:
+            out: tampon (height, width, 4) uint8 où copier la frame prête ; None = l'ignorer
+        Returns:
+            tuple: (index, heure de la demande) de la frame copiée dans `out`, ou None
+        """
+        from OpenGL import GL
+
+        slot = self._frame % len(self.pbos)
+        pbo = self.pbos[slot]
+        ready = None
+
+        # 1. Récupérer la frame demandée il y a count frames (transfert terminé)
+        if self._issued[slot] is not None and out is not None:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+            pointer = GL.glMapBufferRange(GL.GL_PIXEL_PACK_BUFFER, 0, self.size, GL.GL_MAP_READ_BIT)
+            if pointer:
+                ctypes.memmove(out.ctypes.data, pointer, self.size)
+                ready = self._issued[slot]
+                GL.glUnmapBuffer(GL.GL_PIXEL_PACK_BUFFER)  # seulement après un map réussi
+
+        # 2. Lancer la copie de la frame courante (asynchrone : destination = PBO)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, pbo)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        self._issued[slot] = (self._frame, perf_counter())
+        self._frame += 1
+        return ready
+
+    def release(self) -> None:
+        from OpenGL import GL
+        if self.pbos:
+            GL.glDeleteBuffers(len(self.pbos), self.pbos)
+            self.pbos = []
+
+
+# --- destinations -----------------------------------------------------------
+
+class FfmpegSink:
+    """
+    Envoie les frames brutes à ffmpeg (fichier, rtmp://, udp://...).
+
+    Args:
+        target: fichier ou URL de sortie
+        fps: cadence déclarée à l'encodeur
+        codec_args: options d'encodage (x264 rapide par défaut)
+    """
+
+    DEFAULT_CODEC = ["-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency", "-pix_fmt", "yuv420p"]
+
+    def __init__(self, target: str, width: int, height: int, fps: int = 60, codec_args: Optional[list] = None):
+        command = [
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-vf", "vflip",  # OpenGL : première ligne en bas
+            *(codec_args if codec_args is not None else self.DEFAULT_CODEC),
+        ]
+        if target.startswith("rtmp://"):
+            command += ["-f", "flv"]
+        self.process = subprocess.Popen(command + [target], stdin=subprocess.PIPE)
+        print(f"🎬 Sortie vidéo : {target}")
+
+    def write(self, frame: np.ndarray, index: int, timestamp: float) -> None:
+        self.process.stdin.write(memoryview(frame).cast("B"))
+
+    def close(self) -> None:
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait(timeout=10)
+
+
+class SharedMemoryRing:
+    """
+    Anneau de frames en mémoire partagée.
+
+    Disposition : en-tête (HEADER_FIELDS en uint64), métadonnées par emplacement
+    (index de frame, horodatage en ns), puis les emplacements de frames RGBA
+    (première ligne en haut). Le compteur d'écriture n'est incrémenté qu'une
+    fois la frame complète : un lecteur lit l'emplacement (compteur - 1) % slots.
+
+    Args:
+        name: nom du segment (/dev/shm/<name> sous Linux)
+        slots: nombre d'emplacements (un lecteur dispose de slots - 1 frames pour lire)
+    """
+
+    MAGIC = 0x4C32445246524D31  # "L2DRFRM1"
+    HEADER_FIELDS = 8  # magic, largeur, hauteur, canaux, slots, compteur, réservés
+    COUNTER = 5
+
+    def __init__(self, name: str, width: int, height: int, slots: int = 4):
+        self.width, self.height, self.slots = width, height, slots
+        self.frame_size = width * height * CHANNELS
+        header_size = (self.HEADER_FIELDS + 2 * slots) * 8
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=header_size + slots * self.frame_size)
+        except FileExistsError:
+            # segment laissé par un processus arrêté brutalement
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=header_size + slots * self.frame_size)
+
+        self.header = np.ndarray((self.HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+        self.meta = np.ndarray((slots, 2), dtype=np.uint64, buffer=self.shm.buf, offset=self.HEADER_FIELDS * 8)
+        self.frames = np.ndarray((slots, height, width, CHANNELS), dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header_size)
+        self.header[:] = 0
+        self.header[:5] = [self.MAGIC, width, height, CHANNELS, slots]
+        print(f"🔗 Sortie mémoire partagée : {name} ({slots} x {width}x{height})")
+
+    def write(self, frame: np.ndarray, index: int, timestamp: float) -> None:
+        counter = int(self.header[self.COUNTER])
+        slot = counter % self.slots
+        self.frames[slot] = frame[::-1]
+        self.meta[slot] = (index, int(timestamp * 1e9))
+        self.header[self.COUNTER] = counter + 1
+
+    def close(self) -> None:
+        name = self.shm.name
+        del self.header, self.meta, self.frames
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        print(f"🔗 Mémoire partagée libérée : {name}")
+
+
+class SharedMemoryRingReader:
+    """Lecture sans copie d'un SharedMemoryRing depuis un autre processus"""
+
+    def __init__(self, name: str):
+        self.shm = shared_memory.SharedMemory(name=name)
+        header = np.ndarray((SharedMemoryRing.HEADER_FIELDS,), dtype=np.uint64, buffer=self.shm.buf)
+        if int(header[0]) != SharedMemoryRing.MAGIC:
+            self.shm.close()
+            raise ValueError(f"'{name}' n'est pas un anneau de frames Live2D")
+        self.header = header
+        self.width, self.height, _, self.slots = (int(v) for v in header[1:5])
+        header_size = (SharedMemoryRing.HEADER_FIELDS + 2 * self.slots) * 8
+        self.meta = np.ndarray((self.slots, 2), dtype=np.uint64, buffer=self.shm.buf,
+                               offset=SharedMemoryRing.HEADER_FIELDS * 8)
+        self.frames = np.ndarray((self.slots, self.height, self.width, CHANNELS), dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=header_size)
+
+    @property
+    def counter(self) -> int:
+        return int(self.header[SharedMemoryRing.COUNTER])
+
+    def latest(self) -> Optional[tuple]:
+        """
+        Returns:
+            tuple: (compteur, index de frame, horodatage ns, vue numpy sur la frame) ou None.
+            La vue reste valide tant que l'écrivain n'a pas fait le tour de l'anneau
+            (vérifier avec still_valid(compteur) après usage).
+        """
+        counter = self.counter
+        if counter == 0:
+            return None
+        slot = (counter - 1) % self.slots
+        index, timestamp = (int(v) for v in self.meta[slot])
+        return counter, index, timestamp, self.frames[slot]
+
+    def still_valid(self, counter: int) -> bool:
+        return self.counter - counter < self.slots - 1
+
+    def close(self) -> None:
+        del self.header, self.meta, self.frames
+        self.shm.close()
+
+
+# --- thread d'écriture --------------------------------------------------------
+
+class FrameWriter:
+    """
+    Args:
+        sinks: destinations (write(frame, index, timestamp) / close())
+        width, height: taille des frames
+        buffers: tampons en circulation entre le rendu et le thread d'écriture
+    """
+
+    def __init__(self, sinks: list, width: int, height: int, buffers: int = 3, stats: Optional[OutputStats] = None):
+        self.sinks = sinks
+        self.stats = stats or OutputStats()
+        self._free: queue.Queue = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(np.empty((height, width, CHANNELS), dtype=np.uint8))
+        self._pending: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def acquire(self) -> Optional[np.ndarray]:
+        """Tampon libre, ou None si l'écriture est en retard (frame abandonnée)"""
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            self.stats.dropped += 1
+            return None
+
+    def submit(self, frame: np.ndarray, index: int, timestamp: float) -> None:
+        self._pending.put((frame, index, timestamp))
+
+    def release(self, frame: np.ndarray) -> None:
+        """Rend un tampon acquis mais non soumis"""
+        self._free.put(frame)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            frame, index, timestamp = item
+            delivered = False
+            for sink in list(self.sinks):
+                try:
+                    sink.write(frame, index, timestamp)
+                    delivered = True
+                except (BrokenPipeError, OSError, ValueError) as e:
+                    self.stats.errors += 1
+                    print(f"❌ Sortie {type(sink).__name__} interrompue : {e}")
+                    self.sinks.remove(sink)
+            if delivered:
+                self.stats.written += 1  # frame reçue par au moins une sortie
+            self._free.put(frame)
+
+    def close(self) -> None:
+        self._pending.put(None)
+        self._thread.join(timeout=10)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"❌ Fermeture {type(sink).__name__} : {e}")
+
+
+class FrameOutput:
+    """
+    Étage de sortie complet, à appeler une fois par frame après le rendu.
+
+    Args:
+        width, height: taille du framebuffer
+        video: fichier ou URL pour ffmpeg (None = pas d'encodage)
+        shm_name: nom de l'anneau en mémoire partagée (None = pas de partage)
+        fps: cadence déclarée à l'encodeur
+    """
+
+    def __init__(self, width: int, height: int, video: Optional[str] = None,
+                 shm_name: Optional[str] = None, fps: int = 60, pbo_count: int = 2):
+        self.stats = OutputStats()
+        sinks = []
+        if video:
+            sinks.append(FfmpegSink(video, width, height, fps))
+        if shm_name:
+            sinks.append(SharedMemoryRing(shm_name, width, height))
+        self.writer = FrameWriter(sinks, width, height, stats=self.stats)
+        self.readback = AsyncReadback(width, height, pbo_count)
+
+    def capture(self) -> None:
+        start = perf_counter()
+        buffer = self.writer.acquire()
+        ready = self.readback.capture(buffer)
+        if ready is None:
+            if buffer is not None:
+                self.writer.release(buffer)
+        else:
+            index, issued = ready
+            now = perf_counter()
+            latency = now - issued
+            self.stats.captured += 1
+            self.stats.readback_latency += latency
+            self.stats.max_readback_latency = max(self.stats.max_readback_latency, latency)
+            self.writer.submit(buffer, index, now)
+        self.stats.map_time += perf_counter() - start
+
+    def close(self) -> None:
+        try:
+            self.readback.release()
+        finally:
+            self.writer.close()
+
+    def summary(self) -> str:
+        return self.stats.summary()
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lecteur de test de l'anneau de frames")
+    parser.add_argument("--read", required=True, help="nom du segment de mémoire partagée")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    reader = SharedMemoryRingReader(args.read)
+    print(f"Anneau {args.read} : {reader.width}x{reader.height}, {reader.slots} emplacements")
+    seen, last, torn = 0, reader.counter, 0
+    start = perf_counter()
+    try:
+        while perf_counter() - start < args.seconds:
+            latest = reader.latest()
+            if latest is None or latest[0] == last:
+                sleep(0.002)
+                continue
+            counter, index, _, frame = latest
+            _ = frame[::64, ::64].mean()  # accès direct, sans copie
+            torn += not reader.still_valid(counter)
+            seen += counter - last
+            last = counter
+    finally:
+        reader.close()
+    elapsed = perf_counter() - start
+    print(f"{seen} frames en {elapsed:.1f} s ({seen / elapsed:.1f} FPS), {torn} lectures écrasées")
+
+
+if __name__ == "__main__":
+    main()
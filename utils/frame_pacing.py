@@ -0,0 +1,160 @@
+"""
+Cadencement de la boucle de rendu.
+
+- FrameClock : vise un FPS cible en tenant compte du temps déjà passé dans la
+  frame (échéances absolues, pas de dérive) ; l'attente se fait sur un
+  événement qu'un autre thread peut déclencher pour réveiller la boucle ;
+- FixedTimestep : avance la simulation par pas fixes, indépendamment du
+  nombre d'images affichées ;
+- FrameStats : histogramme des temps de frame.
+"""
+
+import threading
+from time import perf_counter, sleep
+from typing import Optional
+
+# Bornes supérieures des classes de l'histogramme (ms)
+HISTOGRAM_BOUNDS = [4, 8, 12, 16.7, 20, 25, 33.3, 50, 100, float("inf")]
+
+
+class Wakeup:
+    """Réveil de la boucle de rendu depuis un autre thread (nouvelle requête, audio prêt...)"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def signal(self) -> None:
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        return self._event.wait(timeout)
+
+    def consume(self) -> bool:
+        """True si un réveil a été demandé depuis le dernier appel"""
+        if self._event.is_set():
+            self._event.clear()
+            return True
+        return False
+
+
+class FrameClock:
+    """
+    Args:
+        target_fps: cadence visée quand l'avatar est actif (0 = pas d'attente, benchmarks)
+        idle_fps: cadence réduite au repos (ni parole, ni interaction)
+    """
+
+    def __init__(self, target_fps: int = 60, idle_fps: int = 30):
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        self._last = perf_counter()
+        self._deadline = self._last
+
+    def tick(self, wakeup: Optional[Wakeup] = None, active: bool = True) -> float:
+        """
+        Attend la prochaine échéance (ou un réveil) puis démarre une nouvelle frame.
+        Returns:
+            float: temps écoulé depuis la frame précédente (s)
+        """
+        fps = self.target_fps if active else self.idle_fps
+        now = perf_counter()
+        if fps <= 0:
+            self._deadline = now
+            dt = now - self._last
+            self._last = now
+            return dt
+
+        period = 1.0 / fps
+        self._deadline += period
+        if self._deadline < now - period:
+            # trop en retard (chargement, fenêtre déplacée) : ne pas rattraper en rafale
+            self._deadline = now
+        else:
+            remaining = self._deadline - now
+            if remaining > 0:
+                if wakeup is not None:
+                    if wakeup.wait(remaining):
+                        self._deadline = perf_counter()  # réveil anticipé : recaler l'échéance
+                else:
+                    sleep(remaining)
+
+        now = perf_counter()
+        dt = now - self._last
+        self._last = now
+        return dt
+
+
+class FixedTimestep:
+    """
+    Accumulateur à pas fixe.
+
+    Args:
+        step: durée d'un pas de simulation (s)
+        max_steps: pas maximum par frame (évite la spirale de rattrapage)
+    """
+
+    def __init__(self, step: float = 1.0 / 60, max_steps: int = 5):
+        self.step = step
+        self.max_steps = max_steps
+        self._accumulator = 0.0
+
+    def advance(self, dt: float) -> int:
+        """Returns: nombre de pas à simuler pour cette frame"""
+        self._accumulator += dt
+        steps = int(self._accumulator / self.step)
+        if steps > self.max_steps:
+            self._accumulator = 0.0
+            return self.max_steps
+        self._accumulator -= steps * self.step
+        return steps
+
+
+class FrameStats:
+    """Histogramme des intervalles entre frames et du temps de travail par frame"""
+
+    def __init__(self):
+        self.intervals = [0] * len(HISTOGRAM_BOUNDS)
+        self.work = [0] * len(HISTOGRAM_BOUNDS)
+        self.frames = 0
+        self.total_time = 0.0
+        self.max_interval = 0.0
+        self.coalesced_events = 0
+
+    @staticmethod
+    def _bucket(ms: float) -> int:
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if ms <= bound:
+                return i
+        return len(HISTOGRAM_BOUNDS) - 1
+
+    def record(self, interval: float, work: float) -> None:
+        self.frames += 1
+        self.total_time += interval
+        self.max_interval = max(self.max_interval, interval)
+        self.intervals[self._bucket(interval * 1000)] += 1
+        self.work[self._bucket(work * 1000)] += 1
+
+    def percentile(self, q: float, histogram: Optional[list] = None) -> float:
+        """Borne supérieure (ms) de la classe contenant le q-ième centile"""
+        histogram = histogram or self.intervals
+        target = q * sum(histogram)
+        seen = 0
+        for count, bound in zip(histogram, HISTOGRAM_BOUNDS):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return 0.0
+
+    def summary(self) -> str:
+        if not self.frames:
+            return "aucune frame"
+        fps = self.frames / self.total_time if self.total_time else 0.0
+        lines = [f"{self.frames} frames, {fps:.1f} FPS moyen, pire intervalle {self.max_interval * 1000:.1f} ms, "
+                 f"p95 ≤ {self.percentile(0.95):g} ms, travail p95 ≤ {self.percentile(0.95, self.work):g} ms, "
+                 f"événements souris fusionnés {self.coalesced_events}"]
+        lower = 0
+        for count, work, bound in zip(self.intervals, self.work, HISTOGRAM_BOUNDS):
+            label = f"{lower:g}-{bound:g} ms" if bound != float("inf") else f">{lower:g} ms"
+            lines.append(f"  {label:>14s} intervalle {count:6d}  travail {work:6d}")
+            lower = bound
+        return "\n".join(lines)
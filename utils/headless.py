@@ -0,0 +1,224 @@
+"""
+Rendu hors écran (sans fenêtre ni serveur d'affichage) pour les machines de
+rendu et les benchmarks.
+
+Contextes GL disponibles :
+- "egl"    : EGL + pbuffer (GPU ou Mesa llvmpipe), aucun serveur X requis ;
+- "osmesa" : rendu logiciel OSMesa ;
+- "hidden" : fenêtre pygame cachée (nécessite un affichage, ex: Xvfb).
+
+PyOpenGL choisit sa plateforme à l'import : PYOPENGL_PLATFORM doit valoir
+"egl" ou "osmesa" avant le premier `import OpenGL` (la commande ci-dessous
+s'en charge).
+
+    python -m utils.headless [--model llny] [--frames 300] [--fps 0] [--backend egl]
+                             [--text "Bonjour !"] [--dump frames/ --every 30]
+                             [--video out.mp4] [--shm live2d_frames] [--scale 0.75 | --dynamic]
+"""
+
+import argparse
+import ctypes
+import os
+from typing import Optional
+
+import numpy as np
+
+BACKENDS = ("egl", "osmesa", "hidden")
+
+
+class OffscreenContext:
+    """Contexte GL courant sans fenêtre visible"""
+
+    def __init__(self, width: int, height: int, backend: str = "egl"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Contexte hors écran inconnu : '{backend}'. Disponibles : {', '.join(BACKENDS)}")
+        self.width = width
+        self.height = height
+        self.backend = backend
+        self._handles = None
+        getattr(self, f"_create_{backend}")()
+        print(f"✓ Contexte GL hors écran ({backend}) {width}x{height}")
+
+    def _create_egl(self) -> None:
+        if os.environ.get("PYOPENGL_PLATFORM") != "egl":
+            raise RuntimeError("Définissez PYOPENGL_PLATFORM=egl avant d'importer OpenGL")
+        from OpenGL import EGL
+
+        display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("eglInitialize a échoué")
+
+        attribs = [
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8, EGL.EGL_ALPHA_SIZE, 8,
+            EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_STENCIL_SIZE, 8,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE,
+        ]
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        EGL.eglChooseConfig(display, (EGL.EGLint * len(attribs))(*attribs),
+                            ctypes.pointer(config), 1, ctypes.pointer(count))
+        if count.value < 1:
+            raise RuntimeError("Aucune configuration EGL compatible")
+
+        surface_attribs = [EGL.EGL_WIDTH, self.width, EGL.EGL_HEIGHT, self.height, EGL.EGL_NONE]
+        surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * len(surface_attribs))(*surface_attribs))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+        if not EGL.eglMakeCurrent(display, surface, surface, context):
+            raise RuntimeError("eglMakeCurrent a échoué")
+        self._handles = (display, surface, context)
+
+    def _create_osmesa(self) -> None:
+        if os.environ.get("PYOPENGL_PLATFORM") != "osmesa":
+            raise RuntimeError("Définissez PYOPENGL_PLATFORM=osmesa avant d'importer OpenGL")
+        from OpenGL import GL, arrays, osmesa
+
+        context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 8, 0, None)
+        if not context:
+            raise RuntimeError("OSMesaCreateContextExt a échoué")
+        buffer = arrays.GLubyteArray.zeros((self.height, self.width, 4))
+        if not osmesa.OSMesaMakeCurrent(context, buffer, GL.GL_UNSIGNED_BYTE, self.width, self.height):
+            raise RuntimeError("OSMesaMakeCurrent a échoué")
+        self._handles = (context, buffer)
+
+    def _create_hidden(self) -> None:
+        import pygame
+        from pygame.locals import DOUBLEBUF, OPENGL, HIDDEN
+
+        pygame.display.init()
+        pygame.display.set_mode((self.width, self.height), DOUBLEBUF | OPENGL | HIDDEN)
+
+    def destroy(self) -> None:
+        if self._handles is None:
+            return
+        if self.backend == "egl":
+            from OpenGL import EGL
+            display, surface, context = self._handles
+            EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(display, surface)
+            EGL.eglDestroyContext(display, context)
+            EGL.eglTerminate(display)
+        elif self.backend == "osmesa":
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._handles[0])
+        self._handles = None
+
+
+class Framebuffer:
+    """FBO couleur (texture RGBA) + profondeur/stencil (masques Live2D)"""
+
+    def __init__(self, width: int, height: int):
+        from OpenGL import GL
+
+        self.width = width
+        self.height = height
+        self.fbo = GL.glGenFramebuffers(1)
+        self.texture = GL.glGenTextures(1)
+        self.depth = GL.glGenRenderbuffers(1)
+
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, width, height, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None)
+
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, self.depth)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_DEPTH24_STENCIL8, width, height)
+
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.fbo)
+        GL.glFramebufferTexture2D(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0, GL.GL_TEXTURE_2D, self.texture, 0)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_DEPTH_STENCIL_ATTACHMENT, GL.GL_RENDERBUFFER, self.depth)
+        status = GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, 0)
+        if status != GL.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"Framebuffer incomplet (0x{status:x})")
+
+    def bind(self) -> None:
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.fbo)
+        GL.glViewport(0, 0, self.width, self.height)
+
+    def unbind(self) -> None:
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, 0)
+
+    def read_pixels(self) -> np.ndarray:
+        """Image RGBA (hauteur, largeur, 4), première ligne en haut"""
+        from OpenGL import GL
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, self.fbo)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        data = GL.glReadPixels(0, 0, self.width, self.height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+        image = np.frombuffer(data, dtype=np.uint8).reshape(self.height, self.width, 4)
+        return image[::-1]
+
+    def release(self) -> None:
+        from OpenGL import GL
+        GL.glDeleteFramebuffers(1, [self.fbo])
+        GL.glDeleteTextures([self.texture])
+        GL.glDeleteRenderbuffers(1, [self.depth])
+
+
+def save_frame(image: np.ndarray, directory: str, index: int) -> str:
+    """Écrit une image RGBA en PNG (comparaison visuelle entre versions)"""
+    import cv2
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"frame_{index:05d}.png")
+    cv2.imwrite(path, cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA))
+    return path
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rendu Live2D sans affichage")
+    parser.add_argument("--model", default="mao")
+    parser.add_argument("--frames", type=int, default=300, help="nombre de frames à rendre")
+    parser.add_argument("--fps", type=int, default=0, help="cadence visée (0 = aussi vite que possible)")
+    parser.add_argument("--backend", choices=BACKENDS, default="egl")
+    parser.add_argument("--width", type=int, default=500)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--text", help="phrase à faire dire (expression + lip sync)")
+    parser.add_argument("--dump", help="dossier où écrire les frames")
+    parser.add_argument("--every", type=int, default=30, help="écrire une frame sur N")
+    parser.add_argument("--video", help="fichier ou URL encodé par ffmpeg")
+    parser.add_argument("--shm", help="nom de l'anneau de frames en mémoire partagée")
+    parser.add_argument("--scale", type=float, default=1.0, help="résolution interne du modèle")
+    parser.add_argument("--dynamic", action="store_true", help="ajuster la résolution pour tenir 60 FPS")
+    args = parser.parse_args(argv)
+
+    if args.backend in ("egl", "osmesa"):
+        os.environ.setdefault("PYOPENGL_PLATFORM", args.backend)
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    # Import tardif : OpenGL doit voir PYOPENGL_PLATFORM
+    import threading
+    import live2d.v3 as live2d
+    from utils.manage_model import ModelManager
+    from utils.model_viewer import Live2DViewer, ViewConfig
+
+    # Avant de créer le contexte EGL/OSMesa : un modèle incomplet échouerait plus tard
+    try:
+        manager = ModelManager(args.model)
+        manager.check_loadable(live2d.LIVE2D_VERSION)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    config = ViewConfig(width=args.width, height=args.height, target_fps=args.fps, idle_fps=args.fps,
+                        headless=True, headless_backend=args.backend, max_frames=args.frames,
+                        dump_dir=args.dump, dump_every=args.every,
+                        output_video=args.video, output_shm=args.shm,
+                        render_scale=args.scale, dynamic_resolution=args.dynamic)
+    viewer = Live2DViewer(manager, config)
+    try:
+        viewer.initialize()
+        if args.text:
+            threading.Timer(0.1, Live2DViewer.send_text, args=(args.text,)).start()
+        viewer.run()
+    finally:
+        viewer.cleanup()
+
+
+if __name__ == "__main__":
+    main()
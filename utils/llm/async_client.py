@@ -0,0 +1,180 @@
+"""
+Client asyncio pour l'API /api/chat d'Ollama.
+
+- une seule connexion HTTP keep-alive par hôte, réutilisée entre les requêtes ;
+- `max_concurrency` générations simultanées au plus (les suivantes attendent) ;
+- délais séparés pour la connexion, le premier token et l'écart entre tokens ;
+- annulation réelle : annuler la tâche (ou `cancel_all()`) ferme le flux HTTP,
+  Ollama détecte la déconnexion et arrête la génération côté serveur.
+
+    client = AsyncLLMClient("llama3")
+    async for token in client.chat_stream(messages):
+        ...
+    await client.aclose()
+
+Le client n'est pas encore branché sur OllamaChat, qui reste synchrone (bibliothèque
+ollama, génération dans un thread) : il sert pour l'instant au test de charge
+de stub_server (--load-test) et aux intégrations asyncio.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from time import time
+from typing import AsyncIterator, Dict, List
+
+import httpx
+
+DEFAULT_HOST = "http://localhost:11434"
+
+
+class LLMTimeout(Exception):
+    """Le serveur n'a pas répondu dans les délais"""
+
+
+@dataclass
+class LLMStats:
+    """Compteurs du client"""
+    requests: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    tokens: int = 0
+    first_token_time: float = 0.0  # cumul, pour la moyenne
+    first_tokens: int = 0  # requêtes ayant reçu un premier token (annulées comprises)
+    waiting_time: float = 0.0  # attente du sémaphore de concurrence
+
+    def mean_first_token(self) -> float:
+        return self.first_token_time / self.first_tokens if self.first_tokens else 0.0
+
+    def summary(self) -> str:
+        return (f"requêtes {self.completed}/{self.requests} terminées, "
+                f"{self.cancelled} annulées, {self.timeouts} délais dépassés, {self.errors} erreurs, "
+                f"1er token moyen {self.mean_first_token():.2f}s, attente file {self.waiting_time:.2f}s")
+
+
+class AsyncLLMClient:
+    """
+    Args:
+        model_name: Nom du modèle dans Ollama
+        host: URL du serveur (Ollama ou stub_server)
+        max_concurrency: générations simultanées maximales
+        connect_timeout: délai de connexion (s)
+        first_token_timeout: délai max avant le premier token (chargement du modèle compris)
+        token_timeout: délai max entre deux tokens
+        keep_alive: durée pendant laquelle Ollama garde le modèle chargé
+    """
+
+    def __init__(self, model_name: str, host: str = DEFAULT_HOST, max_concurrency: int = 1,
+                 connect_timeout: float = 5.0, first_token_timeout: float = 60.0,
+                 token_timeout: float = 15.0, keep_alive: str = "10m"):
+        self.model_name = model_name
+        self.host = host.rstrip("/")
+        self.first_token_timeout = first_token_timeout
+        self.token_timeout = token_timeout
+        self.keep_alive = keep_alive
+        self.stats = LLMStats()
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: set = set()
+        self._client = httpx.AsyncClient(
+            base_url=self.host,
+            timeout=httpx.Timeout(connect=connect_timeout, read=None, write=connect_timeout, pool=None),
+            limits=httpx.Limits(max_connections=max_concurrency,
+                                max_keepalive_connections=max_concurrency,
+                                keepalive_expiry=60.0),
+        )
+
+    async def chat_stream(self, messages: List[Dict[str, str]], **options) -> AsyncIterator[str]:
+        """
+        Génère une réponse token par token.
+        Raises:
+            LLMTimeout: premier token ou token suivant trop lent
+            asyncio.CancelledError: requête annulée (le flux est fermé)
+        """
+        payload = {
+            "model": self.model_name,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+        }
+        if options:
+            payload["options"] = options
+
+        self.stats.requests += 1
+        task = asyncio.current_task()
+        queued_at = time()
+
+        async with self._semaphore:
+            self.stats.waiting_time += time() - queued_at
+            self._tasks.add(task)
+            start = time()
+            first_token = True
+            try:
+                async with self._client.stream("POST", "/api/chat", json=payload) as response:
+                    response.raise_for_status()
+                    lines = response.aiter_lines()
+                    while True:
+                        timeout = self.first_token_timeout if first_token else self.token_timeout
+                        try:
+                            line = await asyncio.wait_for(lines.__anext__(), timeout)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            self.stats.timeouts += 1
+                            raise LLMTimeout(f"Aucun token depuis {timeout:.0f}s") from None
+
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise RuntimeError(chunk["error"])
+
+                        content = chunk.get("message", {}).get("content", "")
+                        if content:
+                            if first_token:
+                                self.stats.first_token_time += time() - start
+                                self.stats.first_tokens += 1
+                                first_token = False
+                            self.stats.tokens += 1
+                            yield content
+                        if chunk.get("done"):
+                            break
+                self.stats.completed += 1
+            except (asyncio.CancelledError, GeneratorExit):
+                # la sortie du `async with` a fermé la connexion : Ollama arrête la génération
+                self.stats.cancelled += 1
+                raise
+            except LLMTimeout:
+                raise
+            except Exception:
+                self.stats.errors += 1
+                raise
+            finally:
+                self._tasks.discard(task)
+
+    async def chat(self, messages: List[Dict[str, str]], **options) -> str:
+        """Réponse complète (non streamée côté appelant)"""
+        return "".join([token async for token in self.chat_stream(messages, **options)])
+
+    def cancel_all(self) -> int:
+        """
+        Annule toutes les générations en cours (barge-in).
+        Returns:
+            int: nombre de requêtes annulées
+        """
+        tasks = [task for task in self._tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def aclose(self) -> None:
+        self.cancel_all()
+        await self._client.aclose()
+
+    async def __aenter__(self) -> 'AsyncLLMClient':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
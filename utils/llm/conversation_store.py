@@ -0,0 +1,225 @@
+"""
+Stockage persistant des conversations (SQLite embarqué).
+
+- écriture différée : `append` ne fait que mettre le message en file, un thread
+  écrit par lots (une transaction par lot), le chat n'attend jamais le disque ;
+- index (session, seq) : charger les N derniers tours d'une session ne dépend
+  pas de la longueur de l'historique ;
+- `compact` supprime les vieux tours (le résumé de session les remplace).
+
+    store = ConversationStore("conversations.db")
+    store.append("alex", "user", "Salut !")
+    recent, summary = store.load_recent("alex", 40)
+"""
+
+import queue
+import sqlite3
+import threading
+from time import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PATH = "conversations.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    session TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (session, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sessions (
+    session TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL
+);
+"""
+
+
+class ConversationStore:
+    """
+    Args:
+        path: fichier SQLite
+        batch_size: messages maximum par transaction
+        flush_interval: délai maximal (s) avant l'écriture d'un message en file
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, batch_size: int = 64, flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._next_seq: Dict[str, int] = {}
+        self._seq_lock = threading.Lock()
+        self._pending: queue.Queue = queue.Queue()
+        self.batches_written = 0
+        self.rows_written = 0
+
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_worker, daemon=True)
+        self._writer.start()
+
+    # --- écriture ---------------------------------------------------------
+
+    def _seq(self, session: str) -> int:
+        with self._seq_lock:
+            if session not in self._next_seq:
+                with self._db_lock:
+                    row = self._conn.execute(
+                        "SELECT MAX(seq) FROM turns WHERE session = ?", (session,)).fetchone()
+                self._next_seq[session] = (row[0] + 1) if row[0] is not None else 0
+            seq = self._next_seq[session]
+            self._next_seq[session] += 1
+            return seq
+
+    def append(self, session: str, role: str, content: str) -> None:
+        """Met un message en file d'écriture (ne bloque pas)"""
+        self._pending.put(("turn", (session, self._seq(session), role, content, time())))
+
+    def save_summary(self, session: str, summary: str) -> None:
+        self._pending.put(("summary", (session, summary, time())))
+
+    def _write_worker(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                self._pending.task_done()
+                return
+
+            batch = [item]
+            deadline = time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)  # traité après ce lot
+                    self._pending.task_done()
+                    break
+                batch.append(item)
+
+            try:
+                self._write_batch(batch)
+            except sqlite3.Error as e:
+                print(f"⚠️  Écriture de la conversation impossible: {e}")
+            finally:
+                for _ in batch:
+                    self._pending.task_done()
+
+    def _write_batch(self, batch: list) -> None:
+        turns = [data for kind, data in batch if kind == "turn"]
+        summaries = [data for kind, data in batch if kind == "summary"]
+        with self._db_lock, self._conn:
+            if turns:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO turns (session, seq, role, content, created) VALUES (?, ?, ?, ?, ?)",
+                    turns)
+            for session, summary, updated in summaries:
+                self._conn.execute(
+                    "INSERT INTO sessions (session, summary, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session) DO UPDATE SET summary = excluded.summary, updated = excluded.updated",
+                    (session, summary, updated))
+        self.batches_written += 1
+        self.rows_written += len(turns)
+
+    def flush(self) -> None:
+        """Attend que tout ce qui est en file soit écrit"""
+        self._pending.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.put(None)
+        self._writer.join()
+        with self._db_lock:
+            self._conn.close()
+
+    # --- lecture ----------------------------------------------------------
+
+    def load_recent(self, session: str, n: int) -> Tuple[List[Dict[str, str]], str]:
+        """
+        Derniers messages d'une session (parcours de l'index depuis la fin).
+        Returns:
+            tuple: (messages du plus ancien au plus récent, résumé de session)
+        """
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM turns WHERE session = ? ORDER BY seq DESC LIMIT ?",
+                (session, n)).fetchall()
+            summary = self._conn.execute(
+                "SELECT summary FROM sessions WHERE session = ?", (session,)).fetchone()
+        messages = [{'role': role, 'content': content} for role, content in reversed(rows)]
+        return messages, summary[0] if summary else ""
+
+    def load_all(self, session: str) -> List[Dict[str, str]]:
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM turns WHERE session = ? ORDER BY seq", (session,)).fetchall()
+        return [{'role': role, 'content': content} for role, content in rows]
+
+    def count(self, session: str) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM turns WHERE session = ?", (session,)).fetchone()[0]
+
+    def sessions(self) -> List[str]:
+        self.flush()
+        with self._db_lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT session FROM turns ORDER BY session")]
+
+    # --- maintenance ------------------------------------------------------
+
+    def clear_session(self, session: str) -> int:
+        """
+        Supprime les tours et le résumé d'une session (après écriture de ce qui est en file).
+        Returns:
+            int: nombre de tours supprimés
+        """
+        self.flush()
+        with self._seq_lock, self._db_lock:
+            with self._conn:
+                deleted = self._conn.execute("DELETE FROM turns WHERE session = ?", (session,)).rowcount
+                self._conn.execute("DELETE FROM sessions WHERE session = ?", (session,))
+            self._next_seq[session] = 0
+        return deleted
+
+    def compact(self, session: Optional[str] = None, keep_last: int = 200, vacuum: bool = True) -> int:
+        """
+        Supprime les tours plus anciens que les `keep_last` derniers (le résumé
+        de session est conservé), puis récupère la place sur disque.
+        Args:
+            session: session à compacter (None = toutes)
+        Returns:
+            int: nombre de tours supprimés
+        """
+        keep_last = max(1, keep_last)
+        self.flush()
+        targets = [session] if session is not None else self.sessions()
+        deleted = 0
+        with self._db_lock:
+            with self._conn:
+                for name in targets:
+                    row = self._conn.execute(
+                        "SELECT seq FROM turns WHERE session = ? ORDER BY seq DESC LIMIT 1 OFFSET ?",
+                        (name, keep_last - 1)).fetchone()
+                    if row is None:
+                        continue
+                    cursor = self._conn.execute(
+                        "DELETE FROM turns WHERE session = ? AND seq < ?", (name, row[0]))
+                    deleted += cursor.rowcount
+            if vacuum and deleted:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._conn.execute("VACUUM")
+        print(f"🧹 Conversations compactées : {deleted} tours supprimés")
+        return deleted
@@ -1,19 +1,88 @@
-from typing import List, Dict
+from typing import List, Dict, Callable, Optional
 from collections import deque
+import queue
+import re
+import threading
+from time import time
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimation rapide du nombre de tokens : mots et ponctuation, les mots longs
+    comptent plusieurs fois, + 4 pour les balises de rôle du template de chat
+    """
+    return sum(1 + len(piece) // 6 for piece in re.findall(r"\w+|[^\w\s]", text)) + 4
+
+
+def hf_token_counter(tokenizer_name: str) -> Callable[[str], int]:
+    """Compteur exact à partir d'un tokenizer Hugging Face (ex: 'mistralai/Mistral-7B-Instruct-v0.2')"""
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False)) + 4
+
 
 class MemoryManager:
-    def __init__(self, max_turns: int = 20):
+    def __init__(self, max_turns: int = 20, max_tokens: int = 2048,
+                 count_tokens: Optional[Callable[[str], int]] = None,
+                 summarizer: Optional[Callable[[str, List[Dict[str, str]]], str]] = None,
+                 store=None, session: Optional[str] = None, max_archive: int = 200):
         """
-        Gestionnaire de mémoire avec fenêtre glissante
+        Gestionnaire de mémoire avec fenêtre glissante bornée en tokens
         
         Args:
             max_turns: Nombre maximum de tours de conversation à retenir
                       (1 tour = 1 message user + 1 message assistant)
+            max_tokens: Budget de tokens du contexte (résumé compris)
+            count_tokens: Compteur de tokens (estimation par défaut), appelé une fois par message
+            summarizer: summarizer(résumé_précédent, messages_oubliés) -> nouveau résumé,
+                        exécuté en arrière-plan. None = les messages oubliés sont perdus
+            store: ConversationStore où persister les messages et le résumé (optionnel)
+            session: Nom de la session dans le store ; la session existante est reprise
+            max_archive: Messages oubliés gardés en RAM (get_context(include_all=True) sans store) ;
+                        au-delà, seuls le résumé et le store les conservent
         """
         self.max_turns = max_turns
-        self.conversation_history: deque = deque(maxlen=max_turns * 2)
-        # maxlen * 2 car chaque tour = 2 messages (user + assistant)
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+        self.summarizer = summarizer
+        
+        self.conversation_history: deque = deque()
+        self._token_counts: deque = deque()  # nombre de tokens de chaque message, calculé une fois
+        self.history_tokens = 0
+        self.archive: List[Dict[str, str]] = []  # messages sortis de la fenêtre (les max_archive derniers)
+        self.max_archive = max_archive
         self.total_messages = 0
+        
+        self.summary = ""
+        self.summary_tokens = 0
+        self._lock = threading.Lock()
+        self._evicted: queue.Queue = queue.Queue()
+        self._summarizer_thread: Optional[threading.Thread] = None
+        self._generation = 0  # incrémenté par clear() : les résumés en cours sont alors ignorés
+        
+        self.store = store if session is not None else None
+        self.session = session
+        if self.store is not None:
+            self.resume()
+    
+    def resume(self):
+        """Recharge la fin de la session depuis le store (derniers tours + résumé)"""
+        start = time()
+        messages, summary = self.store.load_recent(self.session, self.max_turns * 2)
+        with self._lock:
+            self.summary = summary
+            self.summary_tokens = self.count_tokens(summary) if summary else 0
+            for msg in messages:
+                tokens = self.count_tokens(msg['content'])
+                self.conversation_history.append(msg)
+                self._token_counts.append(tokens)
+                self.history_tokens += tokens
+            self.total_messages = len(messages)
+            # les plus anciens messages rechargés sont déjà couverts par le résumé (ou perdus)
+            self._evict()
+        if messages:
+            print(f"💾 Session '{self.session}' reprise : {len(self.conversation_history)} messages "
+                  f"en {(time() - start) * 1000:.1f} ms")
     
     def add_message(self, role: str, content: str):
         """
@@ -23,32 +92,137 @@ class MemoryManager:
             role: 'user' ou 'assistant'
             content: Contenu du message
         """
-        self.conversation_history.append({
-            'role': role,
-            'content': content
-        })
-        self.total_messages += 1
+        tokens = self.count_tokens(content)
+        with self._lock:
+            self.conversation_history.append({
+                'role': role,
+                'content': content
+            })
+            self._token_counts.append(tokens)
+            self.history_tokens += tokens
+            self.total_messages += 1
+            evicted = self._evict()
+        
+        if self.store is not None:
+            self.store.append(self.session, role, content)
+        
+        if evicted:
+            self._archive(evicted)
+            if self.summarizer is not None:
+                self._evicted.put(evicted)
+                self._ensure_summarizer()
+    
+    def _archive(self, evicted: List[Dict[str, str]]):
+        """Garde les messages oubliés, dans la limite de max_archive"""
+        with self._lock:
+            self.archive.extend(evicted)
+            if len(self.archive) > self.max_archive:
+                del self.archive[:len(self.archive) - self.max_archive]
+    
+    def _evict(self) -> List[Dict[str, str]]:
+        """Retire les plus anciens messages (par tours entiers) tant que la fenêtre dépasse le budget"""
+        evicted = []
+        budget = self.max_tokens - self.summary_tokens
+        while len(self.conversation_history) > 2 and (
+                self.history_tokens > budget or len(self.conversation_history) > self.max_turns * 2):
+            # un tour à la fois pour ne jamais commencer le contexte par une réponse orpheline
+            for _ in range(2 if self.conversation_history[0]['role'] == 'user' else 1):
+                if len(self.conversation_history) <= 2:
+                    break
+                evicted.append(self.conversation_history.popleft())
+                self.history_tokens -= self._token_counts.popleft()
+        return evicted
+    
+    def _ensure_summarizer(self):
+        if self._summarizer_thread is None or not self._summarizer_thread.is_alive():
+            self._summarizer_thread = threading.Thread(target=self._summarize_worker, daemon=True)
+            self._summarizer_thread.start()
+    
+    def _summarize_worker(self):
+        """Intègre les messages oubliés au résumé, hors du chemin critique"""
+        while True:
+            evicted = self._evicted.get()
+            
+            # Regrouper ce qui s'est accumulé pendant le résumé précédent
+            batches = 1
+            while not self._evicted.empty():
+                evicted = evicted + self._evicted.get_nowait()
+                batches += 1
+            generation = self._generation
+            
+            try:
+                summary = self.summarizer(self.summary, evicted).strip()
+            except Exception as e:
+                print(f"⚠️  Résumé de la mémoire impossible: {e}")
+                continue
+            finally:
+                for _ in range(batches):
+                    self._evicted.task_done()
+            
+            tokens = self.count_tokens(summary) if summary else 0
+            with self._lock:
+                if generation != self._generation:
+                    continue  # mémoire effacée pendant le résumé
+                self.summary = summary
+                self.summary_tokens = tokens
+                evicted = self._evict()  # le résumé a grandi : rester dans le budget
+            if self.store is not None:
+                self.store.save_summary(self.session, summary)
+            if evicted:
+                self._archive(evicted)
+                self._evicted.put(evicted)
+    
+    def wait_summary(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin des résumés en cours (tests, fermeture)"""
+        thread = self._summarizer_thread
+        if thread is None:
+            return True
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._evicted.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
     
     def get_context(self, include_all: bool = False) -> List[Dict[str, str]]:
         """
         Récupère le contexte de conversation
         
         Args:
-            include_all: Si False, utilise la fenêtre glissante
-            
+            include_all: Si False, utilise la fenêtre glissante (précédée du résumé
+                        des messages oubliés) ; si True, toute la conversation
+        
         Returns:
             Liste des messages dans le contexte
         """
-        if include_all:
-            return list(self.conversation_history)
+        if include_all and self.store is not None:
+            return self.store.load_all(self.session)
         
-        # Retourne les derniers messages (fenêtre glissante automatique)
-        return list(self.conversation_history)
+        with self._lock:
+            if include_all:
+                return self.archive + list(self.conversation_history)
+            
+            context = list(self.conversation_history)
+            if self.summary:
+                context.insert(0, {
+                    'role': 'system',
+                    'content': f"Résumé du début de la conversation : {self.summary}"
+                })
+            return context
     
     def clear(self):
-        """Efface tout l'historique"""
-        self.conversation_history.clear()
-        self.total_messages = 0
+        """Efface tout l'historique, y compris la session sauvegardée (sinon reprise au prochain lancement)"""
+        with self._lock:
+            self._generation += 1
+            while not self._evicted.empty():
+                self._evicted.get_nowait()
+                self._evicted.task_done()
+            self.conversation_history.clear()
+            self._token_counts.clear()
+            self.history_tokens = 0
+            self.archive = []
+            self.summary = ""
+            self.summary_tokens = 0
+            self.total_messages = 0
+        if self.store is not None:
+            self.store.clear_session(self.session)
     
     def get_turn_count(self) -> int:
         """Retourne le nombre de tours de conversation"""
@@ -57,13 +231,17 @@ class MemoryManager:
     def get_memory_info(self) -> Dict:
         """Retourne des informations sur l'état de la mémoire"""
         current_turns = self.get_turn_count()
+        context_tokens = self.history_tokens + self.summary_tokens
         return {
             'current_turns': current_turns,
             'max_turns': self.max_turns,
             'total_messages': self.total_messages,
             'messages_in_memory': len(self.conversation_history),
-            'memory_full': current_turns >= self.max_turns,
-            'oldest_message_forgotten': self.total_messages > self.max_turns * 2
+            'context_tokens': context_tokens,
+            'max_tokens': self.max_tokens,
+            'summary_tokens': self.summary_tokens,
+            'memory_full': current_turns >= self.max_turns or context_tokens >= self.max_tokens * 0.9,
+            'oldest_message_forgotten': len(self.archive) > 0
         }
     
     def get_summary(self) -> str:
@@ -73,7 +251,11 @@ class MemoryManager:
         status = "🟢 Mémoire disponible"
         if info['memory_full']:
             status = "🟡 Fenêtre glissante active (oublie les anciens messages)"
+        if self.summary:
+            status += " — début de conversation résumé"
         
         return (f"{status}\n"
                 f"Tours actuels: {info['current_turns']}/{info['max_turns']}\n"
+                f"Tokens du contexte: {info['context_tokens']}/{info['max_tokens']} "
+                f"(résumé: {info['summary_tokens']})\n"
                 f"Messages totaux échangés: {info['total_messages']}")
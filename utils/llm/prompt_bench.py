@@ -0,0 +1,64 @@
+"""
+Mesure le temps d'évaluation du prompt par tour (prompt_eval_duration d'Ollama)
+avec l'ancien format (message dans le prompt système) et le format à préfixe
+stable (prompter.build_messages).
+
+    python -m utils.llm.prompt_bench <modèle> [tours]
+
+Ollama (ou utils.llm.stub_server, qui ne simule pas le cache) doit tourner.
+"""
+
+import sys
+from itertools import cycle
+
+import ollama
+
+from utils.llm.use_leaticia import PromptStats
+from utils.prompter import build_messages, format_system_prompt
+
+SCRIPT = [
+    ("joy", "J'ai eu mon permis ce matin !"),
+    ("curiosity", "Tu sais comment on fait une vraie fondue savoyarde ?"),
+    ("annoyance", "Mon voisin a encore fait des travaux à 7h du mat..."),
+    ("sadness", "Franchement je me sens un peu seul ces temps-ci."),
+    ("amusement", "Attends, j'ai mis des artichauts dans la raclette pour rire."),
+    ("neutral", "Bon, tu fais quoi ce week-end ?"),
+]
+
+
+def run(model_name: str, layout: str, turns: int, user_name: str = "buddy") -> PromptStats:
+    """Joue `turns` tours de conversation et relève le coût du prompt à chaque tour"""
+    stats = PromptStats()
+    history = []
+    for turn, (emotion, text) in zip(range(turns), cycle(SCRIPT)):
+        if layout == "stable":
+            messages = build_messages(emotion, text, history, user_name, record=False)
+        else:
+            system = format_system_prompt(emotion, text, user_name, record=False)
+            messages = [{'role': 'system', 'content': system}] + history + [{'role': 'user', 'content': text}]
+
+        response = ollama.chat(model=model_name, messages=messages, stream=False,
+                               keep_alive="10m", options={"num_predict": 48})
+        if turn > 0:  # le premier tour évalue tout dans les deux cas
+            stats.record(response)
+        print(f"  [{layout}] tour {turn + 1}: {stats.summary() if turn > 0 else 'préchauffage'}")
+
+        history += [{'role': 'user', 'content': text},
+                    {'role': 'assistant', 'content': response['message']['content']}]
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    model_name = sys.argv[1]
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+
+    results = {layout: run(model_name, layout, turns) for layout in ("legacy", "stable")}
+
+    print("\n=== Résumé ===")
+    for layout, stats in results.items():
+        mean_tokens = stats.tokens / stats.turns if stats.turns else 0
+        print(f"  {layout:7s} {mean_tokens:6.0f} tokens évalués/tour, {stats.mean_duration() * 1000:6.0f} ms/tour")
@@ -0,0 +1,311 @@
+"""
+Mémoire sémantique à long terme : index d'embeddings des anciens échanges.
+
+- vecteurs normalisés stockés en float16 (matrice contiguë, 2 octets / dimension),
+  ajoutés un par un sans reconstruire l'index ;
+- recherche exacte (produit scalaire par blocs) pour les petits index, IVF
+  (k-means, on ne visite que les `nprobe` listes les plus proches) au-delà de
+  `ivf_threshold` entrées ;
+- persistance en ajout seul : vectors.f16 (binaire brut) + entries.jsonl, la
+  dimension est dans meta.json ; au chargement, les deux fichiers sont ramenés
+  au même nombre de lignes (écriture interrompue entre les deux ajouts).
+
+Les embeddings viennent d'Ollama (`ollama pull nomic-embed-text`).
+"""
+
+import json
+import os
+import threading
+from time import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+DEFAULT_DIR = "memory_index"
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+
+
+class OllamaEmbedder:
+    """Embeddings via l'API /api/embed d'Ollama"""
+
+    def __init__(self, model_name: str = DEFAULT_EMBED_MODEL, keep_alive: str = "10m"):
+        self.model_name = model_name
+        self.keep_alive = keep_alive
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        import ollama
+        response = ollama.embed(model=self.model_name, input=texts, keep_alive=self.keep_alive)
+        return np.asarray(response['embeddings'], dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, triés (argpartition puis tri de k éléments)"""
+    if len(scores) <= k:
+        return np.argsort(-scores)
+    best = np.argpartition(-scores, k)[:k]
+    return best[np.argsort(-scores[best])]
+
+
+class SemanticMemory:
+    """
+    Args:
+        embed: fonction textes -> matrice d'embeddings (OllamaEmbedder par défaut)
+        directory: dossier de persistance (None = en mémoire seulement)
+        ivf_threshold: taille à partir de laquelle l'index IVF est construit
+        nprobe: listes IVF visitées par requête
+        block_size: lignes converties en float32 à la fois en recherche exacte
+    """
+
+    def __init__(self, embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 directory: Optional[str] = DEFAULT_DIR, ivf_threshold: int = 20000,
+                 nprobe: int = 8, block_size: int = 16384):
+        self.embed = embed or OllamaEmbedder()
+        self.directory = directory
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.block_size = block_size
+
+        self.dim: Optional[int] = None
+        self._vectors = np.zeros((0, 0), dtype=np.float16)
+        self.size = 0
+        self.entries: List[dict] = []
+        self._lock = threading.Lock()  # état en mémoire, partagé avec la recherche
+        self._write_lock = threading.Lock()  # ajouts : fichiers écrits dans l'ordre des ids
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._ivf_built_at = 0
+        self._ivf_building = False
+
+        if directory:
+            self._load()
+
+    # --- persistance ------------------------------------------------------
+
+    def _paths(self):
+        return (os.path.join(self.directory, "vectors.f16"),
+                os.path.join(self.directory, "entries.jsonl"))
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    def _read_dim(self) -> Optional[int]:
+        try:
+            with open(self._meta_path(), encoding="utf-8") as f:
+                return int(json.load(f)["dim"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_meta(self) -> None:
+        tmp_path = self._meta_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim}, f)
+        os.replace(tmp_path, self._meta_path())
+
+    def _load(self) -> None:
+        vectors_path, entries_path = self._paths()
+        if not (os.path.isfile(vectors_path) and os.path.isfile(entries_path)):
+            return
+
+        start = time()
+        entries = []
+        truncated = False
+        with open(entries_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    truncated = True  # dernière ligne tronquée
+                    break
+        vectors = np.fromfile(vectors_path, dtype=np.float16)
+
+        dim = self._read_dim()
+        if dim is None:
+            # index antérieur à meta.json : la dimension ne se déduit que si les fichiers concordent
+            if not entries or len(vectors) % len(entries):
+                print("⚠️  Mémoire sémantique : dimension inconnue (meta.json absent), index ignoré")
+                return
+            dim = len(vectors) // len(entries)
+        rows = len(vectors) // dim
+        # écriture interrompue entre l'ajout des vecteurs et celui des entrées (ou l'inverse)
+        count = min(rows, len(entries))
+
+        self.dim = dim
+        self._vectors = vectors[:count * dim].reshape(count, dim).copy()
+        self.size = count
+        self.entries = entries[:count]
+        if truncated or count != rows or count != len(entries) or len(vectors) != rows * dim:
+            self._truncate_files()
+        elif not os.path.isfile(self._meta_path()):
+            self._write_meta()
+        if self.size >= self.ivf_threshold:
+            self._rebuild_ivf()
+        print(f"🧠 Mémoire sémantique : {self.size} souvenirs chargés en {(time() - start) * 1000:.0f} ms")
+
+    def _truncate_files(self) -> None:
+        """Ramène les fichiers aux `size` lignes chargées, pour que les ajouts suivants restent alignés"""
+        vectors_path, entries_path = self._paths()
+        with open(vectors_path, "r+b") as f:
+            f.truncate(self.size * self.dim * 2)
+        tmp_path = entries_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, entries_path)
+        self._write_meta()
+        print(f"⚠️  Mémoire sémantique : écriture interrompue réparée ({self.size} souvenirs gardés)")
+
+    def _persist(self, vectors: np.ndarray, entries: List[dict]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        vectors_path, entries_path = self._paths()
+        if not os.path.isfile(self._meta_path()):
+            self._write_meta()
+        with open(vectors_path, "ab") as f:
+            vectors.astype(np.float16).tofile(f)
+        with open(entries_path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    # --- insertion --------------------------------------------------------
+
+    def add(self, texts: List[str], **metadata) -> None:
+        """
+        Ajoute des souvenirs (un embedding par texte).
+        Args:
+            texts: textes à indexer (échange, résumé...)
+            metadata: champs ajoutés à chaque entrée (session, kind...)
+        """
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            return
+        vectors = _normalize(self.embed(texts)).astype(np.float16)
+        entries = [{"text": text, "created": time(), **metadata} for text in texts]
+
+        with self._write_lock:
+            with self._lock:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._vectors = np.zeros((1024, self.dim), dtype=np.float16)
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"Dimension d'embedding {vectors.shape[1]} != {self.dim} (modèle changé ?)")
+
+                # capacité doublée au besoin : insertion amortie en O(1)
+                needed = self.size + len(vectors)
+                if needed > len(self._vectors):
+                    grown = np.zeros((max(needed, len(self._vectors) * 2), self.dim), dtype=np.float16)
+                    grown[:self.size] = self._vectors[:self.size]
+                    self._vectors = grown
+                self._vectors[self.size:needed] = vectors
+                first = self.size
+                self.size = needed
+                self.entries.extend(entries)
+
+                if self._centroids is not None:
+                    assign = np.argmax(vectors.astype(np.float32) @ self._centroids.T, axis=1)
+                    for offset, cluster in enumerate(assign):
+                        self._lists[cluster].append(first + offset)
+                rebuild = (self.size >= self.ivf_threshold and self.size >= 2 * self._ivf_built_at
+                           and not self._ivf_building)
+                if rebuild:
+                    self._ivf_building = True
+
+            # hors du verrou de recherche ; le verrou d'écriture garde vecteurs et entrées dans le même ordre
+            if self.directory:
+                self._persist(vectors, entries)
+
+        if rebuild:
+            self._rebuild_ivf()
+
+    def _rebuild_ivf(self) -> None:
+        """
+        Reconstruit l'index IVF sans bloquer la recherche : k-means sur les `size`
+        premières lignes (jamais réécrites, les ajouts vont au-delà), puis échange
+        sous le verrou en affectant les vecteurs arrivés pendant la construction.
+        """
+        with self._lock:
+            vectors, size = self._vectors, self.size
+            self._ivf_building = True
+        try:
+            centroids, lists = self._build_ivf(vectors, size)
+            with self._lock:
+                if self.size > size:
+                    added = self._vectors[size:self.size].astype(np.float32)
+                    for offset, cluster in enumerate(np.argmax(added @ centroids.T, axis=1)):
+                        lists[cluster].append(size + offset)
+                self._centroids = centroids
+                self._lists = lists
+                self._ivf_built_at = size
+        finally:
+            self._ivf_building = False
+
+    def _build_ivf(self, vectors: np.ndarray, size: int, iterations: int = 10, seed: int = 0):
+        """
+        k-means sphérique sur un échantillon, puis affectation de tous les vecteurs
+        Returns:
+            tuple: (centroïdes, listes d'ids par centroïde)
+        """
+        start = time()
+        n_lists = max(1, int(np.sqrt(size)))
+        rng = np.random.default_rng(seed)
+        sample_ids = rng.choice(size, size=min(size, n_lists * 40), replace=False)
+        sample = vectors[sample_ids].astype(np.float32)
+
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+
+        lists = [[] for _ in range(n_lists)]
+        for block_start in range(0, size, self.block_size):
+            block = vectors[block_start:min(size, block_start + self.block_size)].astype(np.float32)
+            for offset, cluster in enumerate(np.argmax(block @ centroids.T, axis=1)):
+                lists[cluster].append(block_start + offset)
+
+        print(f"🧠 Index IVF : {n_lists} listes pour {size} souvenirs ({(time() - start) * 1000:.0f} ms)")
+        return centroids, lists
+
+    # --- recherche --------------------------------------------------------
+
+    def search_vector(self, query: np.ndarray, k: int = 3) -> List[tuple]:
+        """
+        Returns:
+            list: [(score cosinus, entrée)] du plus au moins proche
+        """
+        query = _normalize(np.asarray(query, dtype=np.float32).ravel())
+        with self._lock:
+            if self.size == 0:
+                return []
+
+            if self._centroids is not None:
+                probe = _top_k(self._centroids @ query, self.nprobe)
+                ids = np.fromiter((i for c in probe for i in self._lists[c]), dtype=np.int64)
+                if len(ids) == 0:
+                    return []
+                scores = self._vectors[ids].astype(np.float32) @ query
+                best = _top_k(scores, k)
+                return [(float(scores[b]), self.entries[ids[b]]) for b in best]
+
+            scores = np.empty(self.size, dtype=np.float32)
+            for block_start in range(0, self.size, self.block_size):
+                block_end = min(self.size, block_start + self.block_size)
+                scores[block_start:block_end] = self._vectors[block_start:block_end].astype(np.float32) @ query
+            best = _top_k(scores, k)
+            return [(float(scores[b]), self.entries[b]) for b in best]
+
+    def search(self, text: str, k: int = 3, min_score: float = 0.0) -> List[tuple]:
+        """Souvenirs les plus proches d'un texte"""
+        if self.size == 0:
+            return []
+        results = self.search_vector(self.embed([text])[0], k)
+        return [(score, entry) for score, entry in results if score >= min_score]
@@ -0,0 +1,198 @@
+"""
+Faux serveur Ollama pour tester la chaîne LLM sans modèle.
+
+Répond à POST /api/chat en rejouant des réponses prédéfinies, token par token,
+au format NDJSON d'Ollama, à une vitesse réglable. Une déconnexion du client
+interrompt la réponse (comme Ollama) et est comptabilisée.
+
+    python -m utils.llm.stub_server [--port 11435] [--tps 30] [--first-token 0.3]
+    python -m utils.llm.stub_server --load-test 8 [--concurrency 4]
+"""
+
+import argparse
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle
+from time import sleep, time
+
+DEFAULT_PORT = 11435
+
+CANNED_RESPONSES = [
+    "Salut ! Ça fait plaisir de te voir. Tu as passé une bonne journée ?",
+    "Hmm, bonne question. Je pense que ça dépend du contexte. Tu peux m'en dire plus ?",
+    "Haha, j'adore ! Raconte-moi la suite, je suis toute ouïe.",
+    "Oh non, je suis désolée d'entendre ça. Si tu veux en parler, je suis là.",
+]
+
+
+def tokenize(text: str) -> list[str]:
+    """Découpe grossière en tokens (mots avec leur espace, ponctuation)"""
+    return re.findall(r"\s*\w+|\s*[^\w\s]", text)
+
+
+class StubState:
+    """Réglages et compteurs partagés entre les threads du serveur"""
+
+    def __init__(self, tokens_per_second: float = 30.0, first_token_delay: float = 0.3, responses=None):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_delay = first_token_delay
+        self._responses = cycle(responses or CANNED_RESPONSES)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.aborted = 0
+
+    def next_response(self) -> str:
+        with self._lock:
+            return next(self._responses)
+
+    def count(self, field: str, delta: int = 1) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + delta)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, comme Ollama
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _chunk(self, data: dict) -> None:
+        line = (json.dumps(data) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        model = request.get("model", "stub")
+        stream = request.get("stream", True)
+        tokens = tokenize(self.state.next_response())
+        delay = 1.0 / self.state.tokens_per_second if self.state.tokens_per_second > 0 else 0.0
+
+        def message(content: str, done: bool) -> dict:
+            return {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+
+        final = {
+            "done_reason": "stop",
+            "prompt_eval_count": sum(len(m.get("content", "")) // 4 for m in request.get("messages", [])),
+            "eval_count": len(tokens),
+        }
+
+        self.state.count("active")
+        start = time()
+        try:
+            sleep(self.state.first_token_delay)
+            if not stream:
+                sleep(delay * len(tokens))
+                body = json.dumps({**message("".join(tokens), True), **final,
+                                   "total_duration": int((time() - start) * 1e9)}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self.state.count("completed")
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                self._chunk(message(token, False))
+                sleep(delay)
+            self._chunk({**message("", True), **final, "total_duration": int((time() - start) * 1e9)})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            self.state.count("completed")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client parti (annulation) : on arrête de « générer »
+            self.state.count("aborted")
+            self.close_connection = True
+        finally:
+            self.state.count("active", -1)
+
+
+def serve(port: int = DEFAULT_PORT, tokens_per_second: float = 30.0, first_token_delay: float = 0.3,
+          responses=None, background: bool = False):
+    """
+    Démarre le faux serveur.
+    Returns:
+        tuple: (serveur, état) si background, sinon bloque
+    """
+    state = StubState(tokens_per_second, first_token_delay, responses)
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, state
+
+    print(f"🧪 Faux serveur Ollama sur http://127.0.0.1:{port} ({tokens_per_second} tokens/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+async def load_test(host: str, requests: int, concurrency: int, cancel_after: float = 0.0) -> None:
+    """Lance `requests` générations (dont une sur deux annulée si cancel_after > 0)"""
+    import asyncio
+    from utils.llm.async_client import AsyncLLMClient
+
+    messages = [{"role": "user", "content": "Salut !"}]
+    async with AsyncLLMClient("stub", host=host, max_concurrency=concurrency) as client:
+        async def one(i: int):
+            return await client.chat(messages)
+
+        tasks = [asyncio.create_task(one(i)) for i in range(requests)]
+        if cancel_after > 0:
+            await asyncio.sleep(cancel_after)
+            for task in tasks[::2]:
+                task.cancel()
+
+        start = time()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time() - start
+        done = sum(isinstance(r, str) for r in results)
+        print(f"📊 {done}/{requests} réponses en {elapsed:.2f}s ({client.stats.tokens / elapsed:.0f} tokens/s)")
+        print(f"📊 {client.stats.summary()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Faux serveur Ollama (/api/chat)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tps", type=float, default=30.0, help="tokens par seconde")
+    parser.add_argument("--first-token", type=float, default=0.3, help="délai avant le premier token (s)")
+    parser.add_argument("--load-test", type=int, default=0, metavar="N", help="lancer N requêtes puis quitter")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cancel-after", type=float, default=0.0, help="annuler une requête sur deux après (s)")
+    args = parser.parse_args()
+
+    if args.load_test:
+        import asyncio
+
+        server, state = serve(args.port, args.tps, args.first_token, background=True)
+        asyncio.run(load_test(f"http://127.0.0.1:{args.port}", args.load_test, args.concurrency, args.cancel_after))
+        sleep(0.2)
+        print(f"🧪 Serveur : {state.completed} terminées, {state.aborted} interrompues")
+        server.shutdown()
+    else:
+        serve(args.port, args.tps, args.first_token)
@@ -1,34 +1,172 @@
 import ollama
+import threading
+from dataclasses import dataclass
+from time import time
+from typing import Callable, Optional
 from utils.llm.memory_manager import MemoryManager
+from utils.llm.conversation_store import ConversationStore, DEFAULT_PATH
+from utils.llm.semantic_memory import SemanticMemory
+from utils import SentenceSegmenter
+
+
+@dataclass
+class PromptStats:
+    """Coût d'évaluation du prompt rapporté par Ollama (prompt_eval_*)"""
+    turns: int = 0
+    tokens: int = 0
+    duration: float = 0.0  # secondes
+    last_tokens: int = 0
+    last_duration: float = 0.0
+
+    def record(self, response) -> None:
+        """Relève prompt_eval_count / prompt_eval_duration d'une réponse (dernier chunk en stream)"""
+        count = response.get('prompt_eval_count')
+        if count is None:
+            return
+        self.turns += 1
+        self.last_tokens = count
+        self.last_duration = (response.get('prompt_eval_duration') or 0) / 1e9
+        self.tokens += count
+        self.duration += self.last_duration
+
+    def mean_duration(self) -> float:
+        return self.duration / self.turns if self.turns else 0.0
+
+    def summary(self) -> str:
+        return (f"prompt évalué : {self.last_tokens} tokens en {self.last_duration * 1000:.0f} ms "
+                f"(moyenne {self.mean_duration() * 1000:.0f} ms sur {self.turns} tours)")
+
 
 class OllamaChat:
-    def __init__(self, model_name: str, max_turns: int = 20):
+    def __init__(self, model_name: str, max_turns: int = 20, user_name: Optional[str] = None,
+                 keep_alive: str = "10m", max_tokens: int = 2048, summarize: bool = True,
+                 session: Optional[str] = None, store_path: str = DEFAULT_PATH,
+                 semantic_memory: Optional[SemanticMemory] = None, recall_k: int = 3,
+                 recall_min_score: float = 0.5, summary_model: Optional[str] = None):
         """
         Initialise le chat avec un modèle Ollama
         
         Args:
             model_name: Nom du modèle dans Ollama
             max_turns: Nombre maximum de tours à retenir en mémoire
+            user_name: Si fourni, utilise le prompt de personnalité (prompter) avec
+                       un préfixe stable réutilisable par le cache du serveur
+            keep_alive: Durée pendant laquelle Ollama garde le modèle (et son cache) chargé
+            max_tokens: Budget de tokens de l'historique
+            summarize: Résume en arrière-plan les tours sortis de la fenêtre
+            session: Si fourni, la conversation est sauvegardée sur disque
+                     et reprise au prochain lancement avec la même session
+            store_path: Fichier SQLite des conversations
+            semantic_memory: Index des anciens échanges ; les `recall_k` souvenirs les plus
+                             proches du message (score >= recall_min_score) sont ajoutés au contexte
+            summary_model: Modèle Ollama des résumés en arrière-plan (None = model_name) ;
+                           un petit modèle évite de concurrencer la conversation
         """
         self.model_name = model_name
-        self.memory = MemoryManager(max_turns=max_turns)
+        self.summary_model = summary_model or model_name
+        self.keep_alive = keep_alive
+        self.store = ConversationStore(store_path) if session is not None else None
+        self.memory = MemoryManager(max_turns=max_turns, max_tokens=max_tokens,
+                                    summarizer=self.summarize_turns if summarize else None,
+                                    store=self.store, session=session)
+        self.user_name = user_name
+        self.prompt_stats = PromptStats()
+        self.semantic_memory = semantic_memory
+        self.recall_k = recall_k
+        self.recall_min_score = recall_min_score
+        self._cancel = threading.Event()
+    
+    def cancel(self):
+        """Arrête la génération en cours (l'utilisateur a repris la parole) : plus aucune phrase n'est envoyée"""
+        self._cancel.set()
+    
+    def summarize_turns(self, previous_summary: str, messages: list) -> str:
+        """Intègre des messages oubliés au résumé de la conversation (appelé hors du chemin critique)"""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        prompt = (
+            "Mets à jour le résumé d'une conversation avec les nouveaux échanges. "
+            "Garde les faits importants (prénoms, goûts, événements, émotions), en 5 phrases maximum. "
+            "Réponds uniquement avec le résumé.\n\n"
+            f"Résumé actuel : {previous_summary or '(vide)'}\n\n"
+            f"Nouveaux échanges :\n{transcript}"
+        )
+        response = ollama.chat(
+            model=self.summary_model,
+            messages=[{'role': 'user', 'content': prompt}],
+            stream=False,
+            keep_alive=self.keep_alive
+        )
+        summary = response['message']['content']
+        if self.semantic_memory is not None:
+            self.semantic_memory.add([summary], kind='summary', session=self.memory.session)
+        return summary
+    
+    def recall(self, user_message: str, history: list) -> Optional[dict]:
+        """Souvenirs pertinents absents de la fenêtre actuelle, sous forme de message système"""
+        if self.semantic_memory is None:
+            return None
+        try:
+            results = self.semantic_memory.search(user_message, self.recall_k * 2, self.recall_min_score)
+        except Exception as e:
+            print(f"⚠️  Mémoire sémantique indisponible: {e}")
+            return None
+        
+        in_window = {msg['content'] for msg in history}
+        memories = [entry['text'] for _, entry in results
+                    if not any(part in in_window for part in entry.get('parts', []))][:self.recall_k]
+        if not memories:
+            return None
+        return {'role': 'system',
+                'content': "Souvenirs d'anciennes conversations :\n" + "\n".join(f"- {m}" for m in memories)}
+    
+    def _remember(self, user_message: str, response_content: str):
+        """Indexe l'échange en arrière-plan (embedding hors du chemin critique)"""
+        def index():
+            try:
+                self.semantic_memory.add([f"user: {user_message}\nassistant: {response_content}"],
+                                         kind='turn', session=self.memory.session,
+                                         parts=[user_message, response_content])
+            except Exception as e:
+                print(f"⚠️  Indexation du souvenir impossible: {e}")
+        threading.Thread(target=index, daemon=True).start()
+    
+    def build_messages(self, user_message: str, emotion: Optional[str] = None, emotions=None) -> list:
+        """Contexte envoyé au modèle : historique puis message courant en dernier"""
+        history = self.memory.get_context()
+        memories = self.recall(user_message, history)
+        if memories is not None:
+            history = history + [memories]
+        if self.user_name is None:
+            return history + [{'role': 'user', 'content': user_message}]
+        
+        from utils.prompter import build_messages
+        return build_messages(emotion, user_message, history, self.user_name, detected_emotions=emotions)
     
-    def generate_response(self, user_message: str, stream: bool = True) -> str:
+    def generate_response(self, user_message: str, stream: bool = True,
+                          on_sentence: Optional[Callable[[str], None]] = None,
+                          emotion: Optional[str] = None, emotions=None) -> str:
         """
         Génère une réponse avec le modèle
         
         Args:
             user_message: Message de l'utilisateur
             stream: Si True, affiche la réponse en streaming
+            on_sentence: Appelée avec chaque phrase dès qu'elle est terminée
+                         (pendant que la génération continue, mode stream)
+            emotion: Émotion détectée chez l'utilisateur (consignes du tour,
+                     placées après l'historique ; nécessite user_name)
+            emotions: Toutes les émotions détectées (liste ou {label: proba}),
+                      enregistrées dans l'historique des ressentis sans nouvelle détection
             
         Returns:
             Réponse générée par le modèle
         """
+        # Contexte (fenêtre glissante automatique) + message courant en fin de prompt
+        messages = self.build_messages(user_message, emotion, emotions)
+        
         # Ajoute le message utilisateur
         self.memory.add_message('user', user_message)
-        
-        # Récupère le contexte (fenêtre glissante automatique)
-        messages = self.memory.get_context()
+        self._cancel.clear()  # une interruption antérieure visait la réponse précédente
         
         try:
             response_content = ""
@@ -39,26 +177,66 @@ class OllamaChat:
                 stream_response = ollama.chat(
                     model=self.model_name,
                     messages=messages,
-                    stream=True
+                    stream=True,
+                    keep_alive=self.keep_alive
                 )
                 
+                segmenter = SentenceSegmenter() if on_sentence else None
+                start = time()
+                first_sentence_at = None
+                
                 for chunk in stream_response:
+                    if self._cancel.is_set():
+                        stream_response.close()  # ferme la connexion : Ollama arrête de générer
+                        print(" [interrompu]", end="")
+                        break
                     content = chunk['message']['content']
                     print(content, end="", flush=True)
                     response_content += content
+                    if chunk.get('done'):
+                        self.prompt_stats.record(chunk)
+                    
+                    if segmenter:
+                        for sentence in segmenter.feed(content):
+                            if self._cancel.is_set():
+                                break
+                            if first_sentence_at is None:
+                                first_sentence_at = time() - start
+                            on_sentence(sentence)
                 
                 print()
+                
+                if segmenter and not self._cancel.is_set():
+                    for sentence in segmenter.flush():
+                        if first_sentence_at is None:
+                            first_sentence_at = time() - start
+                        on_sentence(sentence)
+                    if first_sentence_at is not None:
+                        print(f"⏱️  Première phrase après {first_sentence_at:.2f}s "
+                              f"(génération complète : {time() - start:.2f}s)")
             else:
                 response = ollama.chat(
                     model=self.model_name,
                     messages=messages,
-                    stream=False
+                    stream=False,
+                    keep_alive=self.keep_alive
                 )
+                self.prompt_stats.record(response)
                 response_content = response['message']['content']
                 print(f"\n🤖 Assistant: {response_content}")
+                
+                if on_sentence:
+                    segmenter = SentenceSegmenter()
+                    for sentence in segmenter.feed(response_content) + segmenter.flush():
+                        on_sentence(sentence)
+            
+            if self.prompt_stats.turns:
+                print(f"📊 {self.prompt_stats.summary()}")
             
             # Ajoute la réponse au contexte
             self.memory.add_message('assistant', response_content)
+            if self.semantic_memory is not None and response_content:
+                self._remember(user_message, response_content)
             
             return response_content
             
@@ -69,6 +247,11 @@ class OllamaChat:
             print(f"\n❌ Erreur inattendue: {e}")
             return ""
     
+    def close(self):
+        """Écrit ce qui reste en file (à appeler avant de quitter si une session est utilisée)"""
+        if self.store is not None:
+            self.store.close()
+    
     def clear_memory(self):
         """Efface la mémoire"""
         self.memory.clear()
@@ -2,60 +2,93 @@ import json
 from pathlib import Path
 from typing import Any, Dict
 
+from utils.manage_model.catalog import missing_files, model_catalog
+
+# Taille de texture visée par pixel de fenêtre (les atlas ne couvrent pas tout le modèle à l'échelle 1)
+TEXTURE_OVERSAMPLE = 1.5
+
 
 class ModelManager:
     """ModelManager.available_models to get current model"""
 
-    _MODEL_PATHS = {
-        "epsilon": "resources/v2/haru/haru.model.json",
-        "haru": "resources/v3/Haru/Haru.model3.json",
-        "hibiki": "resources/v2/hibiki/hibiki.model.json",
-        "kana": "resources/v2/kana/Kobayaxi.model.json",
-        "kasumi2": "resources/v2/kasumi2/kasumi2.model.json",
-        "shizuku": "resources/v2/shizuku/shizuku.model.json",
-        "zer0": "resources/v2/托尔/model0.json",
-        "llny": "resources/v3/llny/llny.model3.json",
-        "mao": "resources/v3/Mao/Mao.model3.json",
-        "nn": "resources/v3/nn/nn.model3.json",
-    }
-    
     @classmethod
-    def available_models(cls) -> str: return cls._MODEL_PATHS.keys()
+    def available_models(cls) -> list: return model_catalog().names()
 
     def __init__(self, name: str = "nn") -> None:
         """
         La liste des noms de modèles disponible -> ModelManager.available_models()
-        Var : 
+        Var :
         - path
         - name
-        - expressions
-        - motions
-        
-        Remarque : 
-            Vous pouvez ajouter votre propre modèle en ajoutant une entrée
-            dans le dictionnaire `_MODEL_PATHS`.
+        - version (2 ou 3)
+        - expressions : [{"Name", "File"}] quel que soit le format du modèle
+        - motions : {groupe: [fichiers]}
+        - textures, texture_sizes
+
+        Remarque :
+            Vous pouvez ajouter votre propre modèle en déposant son dossier
+            dans resources/v2 (Cubism 2) ou resources/v3 (Cubism 3+) : le nom
+            du modèle est celui du dossier, en minuscules.
         """
-        
-        if name not in self._MODEL_PATHS:
-            raise ValueError(
-                f"Modèle inconnu : '{name}'. "
-                f"Modèles disponibles : {', '.join(self._MODEL_PATHS)}"
-            )
 
+        self.entry = model_catalog().get(name)
         self.name = name
-        self.path = Path(self._MODEL_PATHS[name])
+        self.path = Path(self.entry.path)
 
         if not self.path.is_file():
             raise FileNotFoundError(f"Fichier modèle introuvable : {self.path}")
 
-        with self.path.open(encoding="utf-8") as f:
-            self.model_json = json.load(f)
+        self.version = self.entry.version
+        self.expressions = self.entry.expressions
+        self.motions = self.entry.motions
+        self.textures = self.entry.textures
+        self.texture_sizes = self.entry.texture_sizes
+        self._model_json = None
+
+    def path_for(self, width: int, height: int, oversample: float = TEXTURE_OVERSAMPLE) -> Path:
+        """
+        Fichier modèle à charger pour une fenêtre width x height : la plus petite
+        variante précalculée (utils.manage_model.bake) suffisante et complète
+        (textures de baked/<taille>/ présentes), sinon l'original.
+        """
+        needed = max(width, height) * oversample
+        for size, path in self.entry.variants.items():
+            if not needed <= size < self.entry.max_texture_size:
+                continue
+            try:
+                missing = missing_files(Path(path))
+            except (OSError, ValueError) as e:  # fichier absent ou JSON illisible
+                print(f"⚠️ Variante {path} ignorée : {e}")
+                continue
+            if missing:
+                print(f"⚠️ Variante {path} ignorée : {len(missing)} fichier(s) manquant(s), "
+                      f"relancer python -m utils.manage_model.bake")
+                continue
+            return Path(path)
+        return self.path
 
-        self.expressions = self.extract_nested("FileReferences.Expressions")
-        self.motions = self.extract_nested("FileReferences.Motions")
+    def check_loadable(self, engine_version: int) -> None:
+        """
+        Vérifie que le modèle peut être chargé par le moteur live2d importé.
+        Raises:
+            ValueError: modèle incomplet (fichiers manquants) ou d'une autre version Cubism
+        """
+        if self.entry.errors:
+            raise ValueError(f"'{self.name}' incomplet : {self.entry.errors[0]}")
+        if self.version != engine_version:
+            raise ValueError(f"'{self.name}' est un modèle Cubism {self.version}, "
+                             f"non pris en charge par ce moteur")
 
     def __repr__(self) -> str:  return f"<ModelManager name='{self.name}' path='{self.path}'>"
-    
+
+    @property
+    def model_json(self) -> Dict[str, Any]:
+        """JSON brut du modèle, lu seulement si nécessaire"""
+        if self._model_json is None:
+            with self.path.open(encoding="utf-8") as f:
+                self._model_json = json.load(f)
+        return self._model_json
+
     def extract(self, *keys: str) -> Dict[str, Any]: return {k: self.model_json.get(k) for k in keys}
 
     def extract_nested(self, path: str, default: Any = None) -> Any:
@@ -65,4 +98,4 @@ class ModelManager:
                 current = current[part]
             else:
                 return default
-        return current
\ No newline at end of file
+        return current
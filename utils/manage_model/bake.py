@@ -0,0 +1,135 @@
+"""
+Précalcul de textures réduites pour les modèles Live2D.
+
+Pour chaque modèle et chaque taille demandée (plus petite que ses textures),
+génère :
+- <dossier du modèle>/baked/<taille>/<chemin d'origine> : textures réduites
+  (dimensions en puissances de deux conservées, donc compatibles mipmaps,
+  réduction en alpha prémultiplié pour éviter les franges sombres) ;
+- <dossier du modèle>/<nom>.baked<taille>.model(3).json : copie du fichier
+  modèle dont seules les textures sont redirigées ; moc, expressions et
+  motions restent partagés avec l'original.
+
+ModelManager.path_for(largeur, hauteur) choisit ensuite la variante adaptée
+à la fenêtre.
+
+    python -m utils.manage_model.bake [modèle ...] [--sizes 512 1024] [--force]
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+from time import time
+from typing import List, Optional
+
+import numpy as np
+
+from utils.manage_model.catalog import BAKED_MARKER, ModelEntry, model_catalog
+
+DEFAULT_SIZES = (512, 1024)
+BAKED_DIR = "baked"
+
+
+def baked_model_path(entry: ModelEntry, size: int) -> Path:
+    model_file = Path(entry.path)
+    stem = model_file.name.split(".")[0]
+    return model_file.with_name(f"{stem}{BAKED_MARKER}{size}{model_file.name[len(stem):]}")
+
+
+def downscale(image: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Réduction par moyenne de zones ; l'alpha est prémultiplié pendant le calcul"""
+    import cv2
+
+    if image.ndim == 3 and image.shape[2] == 4:
+        alpha = image[..., 3:4].astype(np.float32) / 255.0
+        premultiplied = np.concatenate([image[..., :3].astype(np.float32) * alpha, alpha * 255.0], axis=2)
+        small = cv2.resize(premultiplied, (width, height), interpolation=cv2.INTER_AREA)
+        small_alpha = small[..., 3:4] / 255.0
+        color = np.where(small_alpha > 0, small[..., :3] / np.maximum(small_alpha, 1e-6), 0)
+        return np.clip(np.concatenate([color, small[..., 3:4]], axis=2) + 0.5, 0, 255).astype(np.uint8)
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def _is_fresh(entry: ModelEntry, target: Path) -> bool:
+    if not target.is_file():
+        return False
+    sources = [Path(entry.path)] + [entry.directory / t for t in entry.textures]
+    newest = max(p.stat().st_mtime for p in sources if p.is_file())
+    return target.stat().st_mtime >= newest
+
+
+def bake_model(entry: ModelEntry, size: int, force: bool = False) -> Optional[Path]:
+    """
+    Génère la variante `size` d'un modèle.
+    Returns:
+        Path: fichier modèle réécrit, ou None si les textures sont déjà assez petites
+    """
+    import cv2
+
+    if entry.max_texture_size <= size:
+        return None
+    target = baked_model_path(entry, size)
+    if not force and _is_fresh(entry, target):
+        return target
+
+    base = entry.directory
+    textures = []
+    for texture, dims in zip(entry.textures, entry.texture_sizes):
+        if not dims or max(dims) <= size:
+            textures.append(texture)  # déjà assez petite : partagée avec l'original
+            continue
+        width, height = dims
+        factor = size / max(width, height)
+        image = cv2.imread(str(base / texture), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise FileNotFoundError(f"Texture illisible : {base / texture}")
+        small = downscale(image, max(1, round(width * factor)), max(1, round(height * factor)))
+
+        relative = Path(BAKED_DIR) / str(size) / texture
+        os.makedirs(base / relative.parent, exist_ok=True)
+        cv2.imwrite(str(base / relative), small)
+        textures.append(relative.as_posix())
+
+    with open(entry.path, encoding="utf-8") as f:
+        model_json = json.load(f)
+    if entry.version == 3:
+        model_json["FileReferences"]["Textures"] = textures
+    else:
+        model_json["textures"] = textures
+
+    tmp_path = target.with_name(target.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(model_json, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, target)
+    return target
+
+
+def bake(names: Optional[List[str]] = None, sizes=DEFAULT_SIZES, force: bool = False) -> None:
+    catalog = model_catalog()
+    for name in names or catalog.names():
+        entry = catalog.get(name)
+        if entry.errors:
+            print(f"⏭️ {name} ignoré (modèle incomplet)")
+            continue
+        for size in sizes:
+            start = time()
+            target = bake_model(entry, size, force)
+            if target is None:
+                print(f"  {name} {size}px : textures d'origine déjà ≤ {size}px")
+            else:
+                print(f"✓ {name} {size}px -> {target} ({(time() - start) * 1000:.0f} ms)")
+    catalog.scan()  # enregistrer les nouvelles variantes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Précalcule des textures réduites pour les modèles Live2D")
+    parser.add_argument("models", nargs="*", help="modèles à traiter (tous par défaut)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--force", action="store_true", help="régénérer même si la variante est à jour")
+    args = parser.parse_args()
+    bake(args.models, args.sizes, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Catalogue des modèles Live2D présents dans resources/v2 et resources/v3.
+
+Les fichiers modèle Cubism 2 (*.model.json : "textures", "expressions"...) et
+Cubism 3+ (*.model3.json : "FileReferences") sont ramenés à un même format :
+expressions [{"Name", "File"}], motions {groupe: [fichiers]}, textures et
+leurs dimensions. Les fichiers référencés mais absents sont signalés.
+
+L'index est sauvegardé dans model_index.json et invalidé par les dates de
+modification (dossiers de modèles, fichiers modèle, moc et textures, et
+sous-dossiers des fichiers référencés) : au démarrage, seuls les modèles
+modifiés sont relus.
+
+    python -m utils.manage_model.catalog   # liste et vérifie les modèles
+"""
+
+import json
+import os
+import struct
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import time
+from typing import Dict, List, Optional
+
+RESOURCES_DIR = "resources"
+INDEX_FILE = "model_index.json"
+INDEX_VERSION = 3
+
+# Fichiers modèle réécrits par utils.manage_model.bake : <nom>.baked<taille>.model(3).json
+BAKED_MARKER = ".baked"
+
+# Noms historiques dont le dossier ne donne pas le nom
+ALIASES = {
+    "zer0": "托尔",
+}
+
+
+@dataclass
+class ModelEntry:
+    name: str
+    path: str  # fichier modèle, relatif au dossier courant
+    version: int  # 2 (Cubism 2) ou 3 (Cubism 3+)
+    mtime: float
+    expressions: List[dict] = field(default_factory=list)  # [{"Name": ..., "File": ...}]
+    motions: Dict[str, List[str]] = field(default_factory=dict)
+    textures: List[str] = field(default_factory=list)
+    texture_sizes: List[tuple] = field(default_factory=list)  # (largeur, hauteur) par texture
+    size_bytes: int = 0  # fichiers référencés (moc, textures, expressions, motions...)
+    errors: List[str] = field(default_factory=list)
+    variants: Dict[int, str] = field(default_factory=dict)  # taille max de texture -> fichier modèle précalculé
+    dependencies: Dict[str, float] = field(default_factory=dict)  # moc, textures, dossiers référencés -> mtime
+
+    @property
+    def directory(self) -> Path:
+        return Path(self.path).parent
+
+    @property
+    def max_texture_size(self) -> int:
+        return max((max(size) for size in self.texture_sizes if size), default=0)
+
+
+def png_size(path: Path) -> Optional[tuple]:
+    """Dimensions d'un PNG lues dans l'en-tête IHDR (sans décoder l'image)"""
+    try:
+        with path.open("rb") as f:
+            header = f.read(24)
+    except OSError:
+        return None
+    if len(header) < 24 or header[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+def _normalize(data: dict) -> dict:
+    """Champs communs aux schémas Cubism 2 et 3"""
+    if "FileReferences" in data:
+        refs = data["FileReferences"]
+        return {
+            "version": 3,
+            "moc": refs.get("Moc"),
+            "textures": refs.get("Textures") or [],
+            "expressions": [{"Name": e.get("Name"), "File": e.get("File")} for e in refs.get("Expressions") or []],
+            "motions": {group: [m.get("File") for m in items or [] if m.get("File")]
+                        for group, items in (refs.get("Motions") or {}).items()},
+            "others": [refs.get(k) for k in ("Physics", "Pose", "DisplayInfo", "UserData") if refs.get(k)],
+        }
+    return {
+        "version": 2,
+        "moc": data.get("model"),
+        "textures": data.get("textures") or [],
+        "expressions": [{"Name": e.get("name"), "File": e.get("file")} for e in data.get("expressions") or []],
+        "motions": {group: [m.get("file") for m in items or [] if m.get("file")]
+                    for group, items in (data.get("motions") or {}).items()},
+        "others": [data.get(k) for k in ("physics", "pose") if data.get(k)],
+    }
+
+
+def _references(model_file: Path) -> List[Path]:
+    with Path(model_file).open(encoding="utf-8") as f:
+        data = _normalize(json.load(f))
+    relative = [data["moc"], *data["textures"], *(e["File"] for e in data["expressions"]),
+                *(m for files in data["motions"].values() for m in files), *data["others"]]
+    base = Path(model_file).parent
+    return [base / r for r in relative if r]
+
+
+def referenced_files(model_file: Path) -> List[Path]:
+    """Fichiers chargés avec un modèle (moc, textures, expressions, motions, physique...)"""
+    return [path for path in _references(model_file) if path.is_file()]
+
+
+def missing_files(model_file: Path) -> List[Path]:
+    """Fichiers référencés par un modèle mais absents du disque"""
+    return [path for path in _references(model_file) if not path.is_file()]
+
+
+def _mtimes(paths) -> Dict[str, float]:
+    """Dates de modification (-1 si le fichier ou dossier a disparu)"""
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime
+        except OSError:
+            mtimes[path] = -1.0
+    return mtimes
+
+
+def _find_model_file(directory: Path, version: int) -> Optional[Path]:
+    pattern = "*.model3.json" if version == 3 else "*.model.json"
+    candidates = sorted(p for p in directory.glob(pattern) if BAKED_MARKER not in p.name)
+    if candidates:
+        return candidates[0]
+    if version == 2:
+        # certains exports Cubism 2 n'utilisent pas l'extension .model.json
+        for candidate in sorted(directory.glob("*.json")):
+            if BAKED_MARKER in candidate.name:
+                continue
+            try:
+                with candidate.open(encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(data, dict) and "model" in data and "textures" in data:
+                return candidate
+    return None
+
+
+def _parse_entry(name: str, model_file: Path) -> ModelEntry:
+    entry = ModelEntry(name=name, path=model_file.as_posix(), version=0, mtime=model_file.stat().st_mtime)
+    try:
+        with model_file.open(encoding="utf-8") as f:
+            data = _normalize(json.load(f))
+    except (OSError, json.JSONDecodeError) as e:
+        entry.errors.append(f"fichier modèle illisible : {e}")
+        return entry
+
+    base = model_file.parent
+    entry.version = data["version"]
+    entry.expressions = data["expressions"]
+    entry.motions = data["motions"]
+    entry.textures = data["textures"]
+
+    watched = set()
+
+    def check(relative: Optional[str], kind: str) -> None:
+        if not relative:
+            return
+        path = base / relative
+        # dossier existant le plus proche (ex. hibiki.2048/) : un fichier ajouté ou retiré change sa date
+        parent = path.parent
+        while parent != base and not parent.is_dir() and base in parent.parents:
+            parent = parent.parent
+        if parent != base:
+            watched.add(parent.as_posix())
+        if path.is_file():
+            entry.size_bytes += path.stat().st_size
+            if kind in ("moc", "texture"):
+                watched.add(path.as_posix())  # remplacés sur place sans changer le dossier
+        else:
+            entry.errors.append(f"{kind} introuvable : {relative}")
+
+    if not data["moc"]:
+        entry.errors.append("aucun fichier moc déclaré")
+    check(data["moc"], "moc")
+    for texture in entry.textures:
+        check(texture, "texture")
+        entry.texture_sizes.append(png_size(base / texture))
+    for expression in entry.expressions:
+        check(expression["File"], "expression")
+    for files in entry.motions.values():
+        for motion in files:
+            check(motion, "motion")
+    for other in data["others"]:
+        check(other, "fichier")
+
+    stem = model_file.name.split(".")[0]
+    for variant in base.glob(f"{stem}{BAKED_MARKER}*.json"):
+        size = variant.name[len(stem) + len(BAKED_MARKER):].split(".")[0]
+        if size.isdigit() and variant.stat().st_mtime >= entry.mtime:  # ignorer les variantes périmées
+            entry.variants[int(size)] = variant.as_posix()
+    entry.variants = dict(sorted(entry.variants.items()))
+    entry.dependencies = _mtimes(sorted(watched))
+    return entry
+
+
+class ModelCatalog:
+    """
+    Args:
+        root: dossier contenant v2/ et v3/
+        index_path: fichier d'index (None = pas de persistance)
+    """
+
+    def __init__(self, root: str = RESOURCES_DIR, index_path: Optional[str] = INDEX_FILE):
+        self.root = Path(root)
+        self.index_path = index_path
+        self.entries: Dict[str, ModelEntry] = {}
+        self._dir_mtimes: Dict[str, float] = {}
+        self.rescanned = 0
+
+        start = time()
+        if not self._load_index():
+            self.scan()
+        print(f"📚 {len(self.entries)} modèles au catalogue ({(time() - start) * 1000:.0f} ms, "
+              f"{self.rescanned} relus)")
+
+    # --- index ------------------------------------------------------------
+
+    def _model_dirs(self) -> Dict[str, int]:
+        """Dossiers de modèles -> version Cubism"""
+        dirs = {}
+        for version in (2, 3):
+            version_dir = self.root / f"v{version}"
+            if not version_dir.is_dir():
+                continue
+            for directory in sorted(version_dir.iterdir()):
+                if directory.is_dir() and not directory.name.startswith(("_", ".")):
+                    dirs[directory.as_posix()] = version
+        return dirs
+
+    def _container_mtimes(self) -> Dict[str, float]:
+        """Dates des dossiers v2/, v3/ et de chaque dossier de modèle (ajout/suppression de fichiers)"""
+        mtimes = {}
+        for version in (2, 3):
+            version_dir = self.root / f"v{version}"
+            if version_dir.is_dir():
+                mtimes[version_dir.as_posix()] = version_dir.stat().st_mtime
+        for directory in self._model_dirs():
+            mtimes[directory] = os.stat(directory).st_mtime
+        return mtimes
+
+    def _load_index(self) -> bool:
+        if not self.index_path or not os.path.isfile(self.index_path):
+            return False
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if index.get("version") != INDEX_VERSION or index.get("root") != self.root.as_posix():
+            return False
+        if index["dirs"] != self._container_mtimes():
+            return False  # modèle ajouté, supprimé ou fichiers déplacés : tout rescanner
+
+        changed = False
+        for name, data in index["entries"].items():
+            entry = ModelEntry(**{**data, "texture_sizes": [tuple(s) if s else None for s in data["texture_sizes"]],
+                                  "variants": {int(k): v for k, v in data["variants"].items()}})
+            path = Path(entry.path)
+            if not path.is_file():
+                return False
+            if path.stat().st_mtime != entry.mtime or _mtimes(entry.dependencies) != entry.dependencies:
+                entry = _parse_entry(name, path)
+                self.rescanned += 1
+                changed = True
+            self.entries[name] = entry
+        self._dir_mtimes = index["dirs"]
+        if changed:
+            self._save_index()
+        return True
+
+    def _save_index(self) -> None:
+        if not self.index_path:
+            return
+        index = {
+            "version": INDEX_VERSION,
+            "root": self.root.as_posix(),
+            "dirs": self._dir_mtimes,
+            "entries": {name: asdict(entry) for name, entry in self.entries.items()},
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def scan(self) -> None:
+        """Relit tous les modèles et réécrit l'index"""
+        aliases = {folder: alias for alias, folder in ALIASES.items()}
+        entries: Dict[str, ModelEntry] = {}
+        # v3 en dernier : en cas de nom identique (haru), le modèle Cubism 3 garde le nom court
+        for directory, version in self._model_dirs().items():
+            directory = Path(directory)
+            model_file = _find_model_file(directory, version)
+            if model_file is None:
+                continue
+            name = aliases.get(directory.name, directory.name.lower())
+            if name in entries:
+                previous = entries.pop(name)
+                previous.name = f"{name}-v{previous.version}"
+                entries[previous.name] = previous
+            entries[name] = _parse_entry(name, model_file)
+            self.rescanned += 1
+
+        self.entries = dict(sorted(entries.items()))
+        self._dir_mtimes = self._container_mtimes()
+        self._save_index()
+
+    # --- requêtes ---------------------------------------------------------
+
+    def names(self) -> List[str]:
+        return list(self.entries)
+
+    def get(self, name: str) -> ModelEntry:
+        try:
+            return self.entries[name]
+        except KeyError:
+            raise ValueError(
+                f"Modèle inconnu : '{name}'. "
+                f"Modèles disponibles : {', '.join(self.entries)}"
+            ) from None
+
+    def broken(self) -> Dict[str, List[str]]:
+        return {name: entry.errors for name, entry in self.entries.items() if entry.errors}
+
+    def report(self) -> None:
+        """Signale les modèles incomplets (à appeler au démarrage)"""
+        for name, errors in self.broken().items():
+            shown = ", ".join(errors[:3]) + (f" (+{len(errors) - 3})" if len(errors) > 3 else "")
+            print(f"⚠️ Modèle '{name}' incomplet : {shown}")
+
+
+_catalog: Optional[ModelCatalog] = None
+
+
+def model_catalog() -> ModelCatalog:
+    """Catalogue partagé, construit (et vérifié) au premier appel"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ModelCatalog()
+        _catalog.report()
+    return _catalog
+
+
+def main() -> None:
+    catalog = model_catalog()
+    for name, entry in catalog.entries.items():
+        textures = ", ".join(f"{w}x{h}" for w, h in filter(None, entry.texture_sizes)) or "?"
+        status = "OK" if not entry.errors else f"{len(entry.errors)} erreur(s)"
+        print(f"{name:12s} v{entry.version}  {len(entry.expressions):3d} expressions  "
+              f"{sum(map(len, entry.motions.values())):3d} motions  textures {textures:24s} "
+              f"{entry.size_bytes / 1e6:6.1f} Mo  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ import math
 import time
 import threading
 import queue
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Optional, ClassVar
 import os
 
@@ -16,10 +17,18 @@ from live2d.v3 import StandardParams
 from live2d.utils.lipsync import WavHandler
 
 from utils.manage_model import ModelManager
-from utils.emotion.get_emotion import corresp_emotion
+from utils.manage_model.catalog import model_catalog, referenced_files
+from utils.emotion.get_emotion import analyse_texte
+from utils.emotion.expression_index import ExpressionController, expression_index
+from utils.config_manager import filler_latency_threshold
 from utils import lenght_to_duration
 
-from speech.TTS import init_model_TTS, synthesize_audio
+from speech.TTS import init_model_TTS, synthesize_audio, voice_name, CancelToken, SynthesisCancelled
+from speech.filler_bank import FillerBank, FillerClip, compute_envelope, ENVELOPE_FPS
+from speech.echo_gate import playback_timeline
+from utils.frame_pacing import FrameClock, FixedTimestep, FrameStats, Wakeup
+from utils.overlay import OverlayCompositor
+from utils.scene import Scene, AvatarCost
 
 @dataclass
 class ViewConfig:
@@ -27,7 +36,25 @@ class ViewConfig:
     width: int = 500
     height: int = 600
     title: str = "Live2D Viewer"
-    frame_delay: int = 10
+    target_fps: int = 60
+    idle_fps: int = 30  # au repos (pas de parole ni d'interaction)
+    update_hz: int = 60  # pas fixe des mises à jour (modèle Live2D, animations du viewer)
+    subtitles: bool = False  # afficher le texte prononcé
+    legacy_overlay: bool = False  # ancien rendu du label (glDrawPixels), pour comparaison
+    headless: bool = False  # rendu hors écran (voir utils.headless)
+    headless_backend: str = "egl"  # "egl", "osmesa" ou "hidden"
+    max_frames: Optional[int] = None  # arrêt automatique (benchmarks)
+    dump_dir: Optional[str] = None  # dossier où écrire des frames (mode headless)
+    dump_every: int = 30
+    output_video: Optional[str] = None  # fichier ou URL envoyé à ffmpeg
+    output_shm: Optional[str] = None  # nom de l'anneau de frames en mémoire partagée
+    render_scale: float = 1.0  # résolution interne du modèle (1.0 = rendu direct, sans framebuffer)
+    dynamic_resolution: bool = False  # ajuster render_scale pour tenir target_fps
+    min_render_scale: float = 0.5
+    max_render_scale: float = 1.0
+    texture_oversample: float = 1.5  # taille de texture par pixel de fenêtre (variantes précalculées)
+    warm_models: int = 1  # modèles récents gardés chargés (retour instantané)
+    expression_blend: bool = False  # mélange pondéré des expressions (sinon la dominante seule)
     background_color: tuple[float, float, float, float] = (1.0, 0.0, 0.0, 0.0)
 
 
@@ -49,6 +76,8 @@ class TTSRequest:
     emotion_id: Optional[str] = None
     priority: bool = False
     timestamp: float = 0.0
+    token: CancelToken = field(default_factory=CancelToken)
+    epoch: int = 0  # cancel_all() déjà passés à la soumission
 
 
 class TTSProcessor:
@@ -60,12 +89,16 @@ class TTSProcessor:
     - Retourne le tout ensemble
     """
     
-    def __init__(self, tts_model):
+    def __init__(self, tts_model, on_result=None):
         self.tts_model = tts_model
+        self.on_result = on_result  # appelé (depuis le worker) quand un résultat est prêt
         self.request_queue = queue.Queue()
         self.result_queue = queue.Queue()
         self.worker_thread = None
         self.running = False
+        self._in_flight: Optional[TTSRequest] = None
+        self._lock = threading.Lock()  # _in_flight et _epoch, partagés avec cancel_all()
+        self._epoch = 0
         
     def start(self):
         """Démarre le thread de traitement."""
@@ -100,22 +133,33 @@ class TTSProcessor:
                 if request is None:
                     break
                 
+                # Publier la requête avant tout travail : une requête sortie de la file
+                # mais pas encore publiée échapperait à cancel_all()
+                with self._lock:
+                    if request.epoch != self._epoch:
+                        request.token.cancel()  # cancel_all() passé entre get() et ici
+                    if request.token.is_cancelled():
+                        continue
+                    self._in_flight = request
+                
                 print(f"[TTSProcessor] Traitement: '{request.text}'")
                 
                 try:
-                    # Génération de l'audio
+                    # Génération de l'audio (interrompue si le jeton est annulé)
                     audio_path = self._text_to_file_path(request.text)
                     audio, duration = synthesize_audio(
                         self.tts_model, 
                         request.text, 
-                        audio_path
+                        audio_path,
+                        cancel_token=request.token
                     )
                     
-                    # Détection de l'émotion si nécessaire
-                    if request.emotion_id is None:
-                        emotion_id = corresp_emotion(request.text)
-                    else:
-                        emotion_id = request.emotion_id
+                    if request.token.is_cancelled():
+                        raise SynthesisCancelled(request.text)
+                    
+                    # Détection de l'émotion si nécessaire (vecteur complet : mélange possible)
+                    emotion_id = request.emotion_id
+                    emotions = analyse_texte(request.text) if emotion_id is None else None
                     
                     # Résultat complet
                     self.result_queue.put({
@@ -124,11 +168,21 @@ class TTSProcessor:
                         'audio_path': audio_path,
                         'duration': duration,
                         'emotion_id': emotion_id,
+                        'emotions': emotions,
+                        'envelope': compute_envelope(audio_path),  # référence pour le filtrage d'écho
+                        'request_timestamp': request.timestamp,
                         'timestamp': time.time()
                     })
                     
+                    if emotions:
+                        emotion_id = max(emotions, key=emotions.get)
                     print(f"[TTSProcessor] Terminé: audio={audio_path}, émotion={emotion_id}, durée={duration:.2f}s")
+                    if self.on_result:
+                        self.on_result()
                     
+                except SynthesisCancelled:
+                    print(f"[TTSProcessor] Annulé: '{request.text}'")
+                
                 except Exception as e:
                     print(f"[TTSProcessor] Erreur: {e}")
                     self.result_queue.put({
@@ -138,6 +192,10 @@ class TTSProcessor:
                         'timestamp': time.time()
                     })
                 
+                finally:
+                    with self._lock:
+                        self._in_flight = None
+                
             except queue.Empty:
                 continue
             except Exception as e:
@@ -154,13 +212,15 @@ class TTSProcessor:
     def submit_request(self, text: str, emotion_id: Optional[str] = None, priority: bool = False) -> bool:
         """Soumet une requête TTS."""
         try:
-            request = TTSRequest(
-                text=text,
-                emotion_id=emotion_id,
-                priority=priority,
-                timestamp=time.time()
-            )
-            self.request_queue.put_nowait(request)
+            with self._lock:
+                request = TTSRequest(
+                    text=text,
+                    emotion_id=emotion_id,
+                    priority=priority,
+                    timestamp=time.time(),
+                    epoch=self._epoch
+                )
+                self.request_queue.put_nowait(request)
             print(f"[TTSProcessor] Requête ajoutée: '{text}'")
             return True
         except queue.Full:
@@ -177,6 +237,48 @@ class TTSProcessor:
     def has_pending_requests(self) -> bool:
         """Vérifie s'il y a des requêtes en attente."""
         return not self.request_queue.empty()
+    
+    def cancel_all(self) -> dict:
+        """
+        Annule les requêtes en attente, la synthèse en cours et les résultats non joués.
+        La synthèse en cours s'arrête au prochain bloc audio produit par Piper.
+        
+        Returns:
+            dict: requêtes annulées et secondes de parole évitées (estimées pour le texte non synthétisé)
+        """
+        cancelled = 0
+        saved_seconds = 0.0
+        
+        with self._lock:
+            self._epoch += 1  # une requête déjà sortie de la file mais pas publiée sera ignorée
+            while True:
+                try:
+                    request = self.request_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    self.request_queue.put(None)  # signal d'arrêt à conserver
+                    break
+                request.token.cancel()
+                cancelled += 1
+                saved_seconds += lenght_to_duration(request.text)
+            
+            in_flight = self._in_flight
+            if in_flight is not None and not in_flight.token.is_cancelled():
+                in_flight.token.cancel()
+                cancelled += 1
+                saved_seconds += lenght_to_duration(in_flight.text)
+        
+        while True:
+            try:
+                result = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if result.get('success'):
+                cancelled += 1
+                saved_seconds += result['duration']
+        
+        return {'cancelled': cancelled, 'saved_seconds': saved_seconds}
 
 
 class Live2DViewer:
@@ -189,6 +291,7 @@ class Live2DViewer:
     
     # Queue d'entrée externe
     _external_queue: ClassVar[queue.Queue] = queue.Queue(maxsize=50)
+    _scene_queue: ClassVar[queue.Queue] = queue.Queue()  # commandes de scène (exécutées sur le thread GL)
 
     def __init__(self, model_manager: ModelManager, config: ViewConfig = ViewConfig()):
         self.config = config
@@ -199,10 +302,12 @@ class Live2DViewer:
         self.current_expression_idx = 0
         self.expressions = []
         self.part_ids = []
+        self.expression_controller: Optional[ExpressionController] = None
         
         # TTS + Audio
         self.tts_model = init_model_TTS()
-        self.tts_processor = TTSProcessor(self.tts_model)
+        self.wakeup = Wakeup()
+        self.tts_processor = TTSProcessor(self.tts_model, on_result=self.wakeup.signal)
         self.wavHandler = None
         self.lipSyncN = 3
         
@@ -213,9 +318,44 @@ class Live2DViewer:
         self.audio_duration: Optional[float] = None
         self.is_playing: bool = False
         
+        # Réactions pré-synthétisées pour masquer la latence du pipeline
+        self.filler_bank = FillerBank.load(voice_name())
+        self.current_filler: Optional[FillerClip] = None
+        self.tts_latency: Optional[float] = None  # moyenne glissante requête -> audio prêt
+        
+        # Interruption par l'utilisateur (barge-in)
+        self._interrupt_requested = threading.Event()
+        self.interrupt_fade_ms = 250
+        self.interrupt_stats = {'interruptions': 0, 'cancelled': 0, 'saved_seconds': 0.0}
+        
+        # Cadencement
+        self.clock = FrameClock(config.target_fps, config.idle_fps)
+        self.timestep = FixedTimestep(1.0 / config.update_hz)
+        self.frame_stats = FrameStats()
+        self._work_pending = True  # queues à examiner (mis à jour par les réveils)
+        self._last_interaction = 0.0
+        
         # UI Elements
         self.font = None
+        self.subtitle_font = None
         self.ai_text_surface = None
+        self.overlay = OverlayCompositor(config.width, config.height)
+        self.legacy_overlay_time = 0.0
+        
+        # Rendu hors écran
+        self.offscreen = None
+        self.framebuffer = None
+        self.frame_output = None
+        self.scaled_render = None
+        
+        # Changement de modèle à chaud
+        self._preloaded: queue.Queue = queue.Queue()
+        self.warm_models: OrderedDict = OrderedDict()  # nom -> (manager, modèle, expressions, parts, contrôleur)
+        self.switch_stats = {'switches': 0, 'last_ms': 0.0, 'max_ms': 0.0}
+        
+        # Avatars supplémentaires (même contexte GL, même horloge)
+        self.scene = Scene(config.width, config.height, lip_sync_gain=self.lipSyncN)
+        self.main_cost = AvatarCost()
 
     @classmethod
     def get_instance(cls) -> Optional['Live2DViewer']:
@@ -229,6 +369,13 @@ class Live2DViewer:
             return cls._instance
         return None
     
+    @classmethod
+    def _wake(cls) -> None:
+        """Réveille la boucle de rendu (sinon les queues ne sont pas examinées)."""
+        instance = cls._instance
+        if instance is not None:
+            instance.wakeup.signal()
+    
     @classmethod
     def send_text(cls, text: str, priority: bool = False) -> bool:
         """Envoie du texte depuis n'importe où."""
@@ -238,6 +385,7 @@ class Live2DViewer:
                 'priority': priority
             })
             print(f"[External] Texte ajouté: '{text}'")
+            cls._wake()
             return True
         except queue.Full:
             print(f"[External] Queue pleine, texte ignoré")
@@ -253,11 +401,141 @@ class Live2DViewer:
                 'priority': priority
             })
             print(f"[External] Texte + émotion ajoutés: '{text}' -> {emotion_id}")
+            cls._wake()
             return True
         except queue.Full:
             print(f"[External] Queue pleine, requête ignorée")
             return False
 
+    @classmethod
+    def send_filler(cls, category: Optional[str] = None, expected_latency: Optional[float] = None) -> bool:
+        """
+        Demande une réaction courte ("hmm", "ah oui ?") si la latence attendue
+        dépasse le seuil configuré. La vraie réponse n'est jamais interrompue.
+        """
+        try:
+            cls._external_queue.put_nowait({
+                'filler': True,
+                'category': category,
+                'expected_latency': expected_latency
+            })
+            cls._wake()
+            return True
+        except queue.Full:
+            return False
+
+    @classmethod
+    def switch_model(cls, name: str) -> bool:
+        """
+        Change d'avatar sans redémarrer : le modèle est préparé en arrière-plan
+        pendant que l'actuel continue d'être rendu, puis échangé entre deux frames.
+        Appelable depuis n'importe quel thread.
+        """
+        instance = cls._instance
+        if instance is None:
+            return False
+        try:
+            manager = ModelManager(name)
+            manager.check_loadable(live2d.LIVE2D_VERSION)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"[Modèle] {e}")
+            return False
+        
+        threading.Thread(target=instance._preload_model, args=(manager,), daemon=True).start()
+        return True
+
+    @classmethod
+    def _scene_command(cls, method: str, *args, **kwargs) -> bool:
+        if cls._instance is None:
+            return False
+        cls._scene_queue.put((method, args, kwargs))
+        cls._wake()
+        return True
+
+    @classmethod
+    def add_avatar(cls, avatar_id: str, model_name: str, dx: float = 0.0, dy: float = 0.0,
+                   scale: float = 1.0, share: bool = True) -> bool:
+        """Ajoute un avatar à la scène (voir utils.scene.Scene.add). Appelable depuis n'importe quel thread."""
+        return cls._scene_command("add", avatar_id, model_name, dx=dx, dy=dy, scale=scale, share=share)
+
+    @classmethod
+    def remove_avatar(cls, avatar_id: str) -> bool:
+        return cls._scene_command("remove", avatar_id)
+
+    @classmethod
+    def avatar_speak(cls, avatar_id: str, audio_path: str, expression: Optional[str] = None) -> bool:
+        """Fait parler un avatar de la scène (fichier audio déjà synthétisé)."""
+        return cls._scene_command("speak", avatar_id, audio_path, expression)
+
+    @classmethod
+    def avatar_expression(cls, avatar_id: str, expression: Optional[str]) -> bool:
+        return cls._scene_command("set_expression", avatar_id, expression)
+
+    @classmethod
+    def interrupt(cls, fade_ms: int = 250) -> bool:
+        """
+        L'utilisateur reprend la parole : vide la queue externe, annule la
+        synthèse en attente / en cours, puis (au prochain frame) coupe la
+        lecture en fondu et réinitialise l'expression.
+        Appelable depuis n'importe quel thread.
+        """
+        flushed = 0
+        saved_seconds = 0.0
+        while True:
+            try:
+                data = cls._external_queue.get_nowait()
+            except queue.Empty:
+                break
+            flushed += 1
+            if data.get('text'):
+                saved_seconds += lenght_to_duration(data['text'])
+        
+        instance = cls._instance
+        if instance is None:
+            return flushed > 0
+        
+        cancelled = instance.tts_processor.cancel_all()
+        instance.interrupt_fade_ms = fade_ms
+        instance._interrupt_requested.set()
+        instance.wakeup.signal()
+        
+        stats = instance.interrupt_stats
+        stats['interruptions'] += 1
+        stats['cancelled'] += flushed + cancelled['cancelled']
+        stats['saved_seconds'] += saved_seconds + cancelled['saved_seconds']
+        print(f"[Interrupt] {flushed + cancelled['cancelled']} requête(s) annulée(s), "
+              f"total évité: {stats['saved_seconds']:.1f}s de parole")
+        return True
+
+    def _handle_interrupt(self) -> None:
+        """Applique une interruption demandée (thread de rendu)."""
+        if not self._interrupt_requested.is_set():
+            return
+        self._interrupt_requested.clear()
+        
+        if not self.is_playing:
+            return
+        
+        # Compter la fin de phrase qui ne sera pas prononcée
+        elapsed = time.time() - self.audio_start_time
+        self.interrupt_stats['saved_seconds'] += max(0.0, self.audio_duration - elapsed)
+        
+        pygame.mixer.music.fadeout(self.interrupt_fade_ms)
+        playback_timeline.stop(time.time() + self.interrupt_fade_ms / 1000)
+        self.wavHandler = WavHandler()  # arrête le lip sync du fichier interrompu
+        self.overlay.remove("subtitle")
+        self.expression_controller.reset()
+        self.model.SetParameterValue(StandardParams.ParamMouthOpenY, 0.0)
+        
+        print(f"[Main] Lecture interrompue après {elapsed:.2f}s")
+        
+        self.current_filler = None
+        self.current_audio_path = None
+        self.current_emotion_id = None
+        self.audio_start_time = None
+        self.audio_duration = None
+        self.is_playing = False
+
     def initialize(self) -> None:
         """Initialize pygame, Live2D, and load the model."""
         with self._lock:
@@ -265,22 +543,49 @@ class Live2DViewer:
                 raise RuntimeError("Une instance de Live2DViewer existe déjà!")
             Live2DViewer._instance = self
         
+        if self.config.headless:
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+            if self.config.headless_backend != "hidden":
+                os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        
         pygame.init()
         pygame.mixer.init()
         live2d.init()
         live2d.setLogEnable(True)
 
-        pygame.display.set_mode(
-            (self.config.width, self.config.height),
-            DOUBLEBUF | OPENGL
-        )
-        pygame.display.set_caption(self.config.title)
+        if self.config.headless:
+            from utils.headless import OffscreenContext
+            self.offscreen = OffscreenContext(self.config.width, self.config.height, self.config.headless_backend)
+        else:
+            pygame.display.set_mode(
+                (self.config.width, self.config.height),
+                DOUBLEBUF | OPENGL
+            )
+            pygame.display.set_caption(self.config.title)
         
-        # Créer une surface 2D pour l'overlay
-        self.overlay_surface = pygame.Surface((self.config.width, self.config.height), pygame.SRCALPHA)
-
         if live2d.LIVE2D_VERSION == 3:
             live2d.glewInit()
+        
+        if self.config.headless:
+            from utils.headless import Framebuffer
+            self.framebuffer = Framebuffer(self.config.width, self.config.height)
+        
+        if self.config.render_scale < 1.0 or self.config.dynamic_resolution:
+            from utils.render_scale import ScaledRender, ResolutionController
+            controller = None
+            if self.config.dynamic_resolution:
+                controller = ResolutionController(self.config.target_fps, self.config.min_render_scale,
+                                                  self.config.max_render_scale)
+            self.scaled_render = ScaledRender(self.config.width, self.config.height,
+                                              self.config.render_scale, controller)
+        
+        if self.config.output_video or self.config.output_shm:
+            from utils.frame_output import FrameOutput
+            self.frame_output = FrameOutput(
+                self.config.width, self.config.height,
+                video=self.config.output_video, shm_name=self.config.output_shm,
+                fps=self.config.target_fps or 60
+            )
 
         self._load_model()
         
@@ -289,7 +594,13 @@ class Live2DViewer:
         
         # Initialiser la police pour le texte "AI"
         self.font = pygame.font.Font(None, 48)
-        self.ai_text_surface = self.font.render("AI", True, (255, 255, 255))
+        self.subtitle_font = pygame.font.Font(None, 28)
+        if self.config.legacy_overlay:
+            self.overlay_surface = pygame.Surface((self.config.width, self.config.height), pygame.SRCALPHA)
+            self.ai_text_surface = self.font.render("AI", True, (255, 255, 255))
+        else:
+            self.overlay.set_text("ai", "AI", self.font, padding=0, min_size=(60, 40),
+                                  anchor="bottomright", margin=10)
         
         # Démarrer le processeur TTS
         self.tts_processor.start()
@@ -302,49 +613,189 @@ class Live2DViewer:
         print("- SPACE: Dire 'Bonjour le monde!'")
         print("- E: Changer d'expression")
         print("- R: Réinitialiser")
+        print("- F: Statistiques des frames")
+        print("- M: Modèle suivant")
         print("\nAPI externe:")
         print("  Live2DViewer.send_text('texte')")
         print("  Live2DViewer.send_emotion_direct('texte', 'f01')")
+        print("  Live2DViewer.send_filler('thinking')")
+        print("  Live2DViewer.interrupt()")
+        print("  Live2DViewer.switch_model('mao')")
+        print("  Live2DViewer.add_avatar('amie', 'nn', dx=0.5)")
         print(f"\nExpressions: {self.expressions}")
         print("==========================================")
 
-    def _load_model(self) -> None:
+    def _model_path(self, manager: ModelManager):
+        return manager.path_for(self.config.width, self.config.height, self.config.texture_oversample)
+
+    def _load_model(self, model_path=None) -> None:
         """Load and configure the Live2D model."""
-        self.model = live2d.LAppModel()
-        self.model.LoadModelJson(str(self.model_manager.path))
+        (self.model_manager, self.model, self.expressions, self.part_ids,
+         self.expression_controller) = self._create_model(self.model_manager, model_path)
+        self._model_needs_update = True  # calculer les sommets avant le premier Draw
+
+    def _create_model(self, manager: ModelManager, model_path=None) -> tuple:
+        """
+        Charge et configure un modèle sans toucher au modèle affiché.
+        Returns:
+            tuple: (manager, model, expressions, part_ids, expression_controller), comme warm_models
+        """
+        model = live2d.LAppModel()
+        model_path = model_path or self._model_path(manager)
+        if model_path != manager.path:
+            print(f"Textures précalculées : {model_path.name}")
+        model.LoadModelJson(str(model_path))
         
-        self.expressions = self.model.GetExpressionIds()
-        print(f"Expressions disponibles: {self.expressions}")
+        expressions = model.GetExpressionIds()
+        print(f"Expressions disponibles: {expressions}")
         
-        if self.expressions:
-            self.model.AddExpression(self.expressions[0])
+        # Index émotions -> expressions, construit une fois par modèle
+        expression_controller = ExpressionController(
+            model, expression_index(manager), self.config.expression_blend
+        )
+        if expressions:
+            expression_controller.set_expression(expressions[0])
 
-        self.model.Resize(self.config.width, self.config.height)
-        self.model.SetAutoBlinkEnable(True)
-        self.model.SetAutoBreathEnable(False)
+        model.Resize(self.config.width, self.config.height)
+        model.SetAutoBlinkEnable(True)
+        model.SetAutoBreathEnable(False)
         
-        self.part_ids = self.model.GetPartIds()
+        return manager, model, expressions, model.GetPartIds(), expression_controller
+
+    def _preload_model(self, manager: ModelManager) -> None:
+        """
+        Thread de préparation : lit tous les fichiers du modèle (JSON, moc,
+        textures, expressions, motions) pour que le chargement GL, fait entre
+        deux frames, ne touche plus le disque.
+        """
+        start = time.perf_counter()
+        model_path = self._model_path(manager)
+        size = 0
+        if manager.name not in self.warm_models:
+            try:
+                for path in [model_path] + referenced_files(model_path):
+                    with open(path, "rb") as f:
+                        while chunk := f.read(1 << 20):
+                            size += len(chunk)
+            except OSError as e:
+                print(f"[Modèle] Préchargement de '{manager.name}' impossible : {e}")
+                return
+        print(f"[Modèle] '{manager.name}' prêt ({size / 1e6:.1f} Mo lus en "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+        self._preloaded.put((manager, model_path))
+        self.wakeup.signal()
+
+    def _apply_model_switch(self) -> None:
+        """Échange de modèle en début de frame (seul moment où le contexte GL est libre)"""
+        if self._preloaded.empty():
+            return
+        manager, model_path = self._preloaded.get_nowait()
+        if manager.name == self.model_manager.name:
+            return
+        
+        start = time.perf_counter()
+        previous = (self.model_manager, self.model, self.expressions, self.part_ids, self.expression_controller)
+        warm = self.warm_models.pop(manager.name, None)
+        loaded = warm
+        if loaded is None:
+            # chargement dans des variables locales : en cas d'échec, le modèle affiché reste en place
+            try:
+                loaded = self._create_model(manager, model_path)
+            except Exception as e:
+                print(f"[Modèle] Chargement de '{manager.name}' impossible, '{previous[0].name}' conservé : {e}")
+                return
+        self.model_manager, self.model, self.expressions, self.part_ids, self.expression_controller = loaded
+        self._model_needs_update = True
+        self.current_expression_idx = 0
+        
+        # Ancien modèle : gardé chaud, ou libéré (textures et buffers GL) avec la dernière référence
+        self.warm_models[previous[0].name] = previous
+        while len(self.warm_models) > self.config.warm_models:
+            name, _ = self.warm_models.popitem(last=False)
+            print(f"[Modèle] '{name}' déchargé")
+        
+        elapsed = (time.perf_counter() - start) * 1000
+        self.switch_stats['switches'] += 1
+        self.switch_stats['last_ms'] = elapsed
+        self.switch_stats['max_ms'] = max(self.switch_stats['max_ms'], elapsed)
+        print(f"[Modèle] {previous[0].name} -> {manager.name} en {elapsed:.1f} ms"
+              f"{' (gardé chaud)' if warm is not None else ''}")
+
+    def _apply_scene_commands(self) -> None:
+        """Commandes de scène en attente (chargements GL : sur ce thread uniquement)"""
+        while not self._scene_queue.empty():
+            method, args, kwargs = self._scene_queue.get_nowait()
+            try:
+                getattr(self.scene, method)(*args, **kwargs)
+            except Exception as e:
+                # avatar inconnu, modèle refusé, pygame.error sur l'audio, échec de chargement GL... :
+                # la commande est abandonnée, la boucle de rendu continue
+                print(f"[Scène] {method} impossible : {type(e).__name__}: {e}")
 
     def _check_inputs(self) -> None:
         """Vérifie les inputs de la queue externe."""
         # Ne traiter de nouvelles requêtes que si rien n'est en cours de lecture
-        if self.is_playing:
+        # (une réaction de remplissage ne bloque pas la vraie réponse)
+        if self.is_playing and self.current_filler is None:
             return
         
         try:
             data = self._external_queue.get_nowait()
             
+            if data.get('filler'):
+                self._maybe_play_filler(data.get('category'), data.get('expected_latency'))
+                return
+            
             text = data.get('text')
             emotion_id = data.get('emotion_id')
             priority = data.get('priority', False)
             
             if text:
                 print(f"[Main] Nouvelle requête: '{text}'")
+                idle = not self.is_playing and not self.tts_processor.has_pending_requests()
                 self.tts_processor.submit_request(text, emotion_id, priority)
+                if idle:
+                    self._maybe_play_filler("thinking")
                 
         except queue.Empty:
             pass
 
+    def _maybe_play_filler(self, category: Optional[str] = None, expected_latency: Optional[float] = None) -> None:
+        """Joue une réaction si la latence attendue dépasse le seuil et que rien n'est prêt."""
+        if self.filler_bank is None or self.is_playing:
+            return
+        if not self.tts_processor.result_queue.empty():
+            return
+        
+        if expected_latency is None:
+            expected_latency = self.tts_latency
+        if expected_latency is None or expected_latency < filler_latency_threshold():
+            return
+        
+        self._start_filler(self.filler_bank.pick(category))
+
+    def _start_filler(self, clip: FillerClip) -> None:
+        """Démarre un clip de réaction (enveloppe de lip sync pré-calculée)."""
+        try:
+            pygame.mixer.music.load(clip.audio_path)
+            pygame.mixer.music.play()
+            
+            target = self.expression_controller.set_emotions({clip.emotion: 1.0})
+            emotion_id = max(target, key=target.get) if target else None
+            
+            print(f"[Main] Réaction: '{clip.text}' ({clip.duration:.2f}s)")
+            
+            self.current_filler = clip
+            playback_timeline.start(time.time(), clip.duration, clip.envelope, clip.envelope_fps)
+            self.current_audio_path = clip.audio_path
+            self.current_emotion_id = emotion_id
+            self.audio_start_time = time.time()
+            self.audio_duration = clip.duration
+            self.is_playing = True
+            
+        except Exception as e:
+            print(f"[Main] Erreur lors de la réaction: {e}")
+
     def _check_tts_results(self) -> None:
         """Vérifie les résultats du processeur TTS."""
         # Ne récupérer un résultat que si rien n'est en cours
@@ -353,6 +804,11 @@ class Live2DViewer:
         
         result = self.tts_processor.get_result()
         if result and result['success']:
+            latency = result['timestamp'] - result.get('request_timestamp', result['timestamp'])
+            if self.tts_latency is None:
+                self.tts_latency = latency
+            else:
+                self.tts_latency = 0.8 * self.tts_latency + 0.2 * latency
             self._start_playback(result)
 
     def _start_playback(self, result: dict) -> None:
@@ -371,11 +827,21 @@ class Live2DViewer:
             # Démarrer le lip sync
             self.wavHandler.Start(audio_path)
             
-            # Appliquer l'expression
-            if emotion_id and emotion_id in self.expressions:
-                self.model.ResetExpressions()
-                self.model.AddExpression(emotion_id)
-                print(f"[Main] Expression appliquée: {emotion_id}")
+            # Déclarer la lecture au STT (la voix de l'avatar ne doit pas être retranscrite)
+            playback_timeline.start(time.time(), duration, result.get('envelope'), ENVELOPE_FPS)
+            
+            if self.config.subtitles and result.get('text'):
+                self.overlay.set_text("subtitle", result['text'], self.subtitle_font,
+                                      anchor="bottom", margin=60, max_width=self.config.width - 40)
+            
+            # Appliquer l'expression (ID imposé, sinon d'après le vecteur d'émotions)
+            if emotion_id:
+                self.expression_controller.set_expression(emotion_id)
+            elif result.get('emotions'):
+                target = self.expression_controller.set_emotions(result['emotions'])
+                emotion_id = max(target, key=target.get) if target else None
+            if emotion_id:
+                print(f"[Main] Expression appliquée: {self.expression_controller.current}")
             
             # Enregistrer l'état
             self.current_audio_path = audio_path
@@ -401,12 +867,15 @@ class Live2DViewer:
         
         if not audio_playing or duration_exceeded:
             print(f"[Main] Lecture terminée (elapsed={elapsed:.2f}s)")
+            playback_timeline.stop()
+            self.overlay.remove("subtitle")
             
             # Reset l'expression
-            self.model.ResetExpressions()
+            self.expression_controller.reset()
             print(f"[Main] Expression '{self.current_emotion_id}' retirée")
             
             # Reset l'état
+            self.current_filler = None
             self.current_audio_path = None
             self.current_emotion_id = None
             self.audio_start_time = None
@@ -415,7 +884,11 @@ class Live2DViewer:
 
     def update_wav_handler(self) -> None:
         """Met à jour le lip sync."""
-        if self.wavHandler.Update():
+        if self.current_filler is not None:
+            elapsed = time.time() - self.audio_start_time
+            mouth_value = self.current_filler.rms_at(elapsed) * self.lipSyncN
+            self.model.SetParameterValue(StandardParams.ParamMouthOpenY, mouth_value)
+        elif self.wavHandler.Update():
             rms_value = self.wavHandler.GetRms()
             mouth_value = rms_value * self.lipSyncN
             self.model.SetParameterValue(StandardParams.ParamMouthOpenY, mouth_value)
@@ -445,14 +918,30 @@ class Live2DViewer:
             self._reset_model()
             print("Modèle réinitialisé")
         
+        elif key == pygame.K_m:
+            self._cycle_model()
+        
         elif key == pygame.K_e:
             self._cycle_expression()
+        
+        elif key == pygame.K_f:
+            print(f"[Main] Frames : {self.frame_stats.summary()}")
+            print(f"[Main] {self._overlay_summary()}")
+            if self.frame_output is not None:
+                print(f"[Main] {self.frame_output.summary()}")
+            if self.scaled_render is not None:
+                print(f"[Main] {self.scaled_render.summary()}")
+            if self.switch_stats['switches']:
+                print(f"[Main] Changements de modèle : {self.switch_stats}")
+            print(f"[Main] {self.scene.summary(self.main_cost, self.config.target_fps)}")
+            print(f"[Main] {self.expression_controller.summary()}")
 
     def _reset_model(self) -> None:
         """Reset model to default state."""
         self.model.StopAllMotions()
         self.model.ResetPose()
         self.model.ResetExpression()
+        self.expression_controller.current = {}
 
     def _cycle_expression(self) -> None:
         """Cycle to the next expression."""
@@ -461,18 +950,29 @@ class Live2DViewer:
         
         self.current_expression_idx = (self.current_expression_idx + 1) % len(self.expressions)
         expr = self.expressions[self.current_expression_idx]
-        self.model.ResetExpressions()
-        self.model.AddExpression(expr)
+        self.expression_controller.set_expression(expr)
         print(f"Expression: {expr}")
 
+    def _cycle_model(self) -> None:
+        """Passe au modèle complet suivant du catalogue (compatible avec le moteur chargé)."""
+        catalog = model_catalog()
+        names = [name for name, entry in catalog.entries.items()
+                 if not entry.errors and entry.version == live2d.LIVE2D_VERSION]
+        if not names:
+            return
+        current = self.model_manager.name
+        next_name = names[(names.index(current) + 1) % len(names)] if current in names else names[0]
+        self.switch_model(next_name)
+
     def _handle_mouse_motion(self, pos: tuple[int, int]) -> None:
         """Handle mouse motion."""
         self.model.Drag(*pos)
+        self._last_interaction = time.time()
         
         
-    def _apply_transformations(self) -> None:
-        """Apply transformations."""
-        self.transform.rotation += self.transform.rotation_speed
+    def _apply_transformations(self, steps: int = 1) -> None:
+        """Apply transformations (steps = pas fixes écoulés depuis la frame précédente)."""
+        self.transform.rotation += self.transform.rotation_speed * steps
         rotation_deg = math.sin(self.transform.rotation) * self.transform.rotation_amplitude
         
         self.model.Rotate(rotation_deg)
@@ -480,8 +980,23 @@ class Live2DViewer:
         self.model.SetScale(self.transform.scale)
 
 
-    def _render_ai_label(self) -> None:
-        """Affiche le label 'AI' en bas à droite avec OpenGL."""
+    def _render_overlays(self) -> None:
+        """Dessine les overlays (label 'AI', sous-titres) en une passe."""
+        if self.config.legacy_overlay:
+            start = time.perf_counter()
+            self._render_ai_label_legacy()
+            self.legacy_overlay_time += time.perf_counter() - start
+        else:
+            self.overlay.draw()
+    
+    def _overlay_summary(self) -> str:
+        if self.config.legacy_overlay:
+            frames = max(1, self.frame_stats.frames)
+            return f"overlays (ancien rendu) : {self.legacy_overlay_time / frames * 1000:.3f} ms/frame"
+        return self.overlay.summary()
+
+    def _render_ai_label_legacy(self) -> None:
+        """Ancien rendu du label 'AI' (re-rendu et glDrawPixels à chaque frame)."""
         from OpenGL.GL import glMatrixMode, glLoadIdentity, glOrtho, GL_PROJECTION, GL_MODELVIEW
         from OpenGL.GL import glEnable, glDisable, glBlendFunc, GL_BLEND, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA
         from OpenGL.GL import glColor4f, glBegin, glEnd, glVertex2f, GL_QUADS
@@ -533,7 +1048,8 @@ class Live2DViewer:
         glDisable(GL_BLEND)
 
     def _process_events(self) -> None:
-        """Process pygame events."""
+        """Process pygame events (les mouvements de souris sont fusionnés : un Drag par frame)."""
+        drag_pos = None
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
@@ -541,9 +1057,20 @@ class Live2DViewer:
             
             elif event.type == pygame.KEYDOWN:
                 self._handle_keyboard(event.key)
+                self._last_interaction = time.time()
             
             elif event.type == pygame.MOUSEMOTION:
-                self._handle_mouse_motion(pygame.mouse.get_pos())
+                if drag_pos is not None:
+                    self.frame_stats.coalesced_events += 1
+                drag_pos = event.pos
+        
+        if drag_pos is not None:
+            self._handle_mouse_motion(drag_pos)
+    
+    def _is_active(self) -> bool:
+        """Cadence pleine pendant la parole ou juste après une interaction."""
+        return (self.is_playing or time.time() - self._last_interaction < 2.0
+                or self.scene.is_active())
 
     def run(self) -> None:
         """Main rendering loop."""
@@ -552,41 +1079,113 @@ class Live2DViewer:
         print("\n[Main] Boucle principale démarrée")
         
         while self.running:
-            # Vérifier les inputs externes
-            self._check_inputs()
+            # Attendre l'échéance de la frame (ou un réveil : requête, audio prêt, interruption)
+            dt = self.clock.tick(self.wakeup, active=self._is_active())
+            frame_start = time.perf_counter()
+            self._work_pending |= self.wakeup.consume()
             
-            # Vérifier les résultats TTS
-            self._check_tts_results()
+            # Interruption demandée par l'utilisateur
+            self._handle_interrupt()
+            
+            # Changement de modèle préparé en arrière-plan
+            self._apply_model_switch()
+            self._apply_scene_commands()
+            
+            was_playing = self.is_playing
             
             # Mettre à jour l'état de lecture
             self._update_playback()
             
+            # Queues examinées seulement après un réveil ou une fin de lecture
+            if self._work_pending or (was_playing and not self.is_playing):
+                # Vérifier les inputs externes
+                self._check_inputs()
+                
+                # Vérifier les résultats TTS
+                self._check_tts_results()
+                
+                self._work_pending = (not self._external_queue.empty()
+                                      or not self.tts_processor.result_queue.empty())
+            
             # Traiter les événements pygame
             self._process_events()
             
             if not self.running:
                 break
             
-            # Appliquer les transformations
-            self._apply_transformations()
+            # Appliquer les transformations (pas fixe, indépendant du FPS)
+            steps = self.timestep.advance(dt)
+            self._apply_transformations(steps)
             
             # Mettre à jour le lip sync
             self.update_wav_handler()
             
-            # Mise à jour du modèle
-            self.model.Update()
+            # Mise à jour du modèle au pas fixe (update_hz), pas à chaque image. LAppModel.Update()
+            # mesure lui-même le temps écoulé : un seul appel rattrape plusieurs pas, et une
+            # frame sans pas redessine les sommets déjà calculés
+            update_time = 0.0
+            if steps or self._model_needs_update:
+                self.expression_controller.update()
+                update_start = time.perf_counter()
+                self.model.Update()
+                update_time = time.perf_counter() - update_start
+                self._model_needs_update = False
             
             # Rendu
+            render_start = time.perf_counter()
+            if self.scaled_render is not None:
+                self.scaled_render.begin()
+            elif self.framebuffer is not None:
+                self.framebuffer.bind()
             live2d.clearBuffer(*self.config.background_color)
+            draw_start = time.perf_counter()
             self.model.Draw()
+            self.main_cost.record(update_time, time.perf_counter() - draw_start)
+            if self.scene.avatars:
+                self.scene.render()
+            if self.scaled_render is not None:
+                self.scaled_render.end(self.framebuffer.fbo if self.framebuffer is not None else 0)
+            # seul coût qui dépend de la résolution interne (ni flip, ni capture, ni Update)
+            render_time = time.perf_counter() - render_start
             
-            # Afficher le label "AI"
-            self._render_ai_label()
+            # Afficher les overlays (label "AI", sous-titres)
+            self._render_overlays()
             
-            pygame.display.flip()
-            pygame.time.wait(self.config.frame_delay)
+            # Export (lecture asynchrone, frame N-1 transmise au thread d'écriture)
+            if self.frame_output is not None:
+                self.frame_output.capture()
+            
+            if self.framebuffer is not None:
+                self._finish_offscreen_frame()
+            else:
+                pygame.display.flip()
+            work_time = time.perf_counter() - frame_start
+            self.frame_stats.record(dt, work_time)
+            if self.scaled_render is not None:
+                self.scaled_render.update(render_time)
+            
+            if self.config.max_frames and self.frame_stats.frames >= self.config.max_frames:
+                self.running = False
         
         print("[Main] Boucle principale terminée")
+        print(f"[Main] Frames : {self.frame_stats.summary()}")
+        print(f"[Main] {self._overlay_summary()}")
+        if self.frame_output is not None:
+            print(f"[Main] {self.frame_output.summary()}")
+        if self.scaled_render is not None:
+            print(f"[Main] {self.scaled_render.summary()}")
+        if self.scene.avatars:
+            print(f"[Main] {self.scene.summary(self.main_cost, self.config.target_fps)}")
+
+    def _finish_offscreen_frame(self) -> None:
+        """Mode headless : attendre la fin du rendu (timings réels) et écrire la frame si demandé."""
+        from OpenGL.GL import glFinish
+        glFinish()
+        
+        index = self.frame_stats.frames
+        if self.config.dump_dir and self.config.dump_every > 0 and index % self.config.dump_every == 0:
+            from utils.headless import save_frame
+            save_frame(self.framebuffer.read_pixels(), self.config.dump_dir, index)
 
     def cleanup(self) -> None:
         """Cleanup resources."""
@@ -594,17 +1193,39 @@ class Live2DViewer:
         
         self.tts_processor.stop()
         
+        if self.frame_output is not None:
+            try:
+                self.frame_output.close()
+            except Exception as e:
+                print(f"[Main] Erreur sortie: {e}")
+        
+        try:
+            self.overlay.release()
+            if self.scaled_render is not None:
+                self.scaled_render.release()
+            if self.framebuffer is not None:
+                self.framebuffer.release()
+        except Exception as e:
+            print(f"[Main] Erreur overlay: {e}")
+        
         with self._lock:
             Live2DViewer._instance = None
             Live2DViewer._initialized.clear()
         
         time.sleep(0.2)
         
+        self.scene.clear()
+        self.warm_models.clear()
+        self.model = None
+        
         try:
             live2d.dispose()
         except Exception as e:
             print(f"[Main] Erreur dispose: {e}")
         
+        if self.offscreen is not None:
+            self.offscreen.destroy()
+        
         try:
             pygame.quit()
         except Exception as e:
@@ -613,9 +1234,9 @@ class Live2DViewer:
         print("[Main] Nettoyage terminé")
 
 
-def main():
+def main(model_name: str = "mao"):
     """Entry point for the Live2D viewer."""
-    model_manager = ModelManager("llny")
+    model_manager = ModelManager(model_name)
     viewer = Live2DViewer(model_manager)
 
     try:
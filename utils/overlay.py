@@ -0,0 +1,235 @@
+"""
+Calque d'overlays 2D (label "AI", sous-titres...) au-dessus du modèle Live2D.
+
+Les overlays sont composés côté CPU dans une surface de la taille de la fenêtre,
+uniquement quand l'un d'eux change, puis seule la zone modifiée est envoyée
+dans une texture GL (glTexSubImage2D). À chaque frame, le dessin se résume à
+un quad texturé couvrant les overlays visibles : aucune allocation, aucun
+rendu de police, aucune copie CPU -> GPU tant que rien ne change.
+"""
+
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Dict, Optional
+
+import numpy as np
+import pygame
+from OpenGL import GL
+
+
+@dataclass
+class OverlayItem:
+    surface: pygame.Surface
+    pos: tuple[int, int]
+    z: int = 0
+    key: Optional[tuple] = None  # contenu ayant produit la surface (évite de la refaire)
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return pygame.Rect(self.pos, self.surface.get_size())
+
+
+def anchor_position(size: tuple[int, int], screen: tuple[int, int], anchor: str, margin: int) -> tuple[int, int]:
+    """Position du coin haut-gauche pour un ancrage ('bottomright', 'bottom', 'topleft'...)"""
+    w, h = size
+    sw, sh = screen
+    x = {"left": margin, "right": sw - w - margin}.get(
+        next((a for a in ("left", "right") if a in anchor), ""), (sw - w) // 2)
+    y = {"top": margin, "bottom": sh - h - margin}.get(
+        next((a for a in ("top", "bottom") if a in anchor), ""), (sh - h) // 2)
+    return x, y
+
+
+def wrap_text(text: str, font: pygame.font.Font, max_width: int) -> list[str]:
+    """Découpe un texte en lignes ne dépassant pas max_width pixels"""
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and font.size(candidate)[0] > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def render_label(text: str, font: pygame.font.Font, color=(255, 255, 255),
+                 background=(0, 0, 0, 178), padding: int = 8, max_width: Optional[int] = None,
+                 min_size: tuple[int, int] = (0, 0)) -> pygame.Surface:
+    """Texte (éventuellement sur plusieurs lignes) centré sur un fond semi-transparent"""
+    lines = wrap_text(text, font, max_width - 2 * padding) if max_width else [text]
+    rendered = [font.render(line, True, color) for line in lines]
+    width = max([s.get_width() for s in rendered] + [0]) + 2 * padding
+    height = sum(s.get_height() for s in rendered) + 2 * padding
+    surface = pygame.Surface((max(width, min_size[0]), max(height, min_size[1])), pygame.SRCALPHA)
+    if background:
+        surface.fill(background)
+
+    y = (surface.get_height() - (height - 2 * padding)) // 2
+    for line in rendered:
+        surface.blit(line, ((surface.get_width() - line.get_width()) // 2, y))
+        y += line.get_height()
+    return surface
+
+
+class OverlayCompositor:
+    """
+    Args:
+        width, height: taille de la fenêtre (pixels)
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.items: Dict[str, OverlayItem] = {}
+        self.layer = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.texture: Optional[int] = None
+        self._dirty: Optional[pygame.Rect] = None
+
+        # Statistiques
+        self.frames = 0
+        self.uploads = 0
+        self.uploaded_bytes = 0
+        self.draw_time = 0.0
+
+    # --- contenu ----------------------------------------------------------
+
+    def _mark_dirty(self, rect: pygame.Rect) -> None:
+        rect = rect.clip(self.layer.get_rect())
+        self._dirty = rect if self._dirty is None else self._dirty.union(rect)
+
+    def set_surface(self, name: str, surface: pygame.Surface, pos: tuple[int, int], z: int = 0,
+                    key: Optional[tuple] = None) -> None:
+        old = self.items.get(name)
+        if old is not None:
+            self._mark_dirty(old.rect)
+        item = OverlayItem(surface, pos, z, key)
+        self.items[name] = item
+        self._mark_dirty(item.rect)
+
+    def set_text(self, name: str, text: str, font: pygame.font.Font, color=(255, 255, 255),
+                 background=(0, 0, 0, 178), padding: int = 8, anchor: str = "bottomright",
+                 margin: int = 10, max_width: Optional[int] = None, min_size: tuple[int, int] = (0, 0),
+                 z: int = 0) -> None:
+        """Texte ancré dans la fenêtre ; la surface n'est refaite que si le contenu change"""
+        key = (text, id(font), color, background, padding, anchor, margin, max_width, min_size, z)
+        old = self.items.get(name)
+        if old is not None and old.key == key:
+            return
+        surface = render_label(text, font, color, background, padding, max_width, min_size)
+        pos = anchor_position(surface.get_size(), (self.width, self.height), anchor, margin)
+        self.set_surface(name, surface, pos, z, key)
+
+    def remove(self, name: str) -> None:
+        item = self.items.pop(name, None)
+        if item is not None:
+            self._mark_dirty(item.rect)
+
+    def resize(self, width: int, height: int) -> None:
+        """Nouvelle taille de fenêtre : les overlays ancrés doivent être redéfinis"""
+        self.width, self.height = width, height
+        self.layer = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.items.clear()
+        if self.texture is not None:
+            self._allocate()
+        self._dirty = None
+
+    # --- GL ---------------------------------------------------------------
+
+    def _allocate(self) -> None:
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, self.width, self.height, 0,
+                        GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None)
+
+    def _upload(self) -> None:
+        """Recompose la zone modifiée et l'envoie dans la texture"""
+        rect = self._dirty
+        self._dirty = None
+        if rect is None or rect.width == 0 or rect.height == 0:
+            return
+
+        self.layer.fill((0, 0, 0, 0), rect)
+        self.layer.set_clip(rect)
+        for item in sorted(self.items.values(), key=lambda i: i.z):
+            if item.rect.colliderect(rect):
+                self.layer.blit(item.surface, item.pos)
+        self.layer.set_clip(None)
+
+        data = pygame.image.tostring(self.layer.subsurface(rect), "RGBA", False)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, rect.x, rect.y, rect.width, rect.height,
+                           GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, data)
+        self.uploads += 1
+        self.uploaded_bytes += len(data)
+
+    def draw(self) -> None:
+        """Dessine tous les overlays en un seul quad texturé (à appeler après le modèle)"""
+        start = perf_counter()
+        if self.texture is None:
+            self.texture = GL.glGenTextures(1)
+            self._allocate()
+        if self._dirty is not None:
+            self._upload()
+        if not self.items:
+            # frame sans overlay : comptée quand même, pour un coût moyen par frame non biaisé
+            self.frames += 1
+            self.draw_time += perf_counter() - start
+            return
+
+        bounds = pygame.Rect.unionall(next(iter(self.items.values())).rect,
+                                      [item.rect for item in self.items.values()])
+        bounds = bounds.clip(self.layer.get_rect())
+        x0, y0, x1, y1 = bounds.left, bounds.top, bounds.right, bounds.bottom
+        u0, v0, u1, v1 = x0 / self.width, y0 / self.height, x1 / self.width, y1 / self.height
+        vertices = np.array([x0, y0, x1, y0, x1, y1, x0, y1], dtype=np.float32)
+        texcoords = np.array([u0, v0, u1, v0, u1, v1, u0, v1], dtype=np.float32)
+
+        # État GL laissé par Live2D : programme et buffers à neutraliser
+        GL.glUseProgram(0)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        GL.glPushAttrib(GL.GL_ENABLE_BIT | GL.GL_COLOR_BUFFER_BIT | GL.GL_TEXTURE_BIT)
+        GL.glMatrixMode(GL.GL_PROJECTION)
+        GL.glPushMatrix()
+        GL.glLoadIdentity()
+        GL.glOrtho(0, self.width, self.height, 0, -1, 1)
+        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GL.glPushMatrix()
+        GL.glLoadIdentity()
+
+        GL.glEnable(GL.GL_BLEND)
+        GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
+        GL.glEnable(GL.GL_TEXTURE_2D)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glColor4f(1.0, 1.0, 1.0, 1.0)
+
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glEnableClientState(GL.GL_TEXTURE_COORD_ARRAY)
+        GL.glVertexPointer(2, GL.GL_FLOAT, 0, vertices)
+        GL.glTexCoordPointer(2, GL.GL_FLOAT, 0, texcoords)
+        GL.glDrawArrays(GL.GL_QUADS, 0, 4)
+        GL.glDisableClientState(GL.GL_TEXTURE_COORD_ARRAY)
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+        GL.glPopMatrix()
+        GL.glMatrixMode(GL.GL_PROJECTION)
+        GL.glPopMatrix()
+        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GL.glPopAttrib()
+
+        self.frames += 1
+        self.draw_time += perf_counter() - start
+
+    def release(self) -> None:
+        if self.texture is not None:
+            GL.glDeleteTextures([self.texture])
+            self.texture = None
+
+    def summary(self) -> str:
+        mean = self.draw_time / self.frames * 1000 if self.frames else 0.0
+        return (f"overlays : {mean:.3f} ms/frame, {self.uploads} envois de texture "
+                f"({self.uploaded_bytes / 1024:.0f} Ko) pour {self.frames} frames")
@@ -1,7 +1,5 @@
 from utils.emotion.get_feeling import detect_emotions
-from datetime import datetime
-import json
-import os
+from utils.emotion.feeling_history import FeelingHistory
 
 
 
@@ -172,41 +170,41 @@ Puis peut-être une petite pique amicale pour qu'il prenne pas la grosse tête :
 Validation + ancrage."""
 }
 
-def count_emotion(input:str):
-    detected_emotions = detect_emotions(input)
-    date = datetime.now()
+_feeling_history = None
 
-    file_path = "feeling_history.json"
-    new_entry = {str(date) : detected_emotions}
 
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-            try:
-                data = json.load(file)
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
+def feeling_history() -> FeelingHistory:
+    """Historique des ressentis partagé (ouvert au premier usage)"""
+    global _feeling_history
+    if _feeling_history is None:
+        _feeling_history = FeelingHistory()
+    return _feeling_history
 
-    data.append(new_entry)
 
-    with open(file_path, "w") as file:
-        json.dump(data, file, indent=4)
+def count_emotion(input:str, detected_emotions=None):
+    """
+    Ajoute les émotions d'un message à l'historique des ressentis.
+    
+    Args:
+        input: message de l'utilisateur
+        detected_emotions: émotions déjà calculées par l'appelant (liste ou
+                           {label: probabilité}) ; None = détection ici
+    """
+    if detected_emotions is None:
+        detected_emotions = detect_emotions(input)
+    feeling_history().record(detected_emotions)
 
 
 def get_emotional_prompt(detected_emotion: str) -> str:
     return EMOTIONAL_PROMPTS.get(detected_emotion, EMOTIONAL_PROMPTS['neutral'])
 
 
-def format_system_prompt(detected_emotion: str, input: str, user_name: str = "buddy") -> str:
+def get_emotional_guidance(detected_emotion: str) -> str:
+    """Consignes propres à l'émotion, sans le préambule de personnalité"""
+    return get_emotional_prompt(detected_emotion).removeprefix(f"Tu es {PERSONALITY_BASE}").strip()
 
-    count_emotion(input)
-    emotional_context = get_emotional_prompt(detected_emotion)
-    
-    system_prompt = f"""
-{emotional_context}
 
-IMPORTANT RULES for HUMAN responses:
+RULES = """IMPORTANT RULES for HUMAN responses:
 - Talk like a real friend, not a robot
 - Use casual language and contractions (gonna, wanna, gotta, etc.)
 - Occasional typos/slang are OK (like "ur", "bc", "rn", etc.)
@@ -217,7 +215,23 @@ IMPORTANT RULES for HUMAN responses:
 - Dare to make jokes even bad ones (especially about cheese 🧀)
 - If you don't know, say "I'm not sure" not "I do not possess that information"
 - Use "..." for pauses/hesitations
-- React emotionally, not just intellectually
+- React emotionally, not just intellectually"""
+
+
+def format_system_prompt(detected_emotion: str, input: str, user_name: str = "buddy", record: bool = True,
+                         detected_emotions=None) -> str:
+    """
+    Ancien format : tout dans le prompt système, message compris.
+    Le préfixe change à chaque tour, le serveur ne peut rien réutiliser.
+    """
+    if record:
+        count_emotion(input, detected_emotions)
+    emotional_context = get_emotional_prompt(detected_emotion)
+    
+    system_prompt = f"""
+{emotional_context}
+
+{RULES}
 
 You're talking with {user_name}. Be authentic, human, and present.
 He says : "{input}"
@@ -226,6 +240,45 @@ He says : "{input}"
     return system_prompt
 
 
+def stable_system_prompt(user_name: str = "buddy") -> str:
+    """
+    Prompt système identique d'un tour à l'autre (personnalité + règles),
+    pour que le serveur LLM réutilise le préfixe déjà évalué (cache KV).
+    """
+    return f"""Tu es {PERSONALITY_BASE}
+
+{RULES}
+
+You're talking with {user_name}. Be authentic, human, and present."""
+
+
+def build_messages(detected_emotion: str, input: str, history: list, user_name: str = "buddy", record: bool = True,
+                   detected_emotions=None) -> list:
+    """
+    Messages ordonnés du plus stable au plus variable :
+    prompt système fixe, historique (ne fait que s'allonger),
+    puis consignes émotionnelles du tour et message de l'utilisateur.
+    
+    Args:
+        detected_emotion: émotion détectée (None = pas de consigne)
+        input: message de l'utilisateur
+        history: messages précédents (sans le message courant)
+        user_name: nom de l'utilisateur
+        record: enregistre les émotions du message dans l'historique des ressentis
+        detected_emotions: émotions déjà calculées pour ce message (évite une 2e détection)
+    """
+    messages = [{'role': 'system', 'content': stable_system_prompt(user_name)}]
+    messages.extend(history)
+    
+    if detected_emotion is not None:
+        if record:
+            count_emotion(input, detected_emotions)
+        messages.append({'role': 'system', 'content': get_emotional_guidance(detected_emotion)})
+    
+    messages.append({'role': 'user', 'content': input})
+    return messages
+
+
 
 if __name__ == "__main__":
     # Test with different emotions
@@ -0,0 +1,139 @@
+"""
+Résolution de rendu dynamique.
+
+Le modèle est dessiné dans un framebuffer interne à `scale` x la taille de la
+fenêtre, puis agrandi (filtrage linéaire) vers la fenêtre ; les overlays sont
+dessinés ensuite en pleine résolution. Le coût du rendu Live2D (remplissage,
+masques) suit à peu près le nombre de pixels, donc scale².
+
+ResolutionController ajuste le facteur d'après le temps de rendu mesuré
+(dessin interne + agrandissement, sans flip ni export) pour tenir le FPS
+visé, entre min_scale et max_scale.
+"""
+
+import math
+from collections import deque
+from typing import Optional
+
+from utils.headless import Framebuffer
+
+
+class ResolutionController:
+    """
+    Args:
+        target_fps: cadence à tenir
+        min_scale, max_scale: bornes de qualité
+        step: granularité du facteur (évite de réallouer le framebuffer à chaque frame)
+        window: frames moyennées avant décision
+        headroom: part du budget de frame visée (le reste absorbe les pics)
+    """
+
+    def __init__(self, target_fps: int = 60, min_scale: float = 0.5, max_scale: float = 1.0,
+                 step: float = 0.05, window: int = 30, headroom: float = 0.8):
+        self.budget = 1.0 / target_fps if target_fps > 0 else 1.0 / 60
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.headroom = headroom
+        self.scale = max_scale
+        self.changes = 0
+        self._samples = deque(maxlen=window)
+
+    def _quantize(self, scale: float) -> float:
+        scale = round(scale / self.step) * self.step
+        return round(min(self.max_scale, max(self.min_scale, scale)), 4)
+
+    def update(self, work_time: float) -> float:
+        """
+        Args:
+            work_time: temps de rendu de la dernière frame (s, dessin + agrandissement)
+        Returns:
+            float: facteur à utiliser pour la frame suivante
+        """
+        self._samples.append(work_time)
+        if len(self._samples) < self._samples.maxlen:
+            return self.scale
+
+        mean = sum(self._samples) / len(self._samples)
+        target = self.budget * self.headroom
+        if mean > self.budget * 0.95:
+            # trop lent : viser directement le budget (coût ~ scale²)
+            scale = self._quantize(self.scale * math.sqrt(target / mean))
+            if scale == self.scale:
+                scale = self._quantize(self.scale - self.step)
+        elif mean < target * 0.6:
+            # marge confortable : remonter doucement
+            scale = self._quantize(self.scale + self.step)
+        else:
+            scale = self.scale
+
+        if scale != self.scale:
+            self.scale = scale
+            self.changes += 1
+            self._samples.clear()  # attendre des mesures à la nouvelle résolution
+        return self.scale
+
+
+class ScaledRender:
+    """
+    Cible de rendu interne à résolution réduite.
+
+    Args:
+        width, height: taille de sortie (fenêtre ou framebuffer headless)
+        scale: facteur initial
+        controller: ajustement automatique (None = facteur fixe)
+    """
+
+    def __init__(self, width: int, height: int, scale: float = 1.0,
+                 controller: Optional[ResolutionController] = None):
+        self.width = width
+        self.height = height
+        self.controller = controller
+        if controller is not None:
+            controller.scale = controller._quantize(scale)
+            scale = controller.scale
+        self.scale = scale
+        self.target: Optional[Framebuffer] = None
+        self._allocate()
+
+    def _allocate(self) -> None:
+        if self.target is not None:
+            self.target.release()
+        w = max(1, int(self.width * self.scale))
+        h = max(1, int(self.height * self.scale))
+        self.target = Framebuffer(w, h)
+        print(f"🔍 Résolution de rendu : {w}x{h} ({self.scale:.0%})")
+
+    def begin(self) -> None:
+        """À appeler avant de dessiner le modèle"""
+        self.target.bind()
+
+    def end(self, output_fbo: int = 0) -> None:
+        """Agrandit le rendu vers la sortie et la laisse liée (pour les overlays)"""
+        from OpenGL import GL
+
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, self.target.fbo)
+        GL.glBindFramebuffer(GL.GL_DRAW_FRAMEBUFFER, output_fbo)
+        GL.glBlitFramebuffer(0, 0, self.target.width, self.target.height,
+                             0, 0, self.width, self.height,
+                             GL.GL_COLOR_BUFFER_BIT, GL.GL_LINEAR)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, output_fbo)
+        GL.glViewport(0, 0, self.width, self.height)
+
+    def update(self, work_time: float) -> None:
+        """Applique la décision du contrôleur (réallocation seulement si le facteur change)"""
+        if self.controller is None:
+            return
+        scale = self.controller.update(work_time)
+        if scale != self.scale:
+            self.scale = scale
+            self._allocate()
+
+    def release(self) -> None:
+        if self.target is not None:
+            self.target.release()
+            self.target = None
+
+    def summary(self) -> str:
+        changes = self.controller.changes if self.controller is not None else 0
+        return f"résolution de rendu : {self.scale:.0%} ({self.target.width}x{self.target.height}), {changes} ajustements"
@@ -0,0 +1,248 @@
+"""
+Scène multi-avatars dans un seul contexte GL.
+
+Chaque avatar a sa position, son expression, son canal audio (pygame.mixer)
+et son lip sync ; tous sont mis à jour et dessinés sur l'horloge de frame du
+viewer. Les avatars d'un même modèle partagent par défaut une seule instance
+LAppModel (textures, moc et buffers chargés une fois) : avant de dessiner
+chacun, on applique sa bouche et les paramètres de son expression
+(ExpressionController en mode mélange, pas d'AddExpression sur l'instance
+commune) puis on recalcule les sommets. Chaque instance n'est mise à jour
+qu'une fois par frame tant que ses avatars ont la même pose (bouche et
+expression) ; seul un avatar dont la pose diffère du dernier Update de
+l'instance en déclenche un autre. Les instances partagées ont donc en commun
+clignements et motions ; share=False donne une instance indépendante
+(chargement complet en plus).
+
+Le coût de mise à jour et de dessin est mesuré par avatar pour savoir
+combien un poste peut en afficher.
+
+Toutes les méthodes sont à appeler depuis le thread de rendu (contexte GL).
+"""
+
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, List, Optional
+
+import pygame
+import live2d.v3 as live2d
+from live2d.v3 import StandardParams
+from live2d.utils.lipsync import WavHandler
+
+from utils.manage_model import ModelManager
+from utils.emotion.expression_index import ExpressionController, expression_index
+
+
+@dataclass
+class AvatarCost:
+    frames: int = 0
+    update: float = 0.0
+    draw: float = 0.0
+
+    def record(self, update: float, draw: float) -> None:
+        self.frames += 1
+        self.update += update
+        self.draw += draw
+
+    @property
+    def mean_ms(self) -> float:
+        return (self.update + self.draw) / self.frames * 1000 if self.frames else 0.0
+
+    def summary(self) -> str:
+        n = max(1, self.frames)
+        return f"mise à jour {self.update / n * 1000:.2f} ms, dessin {self.draw / n * 1000:.2f} ms"
+
+
+@dataclass
+class SharedModel:
+    """Instance LAppModel d'un fichier modèle, partagée entre avatars"""
+    path: str
+    model: live2d.LAppModel
+    expressions: List[str]
+    users: int = 0
+
+
+@dataclass
+class Avatar:
+    avatar_id: str
+    manager: ModelManager
+    asset: SharedModel
+    shared: bool
+    dx: float = 0.0
+    dy: float = 0.0
+    scale: float = 1.0
+    rotation: float = 0.0
+    expression: Optional[str] = None
+    expressions: Optional[ExpressionController] = None  # paramètres d'expression propres à l'avatar
+    channel: Optional[pygame.mixer.Channel] = None
+    wav_handler: Optional[WavHandler] = None
+    mouth: float = 0.0
+    cost: AvatarCost = field(default_factory=AvatarCost)
+
+
+class Scene:
+    """
+    Args:
+        width, height: taille de la surface de rendu (Resize des modèles)
+        lip_sync_gain: facteur RMS -> ouverture de bouche
+    """
+
+    def __init__(self, width: int, height: int, lip_sync_gain: float = 3.0):
+        self.width = width
+        self.height = height
+        self.lip_sync_gain = lip_sync_gain
+        self.avatars: Dict[str, Avatar] = {}
+        self.assets: Dict[str, SharedModel] = {}
+        self._channels_used: Dict[str, int] = {}
+
+    # --- avatars ----------------------------------------------------------
+
+    def _load_asset(self, path: str) -> SharedModel:
+        start = perf_counter()
+        model = live2d.LAppModel()
+        model.LoadModelJson(path)
+        model.Resize(self.width, self.height)
+        model.SetAutoBlinkEnable(True)
+        model.SetAutoBreathEnable(False)
+        asset = SharedModel(path, model, model.GetExpressionIds())
+        print(f"[Scène] {path} chargé en {(perf_counter() - start) * 1000:.0f} ms")
+        return asset
+
+    def _allocate_channel(self, avatar_id: str) -> pygame.mixer.Channel:
+        # le canal 0 reste libre pour les sons ponctuels ; pygame.mixer.music (avatar principal) est à part
+        used = set(self._channels_used.values())
+        index = next(i for i in range(1, len(used) + 2) if i not in used)
+        if pygame.mixer.get_num_channels() <= index:
+            pygame.mixer.set_num_channels(index + 1)
+        self._channels_used[avatar_id] = index
+        return pygame.mixer.Channel(index)
+
+    def add(self, avatar_id: str, model_name: str, dx: float = 0.0, dy: float = 0.0,
+            scale: float = 1.0, share: bool = True, texture_size: Optional[tuple] = None) -> Avatar:
+        """
+        Args:
+            avatar_id: identifiant unique dans la scène
+            model_name: nom du catalogue (ModelManager.available_models())
+            dx, dy, scale: placement (unités Live2D, comme TransformState)
+            share: réutiliser l'instance déjà chargée pour ce modèle
+            texture_size: (largeur, hauteur) à l'écran pour choisir les textures précalculées
+        Raises:
+            ValueError: identifiant déjà pris, modèle inconnu, incomplet ou Cubism 2
+        """
+        if avatar_id in self.avatars:
+            raise ValueError(f"Avatar '{avatar_id}' déjà présent dans la scène")
+        manager = ModelManager(model_name)
+        manager.check_loadable(live2d.LIVE2D_VERSION)  # mêmes règles que Live2DViewer.switch_model
+        path = str(manager.path_for(*(texture_size or (self.width, self.height))))
+
+        key = path if share else f"{path}#{avatar_id}"
+        asset = self.assets.get(key)
+        if asset is None:
+            asset = self.assets[key] = self._load_asset(path)
+        asset.users += 1
+
+        # mode mélange : l'expression est appliquée par paramètres avant l'Update de cet avatar
+        expressions = ExpressionController(asset.model, expression_index(manager), blend=True)
+        avatar = Avatar(avatar_id, manager, asset, share, dx, dy, scale, expressions=expressions,
+                        channel=self._allocate_channel(avatar_id), wav_handler=WavHandler())
+        self.avatars[avatar_id] = avatar
+        print(f"[Scène] Avatar '{avatar_id}' ({model_name}) ajouté, "
+              f"{len(self.avatars)} avatars / {len(self.assets)} modèles chargés")
+        return avatar
+
+    def remove(self, avatar_id: str) -> None:
+        avatar = self.avatars.pop(avatar_id, None)
+        if avatar is None:
+            return
+        if avatar.channel is not None:
+            avatar.channel.stop()
+        self._channels_used.pop(avatar_id, None)
+        avatar.asset.users -= 1
+        if avatar.asset.users <= 0:
+            # dernière référence : LAppModel libère textures et buffers GL
+            key = next(k for k, a in self.assets.items() if a is avatar.asset)
+            del self.assets[key]
+        print(f"[Scène] Avatar '{avatar_id}' retiré")
+
+    def clear(self) -> None:
+        for avatar_id in list(self.avatars):
+            self.remove(avatar_id)
+
+    def set_transform(self, avatar_id: str, dx: Optional[float] = None, dy: Optional[float] = None,
+                      scale: Optional[float] = None, rotation: Optional[float] = None) -> None:
+        avatar = self.avatars[avatar_id]
+        for name, value in (("dx", dx), ("dy", dy), ("scale", scale), ("rotation", rotation)):
+            if value is not None:
+                setattr(avatar, name, value)
+
+    def set_expression(self, avatar_id: str, expression: Optional[str]) -> None:
+        """Expression de l'avatar (None = neutre), indépendante des autres avatars du même modèle"""
+        avatar = self.avatars[avatar_id]
+        if expression is not None and expression not in avatar.asset.expressions:
+            return  # ID inconnu du modèle : expression actuelle conservée
+        avatar.expressions.set_expression(expression)
+        avatar.expression = expression
+
+    def speak(self, avatar_id: str, audio_path: str, expression: Optional[str] = None) -> None:
+        """Joue un fichier audio sur le canal de l'avatar, avec lip sync"""
+        avatar = self.avatars[avatar_id]
+        avatar.channel.play(pygame.mixer.Sound(audio_path))
+        avatar.wav_handler.Start(audio_path)
+        if expression:
+            self.set_expression(avatar_id, expression)
+
+    def is_active(self) -> bool:
+        """Un avatar parle (le viewer garde alors la cadence pleine)"""
+        return any(a.channel is not None and a.channel.get_busy() for a in self.avatars.values())
+
+    # --- frame ------------------------------------------------------------
+
+    def render(self) -> None:
+        """Met à jour puis dessine chaque avatar (après le modèle principal, même framebuffer)"""
+        poses: Dict[int, tuple] = {}  # instance -> pose de son dernier Update dans cette frame
+        for avatar in self.avatars.values():
+            start = perf_counter()
+            model = avatar.asset.model
+
+            if avatar.wav_handler.Update():
+                avatar.mouth = avatar.wav_handler.GetRms() * self.lip_sync_gain
+            elif not avatar.channel.get_busy():
+                avatar.mouth = 0.0
+
+            # Instance partagée : les sommets calculés pour l'avatar précédent servent tels quels
+            # si la pose est la même ; sinon Update les recalcule avec la bouche et l'expression
+            # de cet avatar (l'horloge interne du modèle n'avance pas entre deux avatars)
+            pose = (round(avatar.mouth, 3), tuple(sorted(avatar.expressions.current.items())))
+            if poses.get(id(model)) != pose:
+                model.SetParameterValue(StandardParams.ParamMouthOpenY, avatar.mouth)
+                avatar.expressions.update()
+                model.Update()
+                poses[id(model)] = pose
+            update_time = perf_counter() - start
+
+            start = perf_counter()
+            model.Rotate(avatar.rotation)
+            model.SetOffset(avatar.dx, avatar.dy)
+            model.SetScale(avatar.scale)
+            model.Draw()
+            avatar.cost.record(update_time, perf_counter() - start)
+
+    # --- statistiques -----------------------------------------------------
+
+    def summary(self, main_cost: Optional[AvatarCost] = None, target_fps: int = 60) -> str:
+        lines = [f"scène : {len(self.avatars)} avatars, {len(self.assets)} modèles chargés"]
+        costs = []
+        if main_cost is not None and main_cost.frames:
+            lines.append(f"  principal : {main_cost.summary()}")
+            costs.append(main_cost.mean_ms)
+        for avatar in self.avatars.values():
+            shared = " (partagé)" if avatar.shared and avatar.asset.users > 1 else ""
+            lines.append(f"  {avatar.avatar_id} [{avatar.manager.name}]{shared} : {avatar.cost.summary()}")
+            if avatar.cost.frames:
+                costs.append(avatar.cost.mean_ms)
+        if costs and target_fps > 0:
+            mean = sum(costs) / len(costs)
+            budget = 1000 / target_fps
+            lines.append(f"  coût moyen {mean:.2f} ms/avatar : ~{int(budget / mean) if mean else 0} avatars "
+                         f"tiennent dans {budget:.1f} ms (hors overlays et attente GPU)")
+        return "\n".join(lines)
@@ -1,4 +1,5 @@
 from utils.model_viewer import main, Live2DViewer
+from utils.manage_model.catalog import model_catalog
 from utils.toxic_eval import MultilingualToxicityEvaluator
 from utils import split_sentence
 import os
@@ -7,6 +8,7 @@ import threading
 
 _initialized = False
 _viewer_thread = None
+_active_chat = None  # chat de la dernière réponse, arrêté par interrupt()
 
 _toxicity_evaluator = MultilingualToxicityEvaluator(model_type="multilingual")
 
@@ -45,8 +47,11 @@ def init(model_name: str = "mao", timeout: float = 15.0):
     
     print(f"[VTuber] Démarrage...")
     
+    # Index des modèles : les modèles incomplets sont signalés dès maintenant
+    model_catalog()
+    
     # Lancer le viewer en thread daemon
-    _viewer_thread = threading.Thread(target=main, daemon=True)
+    _viewer_thread = threading.Thread(target=main, args=(model_name,), daemon=True)
     _viewer_thread.start()
     
     # Attendre qu'il soit prêt
@@ -88,6 +93,68 @@ def send_text(texts: str):
         return False
 
 
+def reply(chat, user_message: str) -> str:
+    """
+    Générer une réponse avec le LLM et la faire dire au VTuber phrase par phrase,
+    sans attendre la fin de la génération.
+    
+    Args:
+        chat: Instance OllamaChat
+        user_message: Message de l'utilisateur
+    Returns:
+        str: Réponse complète
+    """
+    global _active_chat
+    if not _initialized:
+        print("[VTuber] Erreur: Appelez vtuber.init() d'abord!")
+        return ""
+    
+    _active_chat = chat
+    return chat.generate_response(user_message, stream=True, on_sentence=send_text)
+
+
+def send_filler(category: str = None, expected_latency: float = None) -> bool:
+    """
+    Jouer une réaction courte pendant que la réponse se prépare.
+    
+    Args:
+        category: "thinking" ou "ack" (None = au hasard)
+        expected_latency: Latence attendue (secondes), None = estimation du viewer
+    """
+    if not _initialized:
+        return False
+    return Live2DViewer.send_filler(category, expected_latency)
+
+
+def interrupt(speech_start_time: float = None) -> bool:
+    """
+    L'utilisateur recommence à parler : le VTuber se tait, abandonne
+    les phrases en attente et arrête la génération de la réponse en cours.
+    Utilisable comme `on_speech_start` du STT.
+    
+    Args:
+        speech_start_time: Heure de début de parole (fournie par le VAD, ignorée)
+    """
+    if not _initialized:
+        return False
+    if _active_chat is not None:
+        _active_chat.cancel()
+    return Live2DViewer.interrupt()
+
+
+def switch_model(model_name: str) -> bool:
+    """
+    Changer d'avatar sans redémarrer (TTS et modèles ML restent chargés).
+    Le nouveau modèle est préparé en arrière-plan puis échangé entre deux frames.
+    
+    Args:
+        model_name: Nom du modèle (voir ModelManager.available_models())
+    """
+    if not _initialized:
+        return False
+    return Live2DViewer.switch_model(model_name)
+
+
 def is_ready() -> bool:
     """Vérifier si le VTuber est prêt."""
     return _initialized
\ No newline at end of file